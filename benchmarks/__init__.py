@@ -0,0 +1,3 @@
+"""
+Benchmarks for the PDF rendering, OCR and extraction paths
+"""
@@ -0,0 +1,46 @@
+"""
+Fixed render DPI vs. adaptive DPI (chosen per page from the measured text
+size): OCR time and character accuracy for small to large print.
+
+Usage: python benchmarks/bench_adaptive_dpi.py [--pages 4] [--font-sizes 7 10 14 24]
+"""
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the root directory to the Python path
+root_dir = Path(__file__).parent.parent
+sys.path.append(str(root_dir))
+
+from benchmarks.run_suite import character_accuracy
+from benchmarks.synthetic import make_scanned_pdf
+from utils.pdf_processing import iter_ocr_pages, DEFAULT_RENDER_DPI
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pages', type=int, default=4, help='pages per synthetic PDF')
+    parser.add_argument('--font-sizes', nargs='+', type=int, default=[7, 10, 14, 24], help='print sizes (pt)')
+    parser.add_argument('--scan-dpi', type=int, default=300, help='resolution of the synthetic scans')
+    args = parser.parse_args()
+
+    print(f"{'font pt':>8}{'mode':>10}{'dpi':>8}{'time (s)':>10}{'pages/sec':>11}{'accuracy':>10}")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for font_size in args.font_sizes:
+            pdf_path = str(Path(temp_dir) / f"print_{font_size}pt.pdf")
+            truth = make_scanned_pdf(pdf_path, args.pages, dpi=args.scan_dpi, font_size=font_size)
+            pages = list(range(args.pages))
+            for mode, adaptive in (('fixed', False), ('adaptive', True)):
+                start = time.perf_counter()
+                results = list(iter_ocr_pages(pdf_path, pages, languages=['eng'],
+                                              detect_lang=False, adaptive_dpi=adaptive))
+                elapsed = time.perf_counter() - start
+                dpi = statistics.median(r.dpi or DEFAULT_RENDER_DPI for r in results)
+                accuracy = character_accuracy('\n'.join(truth), '\n'.join(r.text for r in results))
+                print(f"{font_size:>8}{mode:>10}{dpi:>8.0f}{elapsed:>10.2f}"
+                      f"{len(pages) / elapsed:>11.2f}{accuracy:>10.3f}")
+
+if __name__ == "__main__":
+    main()
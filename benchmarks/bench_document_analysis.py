@@ -0,0 +1,106 @@
+"""
+Document Analysis page on a large born-digital PDF: the previous flow
+(text extracted for the full text, then again page by page for the
+structure, a TF-IDF vectorizer fitted on the full text, regexes compiled
+per line) vs. the one-pass DocumentAnalyzer.
+
+Usage: python benchmarks/bench_document_analysis.py [--pages 1000]
+"""
+import argparse
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+
+# Add the root directory to the Python path
+root_dir = Path(__file__).parent.parent
+sys.path.append(str(root_dir))
+
+from PyPDF2 import PdfReader
+from benchmarks.synthetic import make_born_digital_pdf
+from utils.document_analysis import DocumentAnalyzer
+
+def legacy_analysis(pdf_path):
+    """Previous implementation of the page, without the Streamlit calls"""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    reader = PdfReader(pdf_path)
+    full_text = "".join((page.extract_text() or "") + "\n" for page in reader.pages)
+
+    structure = []
+    for page in PdfReader(pdf_path).pages:
+        current_section = {'type': 'text', 'content': []}
+        for line in (page.extract_text() or "").split('\n'):
+            if len(line.split()) < 5 and (line.strip().isupper() or re.search(r'\d+$', line)):
+                if current_section['content']:
+                    structure.append(current_section)
+                    current_section = {'type': 'text', 'content': []}
+                structure.append({'type': 'header', 'content': line.strip()})
+            elif re.match(r'^[\d•\-\*]\s+', line):
+                if current_section['type'] != 'list':
+                    if current_section['content']:
+                        structure.append(current_section)
+                    current_section = {'type': 'list', 'content': []}
+                current_section['content'].append(line.strip())
+            else:
+                if current_section['type'] == 'list' and current_section['content']:
+                    structure.append(current_section)
+                    current_section = {'type': 'text', 'content': []}
+                current_section['content'].append(line.strip())
+
+    vectorizer = TfidfVectorizer(max_features=20)
+    tfidf = vectorizer.fit_transform([full_text])
+    keywords = dict(zip(vectorizer.get_feature_names_out(), tfidf.toarray()[0]))
+
+    word_freq = Counter(re.findall(r'\b\w+\b', full_text.lower())).most_common(20)
+
+    words = full_text.split()
+    syllables = sum(len(re.findall(r'[aeiou]+', word.lower())) for word in words)
+    sentences = full_text.split('.')
+    return keywords, word_freq, len(words), len(sentences), syllables
+
+def single_pass_analysis(pdf_path):
+    analyzer = DocumentAnalyzer()
+    for page in PdfReader(pdf_path).pages:
+        analyzer.feed_page(page.extract_text() or "")
+    return analyzer.result()
+
+def measure(func, pdf_path):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(pdf_path)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak / 1024 / 1024
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pages', type=int, default=1000, help='pages of the synthetic PDF')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pdf_path = str(Path(temp_dir) / 'large.pdf')
+        make_born_digital_pdf(pdf_path, args.pages)
+
+        print(f"{args.pages} pages")
+        print(f"{'analysis':>12}{'time (s)':>10}{'peak MB':>10}")
+        legacy, legacy_s, legacy_mb = measure(legacy_analysis, pdf_path)
+        print(f"{'previous':>12}{legacy_s:>10.2f}{legacy_mb:>10.1f}")
+        result, single_s, single_mb = measure(single_pass_analysis, pdf_path)
+        print(f"{'one pass':>12}{single_s:>10.2f}{single_mb:>10.1f}")
+        print(f"time saved: {legacy_s - single_s:.2f} s ({legacy_s / single_s:.2f}x), "
+              f"analysis itself {result['seconds']:.2f} s")
+
+        keywords, word_freq, words, sentences, _ = legacy
+        same_keywords = set(keywords) == set(result['keywords'])
+        same_counts = (words, sentences) == (result['readability']['total_words'],
+                                             result['readability']['total_sentences'])
+        print(f"same keywords: {same_keywords}, same word/sentence counts: {same_counts}, "
+              f"same top words: {dict(word_freq) == dict(result['word_frequency'])}")
+
+if __name__ == "__main__":
+    main()
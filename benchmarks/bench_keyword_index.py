@@ -0,0 +1,79 @@
+"""
+Corpus keyword scoring: refitting a TfidfVectorizer on the whole corpus for
+every new document (what corpus IDF would cost with the previous approach)
+vs. adding the document to the incremental KeywordIndex (a journal append)
+and scoring it against the stored document frequencies. The periodic merge
+of the journal into the index file is timed separately.
+
+Usage: python benchmarks/bench_keyword_index.py [--documents 100 1000 10000] [--words 2000]
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+# Add the root directory to the Python path
+root_dir = Path(__file__).parent.parent
+sys.path.append(str(root_dir))
+
+from utils.document_analysis import WORD_RE
+from utils.keyword_index import KeywordIndex
+
+def make_corpus(count, words, vocabulary=50000, seed=0):
+    """Documents of Zipf-distributed words, so a few terms are in every document"""
+    rng = random.Random(seed)
+    terms = [f"term{i}" for i in range(vocabulary)]
+    weights = [1 / (rank + 1) for rank in range(vocabulary)]
+    return [' '.join(rng.choices(terms, weights, k=words)) for _ in range(count)]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--documents', nargs='+', type=int, default=[100, 1000, 10000],
+                        help='corpus sizes')
+    parser.add_argument('--words', type=int, default=2000, help='words per document')
+    parser.add_argument('--refit-limit', type=int, default=2000,
+                        help='largest corpus the TF-IDF refit is measured on')
+    args = parser.parse_args()
+
+    print(f"{'documents':>10}{'refit (s)':>11}{'index add+score (ms)':>22}{'merge (ms)':>12}"
+          f"{'index build (s)':>17}{'index MB':>10}")
+    for count in args.documents:
+        corpus = make_corpus(count + 1, args.words)
+        new_document = corpus.pop()
+
+        refit = None
+        if count <= args.refit_limit:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            start = time.perf_counter()
+            vectorizer = TfidfVectorizer()
+            vectorizer.fit_transform(corpus + [new_document])
+            refit = time.perf_counter() - start
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            index = KeywordIndex(temp_dir)
+            start = time.perf_counter()
+            for i, text in enumerate(corpus):
+                index.add(i, Counter(WORD_RE.findall(text.lower())), save=False)
+            index.save()
+            build = time.perf_counter() - start
+
+            start = time.perf_counter()
+            counts = Counter(WORD_RE.findall(new_document.lower()))
+            index.add('new', counts)
+            index.keywords(counts)
+            update = time.perf_counter() - start
+
+            start = time.perf_counter()
+            index.save()
+            merge = time.perf_counter() - start
+            size = index.disk_bytes() / 1024 / 1024
+
+        refit_text = f"{refit:.2f}" if refit is not None else '-'
+        print(f"{count:>10}{refit_text:>11}{update * 1000:>22.1f}{merge * 1000:>12.1f}"
+              f"{build:>17.2f}{size:>10.2f}")
+
+if __name__ == "__main__":
+    main()
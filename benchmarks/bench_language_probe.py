@@ -0,0 +1,70 @@
+"""
+perform_ocr with language auto-detection: the previous double OCR pass per
+page compared with the cached script probe, on a mixed Arabic/English corpus.
+
+Both paths use the same OCR engine (see utils.ocr_backends). --languages
+sets the probe languages, e.g. 'eng' where no Arabic traineddata is
+installed (then the corpus is English only).
+
+Usage: python benchmarks/bench_language_probe.py [--pages 10] [--languages eng+ara]
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the root directory to the Python path
+root_dir = Path(__file__).parent.parent
+sys.path.append(str(root_dir))
+
+from benchmarks.synthetic import make_scanned_pdf
+from utils import pdf_processing
+from utils.ocr_backends import get_ocr_backend
+from utils.pdf_processing import (
+    perform_ocr,
+    render_pages,
+    parse_page_range,
+    get_page_count,
+    extract_text_from_image
+)
+from utils.text_processing import detect_languages, preprocess_image_for_ocr
+
+def double_pass_ocr(pdf_path, probe_langs):
+    """Previous behaviour: a pass with all probe languages for detection, then the real pass"""
+    pages = parse_page_range(None, get_page_count(pdf_path))
+    text = ""
+    for page_num, image in render_pages(pdf_path, pages, fmt='ppm', grayscale=True, size=(1700, None)):
+        image = preprocess_image_for_ocr(image)
+        langs = detect_languages(get_ocr_backend().image_to_string(image, probe_langs))
+        text += extract_text_from_image(image, langs) + "\n"
+    return text
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pages', type=int, default=10, help='pages in the synthetic PDF')
+    parser.add_argument('--languages', default='+'.join(pdf_processing.PROBE_LANGUAGES),
+                        help="probe languages, e.g. 'eng+ara'")
+    args = parser.parse_args()
+    probe_langs = args.languages.split('+')
+    pdf_processing.PROBE_LANGUAGES = probe_langs
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pdf_path = str(Path(temp_dir) / 'mixed.pdf')
+        make_scanned_pdf(pdf_path, args.pages, dpi=150, mixed='ara' in probe_langs)
+
+        start = time.perf_counter()
+        double_pass_ocr(pdf_path, probe_langs)
+        double_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        perform_ocr(pdf_path, detect_lang=True)
+        probe_time = time.perf_counter() - start
+
+        print(f"pages:              {args.pages}")
+        print(f"double pass (s):    {double_time:.2f}")
+        print(f"cached probe (s):   {probe_time:.2f}")
+        print(f"speedup:            {double_time / probe_time:.2f}x")
+
+if __name__ == "__main__":
+    main()
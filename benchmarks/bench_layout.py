@@ -0,0 +1,59 @@
+"""
+Whole-page OCR vs. layout analysis (OCR of the text blocks only, in
+reading order) on synthetic two-column pages with a photo: OCR time and
+character accuracy against the text that was drawn.
+
+Usage: python benchmarks/bench_layout.py [--pages 3] [--dpi 150]
+"""
+import argparse
+import random
+import sys
+import time
+from difflib import SequenceMatcher
+from pathlib import Path
+
+# Add the root directory to the Python path
+root_dir = Path(__file__).parent.parent
+sys.path.append(str(root_dir))
+
+from benchmarks.synthetic import render_layout_page
+from utils.instrumentation import StageTimings, collect_timings
+from utils.layout_analysis import find_text_blocks
+from utils.ocr_backends import get_ocr_backend
+from utils.pdf_processing import extract_text_from_image
+from utils.text_processing import PreprocessingPipeline
+
+def accuracy(expected, text):
+    return SequenceMatcher(None, ' '.join(expected.split()), ' '.join(text.split()), autojunk=False).ratio()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pages', type=int, default=3, help='number of synthetic pages')
+    parser.add_argument('--dpi', type=int, default=150, help='resolution of the synthetic pages')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    pages = [render_layout_page(rng, dpi=args.dpi) for _ in range(args.pages)]
+    backend = get_ocr_backend()
+    # Warm up the engine so its start-up is not counted in the first mode
+    backend.image_to_string(pages[0][0].crop((0, 0, 200, 100)), ['eng'])
+
+    print(f"{len(pages)} pages of {pages[0][0].width}x{pages[0][0].height}, backend: {backend.name}, "
+          f"blocks on page 1: {len(find_text_blocks(pages[0][0]))}")
+    print(f"{'mode':>8}{'ms/page':>10}{'layout ms':>11}{'accuracy':>10}")
+    for mode, layout in (('page', False), ('layout', True)):
+        total = layout_ms = score = 0.0
+        for page, expected in pages:
+            timings = StageTimings()
+            pipeline = PreprocessingPipeline()
+            start = time.perf_counter()
+            with collect_timings(timings):
+                text = extract_text_from_image(page, ['eng'], pipeline, backend=backend, layout=layout)
+            total += time.perf_counter() - start
+            layout_ms += timings.to_dict().get('layout', 0.0)
+            score += accuracy(expected, text)
+        print(f"{mode:>8}{total * 1000 / len(pages):>10.1f}{layout_ms / len(pages):>11.1f}"
+              f"{score / len(pages):>10.3f}")
+
+if __name__ == "__main__":
+    main()
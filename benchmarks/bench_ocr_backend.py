@@ -0,0 +1,67 @@
+"""
+Per-page OCR latency of the tesseract command line (a process per call)
+vs. the pooled tesserocr engines, on small pages where process startup and
+traineddata loading dominate.
+
+Usage: python benchmarks/bench_ocr_backend.py [--pages 20] [--lines 3] [--languages eng eng+ara]
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add the root directory to the Python path
+root_dir = Path(__file__).parent.parent
+sys.path.append(str(root_dir))
+
+from benchmarks.synthetic import load_arabic_font, make_page_lines, render_text_page
+from utils.ocr_backends import TESSEROCR_AVAILABLE, TesseractCLIBackend, TesserocrBackend
+
+def make_small_pages(count, lines, dpi=150):
+    """Pages cropped to a few lines of text, like receipts or form fields"""
+    rng = random.Random(0)
+    font = load_arabic_font(max(12, dpi // 7))
+    pages = []
+    for _ in range(count):
+        page = render_text_page(make_page_lines(rng, line_count=lines, words_per_line=6), dpi=dpi, font=font)
+        bottom = dpi // 2 + lines * max(12, dpi // 6, int(font.size * 1.4)) + dpi // 4
+        pages.append(page.crop((0, 0, page.width, bottom)))
+    return pages
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pages', type=int, default=20, help='number of small pages')
+    parser.add_argument('--lines', type=int, default=3, help='text lines per page')
+    parser.add_argument('--languages', nargs='+', default=['eng', 'eng+ara'], help='language sets')
+    args = parser.parse_args()
+
+    pages = make_small_pages(args.pages, args.lines)
+    backends = [TesseractCLIBackend()]
+    if TESSEROCR_AVAILABLE:
+        backends.append(TesserocrBackend())
+    else:
+        print("tesserocr is not installed; only the command line backend is measured")
+
+    print(f"{len(pages)} pages of {pages[0].width}x{pages[0].height}")
+    print(f"{'backend':>10}{'languages':>10}{'first (ms)':>12}{'p50 (ms)':>10}{'p95 (ms)':>10}{'pages/sec':>11}")
+    for languages in args.languages:
+        langs = languages.split('+')
+        for backend in backends:
+            latencies = []
+            for page in pages:
+                start = time.perf_counter()
+                backend.image_to_string(page, langs)
+                latencies.append((time.perf_counter() - start) * 1000)
+            # The first call of the pooled backend includes loading the engine
+            steady = sorted(latencies[1:] or latencies)
+            p95 = steady[min(len(steady) - 1, int(len(steady) * 0.95))]
+            print(f"{backend.name:>10}{languages:>10}{latencies[0]:>12.1f}"
+                  f"{statistics.median(steady):>10.1f}{p95:>10.1f}"
+                  f"{len(latencies) * 1000 / sum(latencies):>11.2f}")
+        for backend in backends:
+            backend.close()
+
+if __name__ == "__main__":
+    main()
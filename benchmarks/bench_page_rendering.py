@@ -0,0 +1,55 @@
+"""
+Rendering time vs. page range size: whole-document rasterization followed by
+slicing compared with page-targeted rendering.
+
+Usage: python benchmarks/bench_page_rendering.py [--pages 200]
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the root directory to the Python path
+root_dir = Path(__file__).parent.parent
+sys.path.append(str(root_dir))
+
+from pdf2image import convert_from_path
+from benchmarks.synthetic import make_scanned_pdf
+from utils.pdf_processing import parse_page_range, get_page_count, render_pages
+
+def render_whole_document(pdf_path, page_range):
+    """Previous behaviour: rasterize every page, then keep the selected ones"""
+    images = convert_from_path(pdf_path)
+    return [images[p] for p in parse_page_range(page_range, len(images))]
+
+def render_selected_pages(pdf_path, page_range):
+    """Page-targeted rendering"""
+    pages = parse_page_range(page_range, get_page_count(pdf_path))
+    return [image for _, image in render_pages(pdf_path, pages)]
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, len(result)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pages', type=int, default=200, help='pages in the synthetic PDF')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pdf_path = str(Path(temp_dir) / 'synthetic.pdf')
+        make_scanned_pdf(pdf_path, args.pages)
+
+        ranges = ['1', '5-7', '1-10', f'1-{args.pages // 4}', f'1,3,5-{args.pages // 2}', '']
+        print(f"{'range':<20}{'pages':>8}{'whole doc (s)':>16}{'targeted (s)':>16}{'speedup':>10}")
+        for page_range in ranges:
+            whole_time, count = timed(render_whole_document, pdf_path, page_range)
+            targeted_time, _ = timed(render_selected_pages, pdf_path, page_range)
+            label = page_range or 'all'
+            print(f"{label:<20}{count:>8}{whole_time:>16.3f}{targeted_time:>16.3f}"
+                  f"{whole_time / targeted_time:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
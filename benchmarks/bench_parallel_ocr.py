@@ -0,0 +1,45 @@
+"""
+OCR throughput (pages/sec) vs. number of worker processes on a synthetic
+multi-page scanned PDF.
+
+Usage: python benchmarks/bench_parallel_ocr.py [--pages 24] [--max-workers 8]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the root directory to the Python path
+root_dir = Path(__file__).parent.parent
+sys.path.append(str(root_dir))
+
+from benchmarks.synthetic import make_scanned_pdf
+from utils.pdf_processing import iter_ocr_pages
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pages', type=int, default=24, help='pages in the synthetic PDF')
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pdf_path = str(Path(temp_dir) / 'synthetic.pdf')
+        make_scanned_pdf(pdf_path, args.pages, dpi=150)
+        pages = list(range(args.pages))
+
+        worker_counts = sorted({1, 2, 4, args.max_workers} & set(range(1, args.max_workers + 1)))
+        baseline = None
+        print(f"{'workers':>8}{'time (s)':>12}{'pages/sec':>12}{'speedup':>10}")
+        for workers in worker_counts:
+            start = time.perf_counter()
+            results = list(iter_ocr_pages(pdf_path, pages, languages=['eng'],
+                                          save_images=False, workers=workers))
+            elapsed = time.perf_counter() - start
+            assert [r.page_num for r in results] == pages
+            baseline = baseline or elapsed
+            print(f"{workers:>8}{elapsed:>12.2f}{len(pages) / elapsed:>12.2f}{baseline / elapsed:>9.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Per-stage preprocessing time: the previous PIL-based stages (converting
+PIL -> NumPy -> PIL around every OpenCV call) vs. the ndarray engine of
+PreprocessingPipeline.
+
+With --noise the page gets gaussian noise of that sigma, which changes the
+denoising method the pipeline picks (none, median blur or NL-means).
+
+Usage: python benchmarks/bench_preprocessing.py [--dpi 300] [--repeat 5] [--noise 0]
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add the root directory to the Python path
+root_dir = Path(__file__).parent.parent
+sys.path.append(str(root_dir))
+
+import numpy as np
+from PIL import Image, ImageEnhance
+from benchmarks.synthetic import make_page_lines, render_text_page
+from utils.text_processing import OPENCV_AVAILABLE, PageArray, PreprocessingPipeline
+
+if OPENCV_AVAILABLE:
+    import cv2
+
+def legacy_stages():
+    """Previous implementation: every stage takes and returns a PIL image"""
+    def contrast(image):
+        if OPENCV_AVAILABLE:
+            clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+            return Image.fromarray(clahe.apply(np.array(image)))
+        image = ImageEnhance.Contrast(image).enhance(2.0)
+        return ImageEnhance.Sharpness(image).enhance(1.5)
+
+    def denoise(image):
+        if OPENCV_AVAILABLE:
+            return Image.fromarray(cv2.fastNlMeansDenoising(np.array(image)))
+        return image
+
+    def tone(image):
+        image = ImageEnhance.Contrast(image).enhance(1.5)
+        return ImageEnhance.Brightness(image).enhance(1.2)
+
+    def binarize(image):
+        if OPENCV_AVAILABLE:
+            return Image.fromarray(cv2.adaptiveThreshold(
+                np.array(image), 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2))
+        return image.point(lambda x: 0 if x < 128 else 255, '1')
+
+    return {
+        'grayscale': lambda image: image.convert('L'),
+        'contrast': contrast,
+        'denoise': denoise,
+        'tone': tone,
+        'binarize': binarize,
+    }
+
+def time_stage(func, value, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(value)
+        best = min(best, time.perf_counter() - start)
+    return result, best * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--dpi', type=int, default=300, help='resolution of the synthetic page')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per stage (best time is kept)')
+    parser.add_argument('--skip-denoise', action='store_true', help='leave out the slow NL-means stage')
+    parser.add_argument('--noise', type=float, default=0.0, help='sigma of gaussian noise added to the page')
+    args = parser.parse_args()
+
+    page = render_text_page(make_page_lines(random.Random(0)), dpi=args.dpi)
+    if args.noise:
+        noisy = np.asarray(page, dtype=np.float32) + np.random.default_rng(0).normal(0, args.noise, (page.height, page.width))
+        page = Image.fromarray(np.clip(noisy, 0, 255).astype(np.uint8))
+    page = page.convert('RGB')
+    pipeline = PreprocessingPipeline()
+    legacy = legacy_stages()
+    stages = [s for s in PreprocessingPipeline.STAGES if not (args.skip_denoise and s == 'denoise')]
+
+    print(f"page {page.width}x{page.height}, OpenCV: {OPENCV_AVAILABLE}")
+    print(f"{'stage':>10}{'PIL (ms)':>12}{'ndarray (ms)':>14}{'speedup':>10}")
+    legacy_value, array_value = page, PageArray(np.asarray(page))
+    legacy_total = array_total = 0.0
+    for stage in stages:
+        legacy_value, legacy_ms = time_stage(legacy[stage], legacy_value, args.repeat)
+        array_value, array_ms = time_stage(getattr(pipeline, f'_{stage}'), array_value, args.repeat)
+        array_value = PageArray(array_value)
+        legacy_total += legacy_ms
+        array_total += array_ms
+        print(f"{stage:>10}{legacy_ms:>12.2f}{array_ms:>14.2f}{legacy_ms / array_ms:>9.2f}x")
+    print(f"{'total':>10}{legacy_total:>12.2f}{array_total:>14.2f}{legacy_total / array_total:>9.2f}x")
+    print(f"denoising chosen: {dict(pipeline.denoise_choices)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Search catalog: insert throughput with one commit per page vs. one
+transaction per batch of documents, and query latency on the result.
+
+Usage: python benchmarks/bench_search.py [--documents 200] [--pages 20] [--queries 200]
+"""
+import argparse
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the root directory to the Python path
+root_dir = Path(__file__).parent.parent
+sys.path.append(str(root_dir))
+
+from benchmarks.synthetic import make_mixed_lines
+from utils.catalog import SCHEMA, DocumentCatalog, normalize_for_search
+from utils.models import PageResult
+
+def make_documents(count, pages, seed=0):
+    rng = random.Random(seed)
+    return [
+        (f"hash{d}", f"document_{d}.pdf",
+         [PageResult(p, '\n'.join(make_mixed_lines(rng, line_count=30)), ['eng', 'ara']) for p in range(pages)],
+         pages)
+        for d in range(count)
+    ]
+
+# The same words as PDF text layers often store them: Arabic presentation forms
+PRESENTATION_FORMS_PAGE = 'ﺍﻟﻌﻘﺪ ﺍﻟﻤﻮﺣﺪ ﻟﻠﺸﺮﻛﺔ'
+PRESENTATION_FORMS_QUERIES = ['العقد', 'العقد الموحد', '"الموحد للشركة"']
+
+def insert_per_page(path, documents):
+    """One INSERT and commit per page, as a naive implementation would"""
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    for file_hash, name, pages, total_pages in documents:
+        document_id = conn.execute("INSERT INTO documents (file_hash, name, total_pages) VALUES (?, ?, ?)",
+                                   (file_hash, name, total_pages)).lastrowid
+        conn.commit()
+        for page in pages:
+            page_id = conn.execute("INSERT INTO pages (document_id, page_num, text) VALUES (?, ?, ?)",
+                                   (document_id, page.page_num, page.text)).lastrowid
+            conn.execute("INSERT INTO pages_fts (rowid, body) VALUES (?, ?)",
+                         (page_id, normalize_for_search(page.text)))
+            conn.commit()
+    conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--documents', type=int, default=200, help='documents in the catalog')
+    parser.add_argument('--pages', type=int, default=20, help='pages per document')
+    parser.add_argument('--queries', type=int, default=200, help='queries to time')
+    args = parser.parse_args()
+
+    documents = make_documents(args.documents, args.pages)
+    page_count = args.documents * args.pages
+    rng = random.Random(1)
+    words = [w for _, _, pages, _ in documents[:5] for w in pages[0].text.split()]
+    queries = [' '.join(rng.sample(words, rng.choice([1, 2]))) for _ in range(args.queries)]
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        start = time.perf_counter()
+        insert_per_page(str(Path(temp_dir) / 'per_page.sqlite3'), documents)
+        per_page = time.perf_counter() - start
+
+        catalog = DocumentCatalog(Path(temp_dir) / 'catalog.sqlite3')
+        start = time.perf_counter()
+        for i in range(0, len(documents), 50):
+            catalog.add_documents(documents[i:i + 50])
+        bulk = time.perf_counter() - start
+
+        latencies, hits = [], 0
+        for query in queries:
+            start = time.perf_counter()
+            hits += len(catalog.search(query))
+            latencies.append((time.perf_counter() - start) * 1000)
+        latencies.sort()
+
+        catalog.add_document('presentation', 'presentation_forms.pdf',
+                             [PageResult(0, PRESENTATION_FORMS_PAGE, ['ara'])])
+        found = sum(any(hit['file_hash'] == 'presentation' for hit in catalog.search(query))
+                    for query in PRESENTATION_FORMS_QUERIES)
+        size = catalog.stats()['bytes'] / 1024 / 1024
+        catalog.close()
+
+    print(f"{args.documents} documents, {page_count} pages, catalog {size:.1f} MB")
+    print(f"insert, commit per page:  {per_page:.2f} s ({page_count / per_page:.0f} pages/s)")
+    print(f"insert, bulk transaction: {bulk:.2f} s ({page_count / bulk:.0f} pages/s)")
+    print(f"search: p50 {statistics.median(latencies):.2f} ms, "
+          f"p95 {latencies[int(len(latencies) * 0.95)]:.2f} ms, {hits / len(queries):.1f} hits/query")
+    print(f"presentation forms: {found}/{len(PRESENTATION_FORMS_QUERIES)} queries in regular letters matched")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+English spelling correction on OCR-like text: TextBlob.correct compared with
+the symmetric delete corrector, for speed and word accuracy.
+
+Usage: python benchmarks/bench_spell_correction.py [--words 2000]
+"""
+import argparse
+import random
+import string
+import sys
+import time
+from pathlib import Path
+
+# Add the root directory to the Python path
+root_dir = Path(__file__).parent.parent
+sys.path.append(str(root_dir))
+
+from textblob import TextBlob
+from utils.spell_correction import get_spell_corrector
+
+SENTENCE = (
+    "The committee reviewed the annual report and approved the proposed budget "
+    "for the next year after a long discussion about the development of new "
+    "services and the quality of existing programs in several regions"
+).split()
+
+def add_ocr_noise(word, rng, rate=0.25):
+    """Introduce one substitution, deletion or transposition with probability rate"""
+    if len(word) < 4 or rng.random() > rate:
+        return word
+    i = rng.randrange(1, len(word) - 1)
+    edit = rng.choice(['substitute', 'delete', 'transpose'])
+    if edit == 'substitute':
+        return word[:i] + rng.choice(string.ascii_lowercase) + word[i + 1:]
+    if edit == 'delete':
+        return word[:i] + word[i + 1:]
+    return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+def word_accuracy(corrected, truth):
+    pairs = list(zip(corrected.split(), truth))
+    return sum(a == b for a, b in pairs) / len(truth)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--words', type=int, default=2000, help='words of synthetic OCR output')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    truth = [SENTENCE[i % len(SENTENCE)] for i in range(args.words)]
+    noisy = ' '.join(add_ocr_noise(w, rng) for w in truth)
+
+    start = time.perf_counter()
+    textblob_output = str(TextBlob(noisy).correct())
+    textblob_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    corrector = get_spell_corrector()
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    symspell_output = corrector.correct(noisy)
+    symspell_time = time.perf_counter() - start
+
+    print(f"words:                      {args.words}")
+    print(f"noisy accuracy:             {word_accuracy(noisy, truth):.3f}")
+    print(f"TextBlob.correct:           {textblob_time:.2f} s, accuracy {word_accuracy(textblob_output, truth):.3f}")
+    print(f"symmetric delete (build):   {build_time:.2f} s, once per process")
+    print(f"symmetric delete:           {symspell_time:.3f} s, accuracy {word_accuracy(symspell_output, truth):.3f}")
+    print(f"speedup (excluding build):  {textblob_time / symspell_time:.0f}x")
+
+if __name__ == "__main__":
+    main()
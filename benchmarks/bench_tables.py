@@ -0,0 +1,74 @@
+"""
+Table extraction time on a born-digital PDF with a ruled table on every
+fifth page: the previous tabula.read_pdf(pages='all') call, tabula on the
+pre-checked pages only (in-process JVM when jpype is installed), and the
+native ruling line detector. Backends that are not installed are skipped.
+
+Usage: python benchmarks/bench_tables.py [--pages 50] [--repeat 3]
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the root directory to the Python path
+root_dir = Path(__file__).parent.parent
+sys.path.append(str(root_dir))
+
+from benchmarks.synthetic import make_table_pdf
+from utils.table_extraction import (
+    JPYPE_AVAILABLE,
+    TABULA_AVAILABLE,
+    NativeTableBackend,
+    TabulaBackend,
+    extract_tables,
+    java_available
+)
+
+def tables_found(tables, truth):
+    """Number of expected tables found with exactly the expected cells"""
+    found = 0
+    for page_num, table in tables:
+        rows = [list(map(str, table.columns))] + [list(map(str, row)) for row in table.values.tolist()]
+        if page_num in truth and rows == truth[page_num]:
+            found += 1
+    return found
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pages', type=int, default=50, help='pages of the synthetic PDF')
+    parser.add_argument('--repeat', type=int, default=3, help='calls per mode (first and best are shown)')
+    args = parser.parse_args()
+
+    modes = []
+    if TABULA_AVAILABLE and java_available():
+        def legacy(pdf_path):
+            import tabula
+            return [(None, t) for t in tabula.read_pdf(pdf_path, pages='all', force_subprocess=True)], {}
+        modes.append(('tabula all pages (previous)', legacy))
+        modes.append((f"tabula pre-checked ({'jpype' if JPYPE_AVAILABLE else 'subprocess'})",
+                      lambda pdf_path: extract_tables(pdf_path, backend=TabulaBackend())))
+    else:
+        print("tabula-py or java is not installed; only the native backend is measured")
+    native = NativeTableBackend()
+    modes.append(('native pre-checked', lambda pdf_path: extract_tables(pdf_path, backend=native)))
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pdf_path = str(Path(temp_dir) / 'tables.pdf')
+        truth = make_table_pdf(pdf_path, args.pages)
+        print(f"{args.pages} pages, {len(truth)} tables")
+        print(f"{'mode':>36}{'first (s)':>11}{'best (s)':>10}{'tables':>8}{'exact':>7}")
+        for name, run in modes:
+            times = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                tables, timings = run(pdf_path)
+                times.append(time.perf_counter() - start)
+            print(f"{name:>36}{times[0]:>11.2f}{min(times):>10.2f}{len(tables):>8}"
+                  f"{tables_found(tables, truth):>7}")
+            if timings:
+                print(f"{'':>36}  {timings}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Benchmark suite for the extraction paths on synthetic PDFs.
+
+Generates born-digital, scanned, mixed Arabic/English and hybrid PDFs at the
+given page counts and DPIs, runs every extraction path on each of them in a
+fresh process and records wall time, pages/sec, peak RSS and character
+accuracy against the ground truth. Results are saved as JSON (by default
+benchmarks/results/<commit>.json) and can be compared with an earlier run.
+
+Usage: python benchmarks/run_suite.py [--pages 1 8] [--dpi 100 200]
+                                      [--paths convert_ocr ...] [--repeat 1]
+                                      [--output FILE] [--compare BASELINE.json]
+"""
+import argparse
+import json
+import platform
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from difflib import SequenceMatcher
+from multiprocessing import get_context
+from pathlib import Path
+
+# Add the root directory to the Python path
+root_dir = Path(__file__).parent.parent
+sys.path.append(str(root_dir))
+
+from benchmarks.synthetic import make_born_digital_pdf, make_hybrid_pdf, make_scanned_pdf
+
+RESULTS_DIR = root_dir / 'benchmarks' / 'results'
+
+# corpus name -> (generator(path, pages, dpi), OCR languages, uses dpi)
+CORPORA = {
+    'born_digital': (lambda path, pages, dpi: make_born_digital_pdf(path, pages), ['eng'], False),
+    'scanned': (lambda path, pages, dpi: make_scanned_pdf(path, pages, dpi=dpi), ['eng'], True),
+    'scanned_mixed': (lambda path, pages, dpi: make_scanned_pdf(path, pages, dpi=dpi, mixed=True),
+                      ['eng', 'ara'], True),
+    'hybrid': (make_hybrid_pdf, ['eng'], True),
+}
+
+PATHS = ['extract_text_from_pdf', 'perform_ocr', 'convert_ocr', 'convert_text_layer_first']
+
+PAGE_MARKER = re.compile(r'^--- Page \d+ ---$', re.MULTILINE)
+
+def run_path(path_name, pdf_path, languages):
+    """Run one extraction path with fixed languages and return its text"""
+    from utils import pdf_processing
+
+    if path_name == 'extract_text_from_pdf':
+        return pdf_processing.extract_text_from_pdf(pdf_path, detect_lang=False, manual_langs=languages).text
+    if path_name == 'perform_ocr':
+        return pdf_processing.perform_ocr(pdf_path, detect_lang=False, manual_langs=languages)[0].text
+    if path_name in ('convert_ocr', 'convert_text_layer_first'):
+        return pdf_processing.convert_pdf_to_images_and_text(
+            pdf_path,
+            languages=languages,
+            save_images=False,
+            text_layer_first=path_name == 'convert_text_layer_first'
+        ).text
+    raise ValueError(f"Unknown path: {path_name}")
+
+def _measure(path_name, pdf_path, languages):
+    """Worker entry point: time one run and report the peak RSS of this process"""
+    # Import outside the timed section, as a long-running app would have
+    import utils.pdf_processing  # noqa: F401
+
+    start = time.perf_counter()
+    text = run_path(path_name, pdf_path, languages)
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is in KiB on Linux; children are the poppler/tesseract processes
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    peak_child_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    return text, elapsed, peak_rss, peak_child_rss
+
+def normalize(text):
+    return ' '.join(PAGE_MARKER.sub(' ', text).split())
+
+def character_accuracy(reference, hypothesis):
+    """Fraction of reference characters matched in order by the hypothesis"""
+    reference, hypothesis = normalize(reference), normalize(hypothesis)
+    if not reference:
+        return 1.0 if not hypothesis else 0.0
+    matcher = SequenceMatcher(None, reference, hypothesis, autojunk=False)
+    matched = sum(block.size for block in matcher.get_matching_blocks())
+    return matched / len(reference)
+
+def git_commit():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=root_dir,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=root_dir,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return commit + ('-dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def environment():
+    info = {
+        'commit': git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+    }
+    try:
+        import pytesseract
+        info['tesseract'] = str(pytesseract.get_tesseract_version())
+    except Exception:
+        info['tesseract'] = None
+    return info
+
+def run_suite(corpora, page_counts, dpis, paths, repeat=1):
+    results = []
+    context = get_context('spawn')
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for corpus in corpora:
+            generate, languages, uses_dpi = CORPORA[corpus]
+            for pages in page_counts:
+                for dpi in (dpis if uses_dpi else [None]):
+                    pdf_path = str(Path(temp_dir) / f"{corpus}_{pages}_{dpi}.pdf")
+                    truth = generate(pdf_path, pages, dpi)
+                    reference = '\n'.join(truth)
+                    for path_name in paths:
+                        runs = []
+                        try:
+                            for _ in range(repeat):
+                                # A fresh process per run, so peak RSS belongs to this run only
+                                with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                                    runs.append(executor.submit(_measure, path_name, pdf_path, languages).result())
+                        except Exception as e:
+                            results.append({'corpus': corpus, 'pages': pages, 'dpi': dpi,
+                                            'path': path_name, 'error': str(e)})
+                            print(f"{corpus:>14}{pages:>6}{str(dpi or '-'):>6}{path_name:>26}  failed: {e}")
+                            continue
+                        text = runs[0][0]
+                        elapsed = min(run[1] for run in runs)
+                        result = {
+                            'corpus': corpus,
+                            'pages': pages,
+                            'dpi': dpi,
+                            'path': path_name,
+                            'languages': languages,
+                            'seconds': round(elapsed, 4),
+                            'pages_per_sec': round(pages / elapsed, 3) if elapsed else None,
+                            'peak_rss_mb': round(max(run[2] for run in runs), 1),
+                            'peak_child_rss_mb': round(max(run[3] for run in runs), 1),
+                            'char_accuracy': round(character_accuracy(reference, text), 4),
+                        }
+                        results.append(result)
+                        print(f"{corpus:>14}{pages:>6}{str(dpi or '-'):>6}{path_name:>26}"
+                              f"{result['seconds']:>10.2f}{result['pages_per_sec']:>10.2f}"
+                              f"{result['peak_rss_mb']:>10.1f}{result['char_accuracy']:>10.3f}")
+    return results
+
+def result_key(result):
+    return (result['corpus'], result['pages'], result['dpi'], result['path'])
+
+def compare(results, baseline_path):
+    """Print throughput and accuracy changes against a previous results file"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    previous = {result_key(r): r for r in baseline['results']}
+    print(f"\nCompared with {baseline['environment']['commit']}:")
+    print(f"{'corpus':>14}{'pages':>6}{'dpi':>6}{'path':>26}{'speedup':>10}{'RSS Δ MB':>10}{'acc Δ':>10}")
+    for result in results:
+        old = previous.get(result_key(result))
+        if old is None or 'error' in old or 'error' in result:
+            continue
+        print(f"{result['corpus']:>14}{result['pages']:>6}{str(result['dpi'] or '-'):>6}{result['path']:>26}"
+              f"{old['seconds'] / result['seconds']:>9.2f}x"
+              f"{result['peak_rss_mb'] - old['peak_rss_mb']:>10.1f}"
+              f"{result['char_accuracy'] - old['char_accuracy']:>10.3f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--corpora', nargs='+', default=list(CORPORA), choices=list(CORPORA))
+    parser.add_argument('--pages', nargs='+', type=int, default=[1, 8], help='page counts')
+    parser.add_argument('--dpi', nargs='+', type=int, default=[100, 200], help='DPIs of scanned pages')
+    parser.add_argument('--paths', nargs='+', default=PATHS, choices=PATHS)
+    parser.add_argument('--repeat', type=int, default=1, help='runs per case (best time is kept)')
+    parser.add_argument('--output', default=None, help='results file (default: results/<commit>.json)')
+    parser.add_argument('--compare', default=None, help='previous results file to compare with')
+    args = parser.parse_args()
+
+    info = environment()
+    print(f"{'corpus':>14}{'pages':>6}{'dpi':>6}{'path':>26}{'time (s)':>10}{'pages/s':>10}"
+          f"{'RSS MB':>10}{'accuracy':>10}")
+    results = run_suite(args.corpora, args.pages, args.dpi, args.paths, max(1, args.repeat))
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{info['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({'environment': info, 'results': results}, f, indent=2, ensure_ascii=False)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""
+Offline generation of synthetic PDFs for the benchmarks
+"""
+import random
+import zlib
+from PIL import Image, ImageDraw, ImageFont
+import arabic_reshaper
+from bidi.algorithm import get_display
+
+WORDS = [
+    'document', 'analysis', 'converter', 'extraction', 'language', 'quality',
+    'page', 'report', 'summary', 'invoice', 'contract', 'section', 'table',
+    'figure', 'result', 'method', 'value', 'number', 'system', 'process'
+]
+
+ARABIC_WORDS = [
+    'مستند', 'تحليل', 'تحويل', 'استخراج', 'اللغة', 'جودة', 'صفحة', 'تقرير',
+    'ملخص', 'فاتورة', 'عقد', 'قسم', 'جدول', 'شكل', 'نتيجة', 'طريقة', 'قيمة',
+    'رقم', 'نظام', 'معالجة'
+]
+
+# Fonts with Arabic glyphs commonly available on Linux
+ARABIC_FONT_CANDIDATES = [
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+    '/usr/share/fonts/truetype/noto/NotoNaskhArabic-Regular.ttf',
+    '/usr/share/fonts/truetype/freefont/FreeSerif.ttf',
+]
+
+def load_arabic_font(size=18):
+    """Load the first available font that can draw Arabic text"""
+    for path in ARABIC_FONT_CANDIDATES:
+        try:
+            return ImageFont.truetype(path, size)
+        except OSError:
+            continue
+    raise RuntimeError("No TrueType font with Arabic glyphs found")
+
+def make_mixed_lines(rng, line_count=30, words_per_line=8):
+    """Alternate Arabic and English lines"""
+    lines = []
+    for i in range(line_count):
+        vocabulary = ARABIC_WORDS if i % 2 else WORDS
+        lines.append(' '.join(rng.choice(vocabulary) for _ in range(words_per_line)))
+    return lines
+
+def make_page_lines(rng, line_count=30, words_per_line=10):
+    """Build deterministic pseudo-random lines of English text"""
+    return [
+        ' '.join(rng.choice(WORDS) for _ in range(words_per_line))
+        for _ in range(line_count)
+    ]
+
+def render_text_page(lines, dpi=100, font=None):
+    """Draw lines of text on a white A4 page at the given DPI"""
+    width, height = int(8.27 * dpi), int(11.69 * dpi)
+    page = Image.new('L', (width, height), 255)
+    draw = ImageDraw.Draw(page)
+    font = font or ImageFont.load_default()
+    margin = dpi // 2
+    line_height = max(12, dpi // 6, int(getattr(font, 'size', 0) * 1.4))
+    for i, line in enumerate(lines):
+        y = margin + i * line_height
+        if y > height - margin:
+            break
+        # Arabic must be shaped and reordered before drawing
+        draw.text((margin, y), get_display(arabic_reshaper.reshape(line)), fill=0, font=font)
+    return page
+
+def render_layout_page(rng, dpi=150, font=None, columns=2, lines_per_column=18, words_per_line=4):
+    """
+    Draw a title, text in columns and a photo-like noise figure on an A4 page.
+    Returns (page, expected_text) with the text in reading order (columns
+    left to right).
+    """
+    width, height = int(8.27 * dpi), int(11.69 * dpi)
+    page = Image.new('L', (width, height), 255)
+    draw = ImageDraw.Draw(page)
+    font = font or load_arabic_font(max(12, dpi // 7))
+    margin = dpi // 2
+    line_height = int(font.size * 1.4)
+    gutter = dpi // 2
+    column_width = (width - 2 * margin - (columns - 1) * gutter) // columns
+
+    title = ' '.join(rng.choice(WORDS) for _ in range(3))
+    draw.text((margin, margin), title, fill=0, font=font)
+    expected = [title]
+
+    top = margin + line_height * 3
+    for column in range(columns):
+        x = margin + column * (column_width + gutter)
+        lines = make_page_lines(rng, line_count=lines_per_column, words_per_line=words_per_line)
+        for i, line in enumerate(lines):
+            draw.text((x, top + i * line_height), line, fill=0, font=font)
+        expected.extend(lines)
+
+    # A photo below the text: dense random gray, not text
+    figure_top = top + (lines_per_column + 2) * line_height
+    figure = Image.frombytes('L', (width - 2 * margin, dpi * 2),
+                             bytes(rng.randrange(256) for _ in range((width - 2 * margin) * dpi * 2)))
+    page.paste(figure, (margin, figure_top))
+    return page, '\n'.join(expected)
+
+def make_scanned_pdf(path, page_count, dpi=100, seed=0, mixed=False, font_size=None):
+    """
+    Write a rasterized multi-page PDF and return the ground-truth text per page.
+
+    With mixed=True the pages alternate Arabic and English lines; font_size
+    (points) sets the print size of the text.
+    """
+    rng = random.Random(seed)
+    if font_size:
+        font = load_arabic_font(max(6, round(font_size * dpi / 72)))
+    else:
+        font = load_arabic_font(max(12, dpi // 7)) if mixed else None
+    # Keep every line on the page at large print sizes
+    line_count, words_per_line = 30, (8 if mixed else 10)
+    if font_size:
+        line_count = min(line_count, int(770 / (font_size * 1.4)))
+        words_per_line = min(words_per_line, max(3, int(520 / (font_size * 4.5))))
+    pages, truth = [], []
+    for _ in range(page_count):
+        if mixed:
+            lines = make_mixed_lines(rng, line_count, words_per_line)
+        else:
+            lines = make_page_lines(rng, line_count, words_per_line)
+        truth.append('\n'.join(lines))
+        pages.append(render_text_page(lines, dpi=dpi, font=font))
+    pages[0].save(path, save_all=True, append_images=pages[1:], resolution=dpi)
+    return truth
+
+def _pdf_string(text):
+    """Escape text for a PDF literal string (WinAnsi encoded)"""
+    escaped = text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+    return '(' + escaped + ')'
+
+def _text_stream(lines, font_size=11, leading=14):
+    """Content stream drawing lines top-down on an A4 page"""
+    parts = [f"BT /F1 {font_size} Tf {leading} TL 56 785 Td"]
+    for line in lines:
+        parts.append(f"{_pdf_string(line)} Tj T*")
+    parts.append("ET")
+    return '\n'.join(parts).encode('latin-1')
+
+def write_pdf(path, pages):
+    """
+    Minimal PDF writer for born-digital and hybrid test files.
+
+    Every item of pages is either a list of text lines (drawn with the
+    standard Helvetica font, so the PDF has a real text layer), a grayscale
+    PIL image (embedded as a full-page image, like a scan) or a ready
+    content stream as bytes (which may use the font /F1).
+    """
+    objects = []
+
+    def add(body):
+        objects.append(body)
+        return len(objects)
+
+    catalog_id = add(None)
+    pages_id = add(None)
+    font_id = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+    page_ids = []
+    width, height = 595, 842
+    for item in pages:
+        if isinstance(item, Image.Image):
+            image = item.convert('L')
+            data = zlib.compress(image.tobytes())
+            image_id = add(
+                f"<< /Type /XObject /Subtype /Image /Width {image.width} /Height {image.height} "
+                f"/ColorSpace /DeviceGray /BitsPerComponent 8 /Filter /FlateDecode "
+                f"/Length {len(data)} >>\nstream\n".encode() + data + b"\nendstream"
+            )
+            content = f"q {width} 0 0 {height} 0 0 cm /Im0 Do Q".encode()
+            resources = f"<< /XObject << /Im0 {image_id} 0 R >> >>"
+        else:
+            content = item if isinstance(item, bytes) else _text_stream(item)
+            resources = f"<< /Font << /F1 {font_id} 0 R >> >>"
+        content_id = add(f"<< /Length {len(content)} >>\nstream\n".encode() + content + b"\nendstream")
+        page_ids.append(add(
+            f"<< /Type /Page /Parent {pages_id} 0 R /MediaBox [0 0 {width} {height}] "
+            f"/Resources {resources} /Contents {content_id} 0 R >>".encode()
+        ))
+
+    objects[catalog_id - 1] = f"<< /Type /Catalog /Pages {pages_id} 0 R >>".encode()
+    kids = ' '.join(f"{page_id} 0 R" for page_id in page_ids)
+    objects[pages_id - 1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode()
+
+    output = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+    xref_offset = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        output += f"{offset:010d} 00000 n \n".encode()
+    output += (f"trailer\n<< /Size {len(objects) + 1} /Root {catalog_id} 0 R >>\n"
+               f"startxref\n{xref_offset}\n%%EOF\n").encode()
+    with open(path, 'wb') as f:
+        f.write(output)
+
+def _table_stream(rows, top=680, left=56, column_width=120, row_height=20, font_size=9):
+    """Content stream of a table with ruling lines around every cell"""
+    parts = ["0.8 w"]
+    height = row_height * len(rows)
+    width = column_width * len(rows[0])
+    for i in range(len(rows) + 1):
+        y = top - i * row_height
+        parts.append(f"{left} {y} m {left + width} {y} l S")
+    for j in range(len(rows[0]) + 1):
+        x = left + j * column_width
+        parts.append(f"{x} {top} m {x} {top - height} l S")
+    for i, row in enumerate(rows):
+        for j, cell in enumerate(row):
+            x = left + j * column_width + 4
+            y = top - (i + 1) * row_height + 6
+            parts.append(f"BT /F1 {font_size} Tf {x} {y} Td {_pdf_string(cell)} Tj ET")
+    return '\n'.join(parts).encode('latin-1')
+
+def make_table_pdf(path, page_count, table_every=5, rows=8, columns=4, seed=0):
+    """
+    Write a born-digital PDF where every table_every-th page holds a ruled
+    table below a few lines of text; returns {page_num: rows} of the tables.
+    """
+    rng = random.Random(seed)
+    pages, tables = [], {}
+    for page_num in range(page_count):
+        lines = make_page_lines(rng, line_count=6 if page_num % table_every == 0 else 50, words_per_line=8)
+        content = _text_stream(lines)
+        if page_num % table_every == 0:
+            table = [[f"{rng.choice(WORDS)} {i}{j}" for j in range(columns)] for i in range(rows)]
+            tables[page_num] = table
+            content += b"\n" + _table_stream(table)
+        pages.append(content)
+    write_pdf(path, pages)
+    return tables
+
+def make_born_digital_pdf(path, page_count, seed=0):
+    """Write a PDF with a text layer only and return the ground truth per page"""
+    rng = random.Random(seed)
+    truth = [make_page_lines(rng, line_count=50, words_per_line=8) for _ in range(page_count)]
+    write_pdf(path, truth)
+    return ['\n'.join(lines) for lines in truth]
+
+def make_hybrid_pdf(path, page_count, dpi=100, seed=0):
+    """
+    Write a PDF alternating born-digital and scanned pages (starting with a
+    text page) and return the ground truth per page.
+    """
+    rng = random.Random(seed)
+    pages, truth = [], []
+    for page_num in range(page_count):
+        lines = make_page_lines(rng, line_count=30 if page_num % 2 else 50,
+                                words_per_line=10 if page_num % 2 else 8)
+        truth.append('\n'.join(lines))
+        pages.append(render_text_page(lines, dpi=dpi) if page_num % 2 else lines)
+    write_pdf(path, pages)
+    return truth
@@ -1,26 +1,27 @@
 import streamlit as st
-import tempfile
-from pathlib import Path
 import pytesseract
-from pdf2image import convert_from_path
 import logging
 from PIL import Image
 import arabic_reshaper
 from bidi.algorithm import get_display
 from textblob import TextBlob
 
+from ui.components import get_document
+from utils.pdf_processing import render_pages
+
 logger = logging.getLogger(__name__)
 
 st.set_page_config(page_title="OCR Processing", page_icon="🔍", layout="wide")
 
-def perform_ocr(pdf_path, lang='eng'):
-    """Perform OCR on PDF pages"""
+def perform_ocr(pdf_path, pages, lang='eng', progress=None):
+    """Perform OCR on the selected PDF pages, rendering one page at a time"""
     try:
-        text = ""
-        images = convert_from_path(pdf_path)
-        for image in images:
-            text += pytesseract.image_to_string(image, lang=lang) + "\n"
-        return text.strip()
+        texts = []
+        for i, (_, image) in enumerate(render_pages(pdf_path, pages, max_images=1)):
+            texts.append(pytesseract.image_to_string(image, lang=lang))
+            if progress is not None:
+                progress.progress((i + 1) / len(pages))
+        return "\n".join(texts).strip()
     except Exception as e:
         logger.error(f"Error performing OCR: {str(e)}")
         raise
@@ -47,6 +48,22 @@ def main():
     uploaded_file = st.file_uploader("Choose a PDF file", type=["pdf", "png", "jpg", "jpeg"])
     
     if uploaded_file is not None:
+        is_pdf = uploaded_file.type == "application/pdf"
+        pages = None
+        if is_pdf:
+            # The parsed document is shared with the other pages and reused across reruns
+            document = get_document(uploaded_file)
+            if document.page_count > 1:
+                first_page, last_page = st.slider(
+                    "Pages to process",
+                    min_value=1,
+                    max_value=document.page_count,
+                    value=(1, document.page_count)
+                )
+            else:
+                first_page, last_page = 1, 1
+            pages = list(range(first_page - 1, last_page))
+
         # Language selection
         lang = st.selectbox(
             "Select document language",
@@ -64,34 +81,30 @@ def main():
         if st.button("Process Document"):
             with st.spinner("Processing..."):
                 try:
-                    with tempfile.TemporaryDirectory() as temp_dir:
-                        file_path = Path(temp_dir) / uploaded_file.name
-                        file_path.write_bytes(uploaded_file.getvalue())
-
-                        if uploaded_file.type == "application/pdf":
-                            text = perform_ocr(str(file_path), lang)
-                        else:
-                            # For image files
-                            image = Image.open(file_path)
-                            text = pytesseract.image_to_string(image, lang=lang)
+                    if is_pdf:
+                        text = perform_ocr(document.pdf_path, pages, lang, progress=st.progress(0.0))
+                    else:
+                        # For image files
+                        image = Image.open(uploaded_file)
+                        text = pytesseract.image_to_string(image, lang=lang)
 
-                        # Post-process text
-                        if correct_spelling:
-                            text = correct_text(text, lang)
-                        if remove_extra_spaces:
-                            text = " ".join(text.split())
+                    # Post-process text
+                    if correct_spelling:
+                        text = correct_text(text, lang)
+                    if remove_extra_spaces:
+                        text = " ".join(text.split())
 
-                        # Display results
-                        st.subheader("Extracted Text")
-                        st.text_area("", text, height=300)
+                    # Display results
+                    st.subheader("Extracted Text")
+                    st.text_area("", text, height=300)
 
-                        # Download button
-                        st.download_button(
-                            label="Download Text",
-                            data=text,
-                            file_name=f"{uploaded_file.name.rsplit('.', 1)[0]}_ocr.txt",
-                            mime="text/plain"
-                        )
+                    # Download button
+                    st.download_button(
+                        label="Download Text",
+                        data=text,
+                        file_name=f"{uploaded_file.name.rsplit('.', 1)[0]}_ocr.txt",
+                        mime="text/plain"
+                    )
 
                 except Exception as e:
                     st.error(f"Error processing document: {str(e)}")
@@ -1,12 +1,14 @@
 import streamlit as st
 from pathlib import Path
 import sys
-import os
 
 # Add the root directory to the Python path
 root_dir = Path(__file__).parent.parent
 sys.path.append(str(root_dir))
 
+from ui.components import get_current_document
+from utils.page_store import get_page_store
+
 # Set up the page
 st.set_page_config(
     page_title="عرض النص المستخرج",
@@ -17,7 +19,8 @@ st.set_page_config(
 def main():
     st.title("عرض النص المستخرج 📖")
     
-    if not st.session_state.get('converted_pages', []):
+    document_result = st.session_state.get('converted_document')
+    if not document_result:
         st.warning("لا يوجد نص مستخرج بعد. الرجاء تحويل ملف PDF أولاً.")
         if st.button("العودة إلى الصفحة الرئيسية"):
             st.switch_page("streamlit_app.py")
@@ -30,12 +33,12 @@ def main():
             st.switch_page("streamlit_app.py")
     with col2:
         if st.button("مسح النتائج"):
-            st.session_state.converted_pages = []
+            st.session_state.converted_document = None
             st.session_state.current_pdf_path = None
             st.experimental_rerun()
     
     # Show total number of pages
-    total_pages = len(st.session_state.converted_pages)
+    total_pages = len(document_result)
     st.write(f"عدد الصفحات: {total_pages}")
     
     # Add page selector
@@ -46,16 +49,26 @@ def main():
         key="page_selector"
     )
     
+    page = document_result[page_number - 1]
+    
     # Create tabs for the selected page
     text_tab, image_tab = st.tabs(["النص", "الصورة"])
     
     with text_tab:
         # Show text for the selected page
         st.markdown("### النص المستخرج")
-        page_text = st.session_state.converted_pages[page_number - 1]
+        details = [f"صفحة PDF رقم {page.number}",
+                   "طبقة النص" if page.source == 'text_layer' else "OCR"]
+        if page.languages:
+            details.append(", ".join(page.languages))
+        if page.dpi:
+            details.append(f"{page.dpi} DPI")
+        if page.confidence is not None:
+            details.append(f"الثقة {page.confidence:.0f}%")
+        st.caption(" | ".join(details))
         text_area = st.text_area(
             "نص الصفحة",
-            value=page_text,
+            value=page.text,
             height=400,
             key=f"text_area_{page_number}"
         )
@@ -68,12 +81,19 @@ def main():
     with image_tab:
         # Show image for the selected page
         st.markdown("### صورة الصفحة")
+        # The enhanced page if it was saved during conversion, otherwise a
+        # thumbnail rendered (once) from the cached document
+        preview = None
         if st.session_state.get('current_pdf_path'):
-            image_path = f"{st.session_state.current_pdf_path}_page_{page_number}.png"
-            if os.path.exists(image_path):
-                st.image(image_path, caption=f"الصفحة {page_number}", use_column_width=True)
-            else:
-                st.warning("لا يمكن عرض صورة الصفحة")
+            preview = get_page_store().get(st.session_state.current_pdf_path, page.page_num)
+        
+        document = get_current_document()
+        if preview is not None:
+            st.image(preview, caption=f"الصفحة {page.number}", use_column_width=True)
+        elif document is not None and page.page_num < document.page_count:
+            st.image(document.thumbnail(page.page_num), caption=f"الصفحة {page.number}", use_column_width=True)
+        else:
+            st.warning("لا يمكن عرض صورة الصفحة")
     
     # Add page navigation buttons
     col1, col2, col3 = st.columns(3)
@@ -0,0 +1,58 @@
+import streamlit as st
+from pathlib import Path
+import sys
+import time
+
+# Add the root directory to the Python path
+root_dir = Path(__file__).parent.parent
+sys.path.append(str(root_dir))
+
+from utils.catalog import DEFAULT_SEARCH_LIMIT, get_catalog
+
+# Set up the page
+st.set_page_config(
+    page_title="البحث في المستندات",
+    page_icon="🔎",
+    layout="wide"
+)
+
+def main():
+    st.title("البحث في المستندات المحولة 🔎")
+
+    catalog = get_catalog()
+    stats = catalog.stats()
+    st.caption(f"{stats['documents']} مستند، {stats['pages']} صفحة في الفهرس")
+
+    col1, col2 = st.columns([4, 1])
+    with col1:
+        query = st.text_input(
+            "كلمات البحث",
+            help='كل الكلمات يجب أن تظهر في الصفحة. ضع العبارة بين علامتي تنصيص للبحث عنها كما هي، مثل "العقد الموحد"'
+        )
+    with col2:
+        limit = st.number_input("عدد النتائج", min_value=1, max_value=200, value=DEFAULT_SEARCH_LIMIT)
+
+    if not query.strip():
+        if not stats['documents']:
+            st.info("لا توجد مستندات في الفهرس بعد. يتم إضافة كل مستند تقوم بتحويله تلقائياً.")
+        return
+
+    start = time.perf_counter()
+    hits = catalog.search(query, limit=int(limit), highlight=('**', '**'))
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    st.write(f"{len(hits)} نتيجة ({elapsed_ms:.1f} ms)")
+    for i, hit in enumerate(hits):
+        st.markdown(f"**{hit['document']}** — الصفحة {hit['page']}")
+        st.markdown(hit['snippet'])
+        with st.expander("نص الصفحة كاملاً"):
+            st.text_area(
+                "نص الصفحة",
+                value=catalog.page_text(hit['file_hash'], hit['page'] - 1) or "",
+                height=300,
+                key=f"hit_{i}"
+            )
+        st.divider()
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,10 @@
 import streamlit as st
 from utils.text_processing import format_text
 from utils.pdf_processing import extract_text_from_pdf, perform_ocr, convert_pdf_to_images_and_text
-from utils.file_handling import create_docx, format_output, save_uploaded_file
+from utils.file_handling import create_docx, format_output
 from ui.components import (
     init_session_state,
+    get_document,
     create_sidebar,
     create_processing_tabs,
     display_results,
@@ -36,14 +37,16 @@ def main():
     uploaded_file = st.file_uploader("اختر ملف PDF", type="pdf")
     
     if uploaded_file is not None:
-        # Save uploaded file and store path
-        pdf_path = save_uploaded_file(uploaded_file)
-        st.session_state.current_pdf_path = pdf_path
+        # Parse the uploaded file once per session and store its path
+        document = get_document(uploaded_file)
+        st.session_state.current_pdf_path = document.pdf_path
+        st.session_state.current_file_hash = document.file_hash
         
         # Show processing options
         create_processing_tabs()
     else:
         st.session_state.current_pdf_path = None
+        st.session_state.current_file_hash = None
         st.info("الرجاء تحميل ملف PDF للبدء")
 
 if __name__ == "__main__":
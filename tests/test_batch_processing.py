@@ -0,0 +1,25 @@
+from pathlib import Path
+
+from utils.batch_processing import output_paths_for
+
+def test_same_names_in_different_folders_do_not_collide(tmp_path):
+    inputs = [str(tmp_path / "in" / "a" / "report.pdf"), str(tmp_path / "in" / "b" / "report.pdf")]
+    outputs = output_paths_for(inputs, tmp_path / "out", "txt")
+    assert outputs == {
+        inputs[0]: tmp_path / "out" / "a" / "report.txt",
+        inputs[1]: tmp_path / "out" / "b" / "report.txt",
+    }
+
+def test_nested_folders_are_mirrored_below_the_common_root(tmp_path):
+    inputs = [str(tmp_path / "in" / "one.pdf"), str(tmp_path / "in" / "2023" / "q1" / "two.pdf")]
+    outputs = output_paths_for(inputs, tmp_path / "out", "md")
+    assert outputs[inputs[0]] == tmp_path / "out" / "one.md"
+    assert outputs[inputs[1]] == tmp_path / "out" / "2023" / "q1" / "two.md"
+
+def test_single_folder_maps_directly_into_the_output(tmp_path):
+    inputs = [str(tmp_path / "in" / "one.pdf"), str(tmp_path / "in" / "two.pdf")]
+    outputs = output_paths_for(inputs, "out", "docx")
+    assert outputs == {inputs[0]: Path("out") / "one.docx", inputs[1]: Path("out") / "two.docx"}
+
+def test_no_inputs():
+    assert output_paths_for([], "out", "txt") == {}
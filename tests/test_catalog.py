@@ -0,0 +1,43 @@
+import pytest
+
+from utils.catalog import DocumentCatalog, normalize_for_search, to_fts_query
+from utils.models import PageResult
+
+# "The unified contract for the company" with alef hamza, diacritics and
+# tatweel, and the same words as presentation forms
+VARIANTS_PAGE = "العَقْدُ الموحّد للشركة إِدارة الأمــانة"
+PRESENTATION_FORMS_PAGE = "ﺍﻟﻌﻘﺪ ﺍﻟﻤﻮﺣﺪ ﻟﻠﺸﺮﻛﺔ"
+
+@pytest.fixture
+def catalog(tmp_path):
+    catalog = DocumentCatalog(tmp_path / "catalog.sqlite3")
+    catalog.add_document("variants", "variants.pdf", [PageResult(0, VARIANTS_PAGE, ["ara"])])
+    catalog.add_document("presentation", "presentation.pdf", [PageResult(0, PRESENTATION_FORMS_PAGE, ["ara"])])
+    yield catalog
+    catalog.close()
+
+def found(catalog, query):
+    return {hit["file_hash"] for hit in catalog.search(query)}
+
+def test_normalization_folds_arabic_variants():
+    assert normalize_for_search("أإآٱ") == "اااا"
+    assert normalize_for_search("العَقْدُ") == "العقد"
+    assert normalize_for_search("الأمــانة") == "الامانة"
+    assert normalize_for_search(PRESENTATION_FORMS_PAGE) == "العقد الموحد للشركة"
+
+@pytest.mark.parametrize("query", [
+    "العقد",          # no diacritics
+    "العُقَد",         # other diacritics
+    "الموحد",         # without shadda
+    "ادارة",          # bare alef for alef with hamza below
+    "الامانة",        # bare alef, no tatweel
+    "الأمـانة",        # different tatweel length
+])
+def test_spelling_variants_match(catalog, query):
+    assert "variants" in found(catalog, query)
+
+def test_presentation_forms_match_regular_letters(catalog):
+    assert found(catalog, '"الموحد للشركة"') == {"variants", "presentation"}
+
+def test_query_operators_are_literal():
+    assert to_fts_query('العقد OR "الموحد"') == '"العقد" "OR" "الموحد"'
@@ -0,0 +1,54 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from benchmarks.synthetic import make_born_digital_pdf
+from utils import document_cache
+from utils.document_cache import DocumentCache, prune_document_dirs
+
+@pytest.fixture
+def document_dir(tmp_path, monkeypatch):
+    directory = tmp_path / "documents"
+    monkeypatch.setattr(document_cache, 'DOCUMENT_DIR', directory)
+    return directory
+
+def pdf_bytes(tmp_path, seed):
+    path = tmp_path / f"source_{seed}.pdf"
+    make_born_digital_pdf(str(path), 1, seed=seed)
+    return path.read_bytes()
+
+def test_evicted_documents_are_deleted(tmp_path, document_dir):
+    cache = DocumentCache(max_bytes=1)
+    first = cache.get(pdf_bytes(tmp_path, 0), "first.pdf")
+    second = cache.get(pdf_bytes(tmp_path, 1), "second.pdf")
+    assert len(cache) == 1
+    assert not Path(first.pdf_path).exists()
+    assert Path(second.pdf_path).exists()
+    # The evicted handle still reads its pages
+    assert first.page_text(0)
+
+def test_clear_deletes_every_copy(tmp_path, document_dir):
+    cache = DocumentCache()
+    handles = [cache.get(pdf_bytes(tmp_path, seed), f"{seed}.pdf") for seed in range(3)]
+    cache.clear()
+    assert len(cache) == 0
+    assert not any(Path(handle.pdf_path).exists() for handle in handles)
+
+def test_sessions_do_not_share_copies(tmp_path, document_dir):
+    data = pdf_bytes(tmp_path, 0)
+    first, second = DocumentCache(), DocumentCache()
+    path = first.get(data, "a.pdf").pdf_path
+    second.get(data, "a.pdf")
+    second.clear()
+    assert Path(path).exists()
+
+def test_prune_removes_stale_entries_only(tmp_path, document_dir):
+    cache = DocumentCache()
+    stale = document_dir / "stale"
+    stale.mkdir()
+    (stale / "old.pdf").write_bytes(b"%PDF")
+    os.utime(stale, (0, 0))
+    prune_document_dirs()
+    assert not stale.exists()
+    assert cache.directory.exists()
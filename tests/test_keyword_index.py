@@ -0,0 +1,59 @@
+from collections import Counter
+
+import numpy as np
+
+from utils.keyword_index import KeywordIndex
+
+def make_documents(count, words=50):
+    return [Counter({f"w{j}": 1 for j in range(k * words, (k + 1) * words)}) for k in range(count)]
+
+def add_all(index, documents, save=True):
+    for doc_id, counts in enumerate(documents):
+        index.add(doc_id, counts, save=save)
+
+def test_journal_is_replayed_on_load(tmp_path):
+    documents = make_documents(3)
+    add_all(KeywordIndex(tmp_path, compact_every=100), documents)
+    assert not (tmp_path / "document_frequencies.npz").exists()
+
+    reloaded = KeywordIndex(tmp_path, compact_every=100)
+    assert reloaded.n_documents == 3
+    assert all(doc_id in reloaded for doc_id in range(3))
+    assert not reloaded.add(0, documents[0])
+
+def test_compaction_merges_the_journal(tmp_path):
+    documents = make_documents(12)
+    index = KeywordIndex(tmp_path, compact_every=5)
+    add_all(index, documents)
+    # Two merges of five documents, two documents left in the journal
+    assert len(index.documents) == 10
+    assert index.journal_path.exists()
+
+    reference = KeywordIndex(tmp_path / "reference")
+    add_all(reference, documents, save=False)
+    reloaded = KeywordIndex(tmp_path, compact_every=5)
+    assert reloaded.n_documents == 12
+    assert reloaded.keywords(documents[0]) == reference.keywords(documents[0])
+
+    reloaded.save()
+    assert not reloaded.journal_path.exists()
+    assert KeywordIndex(tmp_path).n_documents == 12
+
+def test_torn_journal_record_is_dropped(tmp_path):
+    add_all(KeywordIndex(tmp_path, compact_every=100), make_documents(2))
+    with open(tmp_path / "pending_documents.bin", "ab") as f:
+        f.write(b"\x01\x02\x03")
+
+    index = KeywordIndex(tmp_path, compact_every=100)
+    assert index.n_documents == 2
+    assert index.add("new", Counter(word=1))
+    assert KeywordIndex(tmp_path).n_documents == 3
+
+def test_interrupted_merge_does_not_count_twice(tmp_path):
+    index = KeywordIndex(tmp_path)
+    add_all(index, make_documents(2))
+    index.save()
+    # A merge that wrote the index file but crashed before removing the journal
+    key = int(index.documents[0])
+    index._append_journal(key, np.array([1, 2], dtype=np.uint32))
+    assert KeywordIndex(tmp_path).n_documents == 2
@@ -0,0 +1,25 @@
+from utils.layout_analysis import TextBlock, is_rtl_text, reading_order
+
+# A full-width title above two columns of two paragraphs each
+TITLE = TextBlock(50, 20, 500, 40)
+LEFT_TOP = TextBlock(50, 100, 220, 150)
+LEFT_BOTTOM = TextBlock(50, 280, 220, 150)
+RIGHT_TOP = TextBlock(330, 100, 220, 150)
+RIGHT_BOTTOM = TextBlock(330, 280, 220, 150)
+PAGE = [RIGHT_BOTTOM, LEFT_TOP, TITLE, RIGHT_TOP, LEFT_BOTTOM]
+
+def test_ltr_reads_left_column_first():
+    assert reading_order(PAGE) == [TITLE, LEFT_TOP, LEFT_BOTTOM, RIGHT_TOP, RIGHT_BOTTOM]
+
+def test_rtl_reads_right_column_first():
+    assert reading_order(PAGE, rtl=True) == [TITLE, RIGHT_TOP, RIGHT_BOTTOM, LEFT_TOP, LEFT_BOTTOM]
+
+def test_overlapping_blocks_follow_the_direction():
+    left, right = TextBlock(0, 0, 120, 30), TextBlock(100, 0, 120, 30)
+    assert reading_order([right, left]) == [left, right]
+    assert reading_order([left, right], rtl=True) == [right, left]
+
+def test_rtl_text_detection():
+    assert is_rtl_text("تقرير الشركة السنوي 2023 annual")
+    assert not is_rtl_text("Annual report of the company")
+    assert not is_rtl_text("12345")
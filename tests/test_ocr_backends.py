@@ -0,0 +1,50 @@
+import numpy as np
+import pytesseract
+
+from utils.ocr_backends import TesseractCLIBackend, tsv_mean_confidence
+
+# Output of tesseract 5 for a two-line page with a hyphenated word
+RECORDED_TXT = "Annual re-\nport 2023\n\nSummary\n\f"
+RECORDED_TSV = "\n".join([
+    "level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext",
+    "1\t1\t0\t0\t0\t0\t0\t0\t600\t200\t-1\t",
+    "2\t1\t1\t0\t0\t0\t20\t20\t300\t60\t-1\t",
+    "3\t1\t1\t1\t0\t0\t20\t20\t300\t60\t-1\t",
+    "4\t1\t1\t1\t1\t0\t20\t20\t300\t25\t-1\t",
+    "5\t1\t1\t1\t1\t1\t20\t20\t120\t25\t96.5\tAnnual",
+    "5\t1\t1\t1\t1\t2\t150\t20\t60\t25\t88.0\tre-",
+    "4\t1\t1\t1\t2\t0\t20\t55\t200\t25\t-1\t",
+    "5\t1\t1\t1\t2\t1\t20\t55\t80\t25\t91.5\tport",
+    "5\t1\t1\t1\t2\t2\t110\t55\t80\t25\t76.0\t2023",
+    "2\t1\t2\t0\t0\t0\t20\t120\t200\t25\t-1\t",
+    "5\t1\t2\t1\t1\t1\t20\t120\t150\t25\t93.0\tSummary",
+    "5\t1\t2\t1\t1\t2\t180\t120\t10\t25\t95.0\t ",
+])
+
+def test_tsv_mean_confidence_uses_words_only():
+    assert tsv_mean_confidence(RECORDED_TSV) == (96.5 + 88.0 + 91.5 + 76.0 + 93.0) / 5
+
+def test_tsv_mean_confidence_without_words():
+    assert tsv_mean_confidence(RECORDED_TSV.split("\n")[0]) is None
+    assert tsv_mean_confidence("") is None
+
+def test_cli_recognize_keeps_the_plain_text_output(monkeypatch):
+    calls = []
+
+    def fake_run_tesseract(input_filename, output_filename_base, extension, lang, config=''):
+        calls.append((extension, lang, config))
+        with open(f"{output_filename_base}.txt", 'w', encoding='utf-8') as f:
+            f.write(RECORDED_TXT)
+        with open(f"{output_filename_base}.tsv", 'w', encoding='utf-8') as f:
+            f.write(RECORDED_TSV)
+
+    monkeypatch.setattr(pytesseract.pytesseract, 'run_tesseract', fake_run_tesseract)
+    text, confidence = TesseractCLIBackend().recognize(np.full((40, 40), 255, np.uint8), ['eng', 'ara'], psm=6)
+
+    # Byte for byte what image_to_string returns, in a single tesseract run
+    assert text == RECORDED_TXT
+    assert confidence == tsv_mean_confidence(RECORDED_TSV)
+    assert len(calls) == 1
+    extension, lang, config = calls[0]
+    assert extension == 'txt' and lang == 'eng+ara'
+    assert '--psm 6' in config and 'tessedit_create_tsv=1' in config
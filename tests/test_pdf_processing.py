@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from utils import pdf_processing
+from utils.text_processing import PreprocessingPipeline
+
+class RecordingBackend:
+    """OCR backend that records the preprocessing stages of every page it gets"""
+
+    def __init__(self):
+        self.stages = []
+
+    def recognize(self, image, languages, psm=None):
+        self.stages.append(tuple(getattr(image, 'stages', ())))
+        return "sample text", 90.0
+
+@pytest.fixture
+def backend(monkeypatch):
+    backend = RecordingBackend()
+    monkeypatch.setattr(pdf_processing, 'get_ocr_backend', lambda: backend)
+    monkeypatch.setattr(pdf_processing, 'detect_script', lambda image: None)
+    monkeypatch.setattr(pdf_processing, 'detect_languages', lambda text: ['eng'])
+    return backend
+
+def make_page():
+    rng = np.random.default_rng(0)
+    page = np.full((200, 300), 255, dtype=np.uint8)
+    page[50:60, 20:280] = rng.integers(0, 80, size=(10, 260))
+    return page
+
+def test_language_probe_keeps_disabled_stages_off(backend):
+    pipeline = PreprocessingPipeline(denoise=False)
+    page = pdf_processing.preprocess_image_for_ocr(make_page(), pipeline)
+
+    pdf_processing.LanguageProbe().detect(page, pipeline=pipeline)
+
+    assert backend.stages
+    assert all('denoise' not in stages for stages in backend.stages)
+    assert all('binarize' in stages for stages in backend.stages)
+
+def test_perform_ocr_never_applies_a_disabled_stage(backend, monkeypatch):
+    monkeypatch.setattr(pdf_processing, 'get_page_count', lambda path: 2)
+    monkeypatch.setattr(pdf_processing, 'render_pages',
+                        lambda path, pages, **options: ((p, make_page()) for p in pages))
+    pipeline = PreprocessingPipeline(denoise=False)
+
+    for detect_lang in (True, False):
+        document, images = pdf_processing.perform_ocr('unused.pdf', detect_lang=detect_lang,
+                                                      manual_langs=['eng'], pipeline=pipeline)
+        assert len(document) == 2
+
+    assert backend.stages
+    assert all('denoise' not in stages for stages in backend.stages)
+    assert pipeline.calls['denoise'] == 0
+
+def test_language_probe_probes_unclassified_pages_once(backend):
+    probe = pdf_processing.LanguageProbe(['eng'])
+    page = pdf_processing.preprocess_image_for_ocr(make_page())
+
+    first = probe.detect(page)
+    later = [probe.detect(page) for _ in range(3)]
+
+    assert len(backend.stages) == 1
+    assert first == (['eng'], ("sample text", 90.0))
+    assert later == [(['eng'], None)] * 3
@@ -0,0 +1,30 @@
+import pytest
+
+from utils.spell_correction import SpellCorrector
+
+DICTIONARY = """;;; word frequencies
+the 5000
+could 900
+report 300
+annual 200
+receive 150
+world 120
+"""
+
+@pytest.fixture
+def corrector(tmp_path):
+    path = tmp_path / "dictionary.txt"
+    path.write_text(DICTIONARY, encoding="utf-8")
+    return SpellCorrector().load_dictionary(str(path))
+
+def test_known_words_pass_through(corrector):
+    text = "The annual report,  could  the world."
+    assert corrector.correct(text) == text
+
+def test_misspellings_are_corrected(corrector):
+    assert corrector.correct("Teh anual REPORTT recieve wrold") == "The annual REPORT receive world"
+
+def test_short_words_take_one_edit_only(corrector):
+    # COVID is two edits away from COULD
+    assert corrector.lookup("covid") == "could"
+    assert corrector.correct("COVID Covid covid cases") == "COVID Covid covid cases"
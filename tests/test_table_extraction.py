@@ -0,0 +1,27 @@
+from benchmarks.synthetic import make_hybrid_pdf, make_table_pdf
+from utils.table_extraction import TabulaBackend, extract_tables, find_table_pages
+
+def test_find_table_pages_keeps_ruled_pages(tmp_path):
+    pdf_path = str(tmp_path / "tables.pdf")
+    tables = make_table_pdf(pdf_path, 10, table_every=5)
+    assert find_table_pages(pdf_path) == sorted(tables)
+
+def test_find_table_pages_includes_scanned_pages_on_request(tmp_path):
+    pdf_path = str(tmp_path / "hybrid.pdf")
+    make_hybrid_pdf(pdf_path, 4)
+    assert find_table_pages(pdf_path) == []
+    assert find_table_pages(pdf_path, include_scanned=True) == [1, 3]
+
+class RecordingTabula(TabulaBackend):
+    def extract(self, pdf_path, pages):
+        self.pages = list(pages)
+        return []
+
+def test_stream_mode_skips_the_ruling_precheck(tmp_path):
+    pdf_path = str(tmp_path / "tables.pdf")
+    make_table_pdf(pdf_path, 10, table_every=5)
+    lattice, stream = RecordingTabula(), RecordingTabula(lattice=False)
+    extract_tables(pdf_path, backend=lattice)
+    extract_tables(pdf_path, backend=stream)
+    assert lattice.pages == [0, 5]
+    assert stream.pages == list(range(10))
@@ -1,9 +1,17 @@
 import streamlit as st
 import os
-import glob
 from pathlib import Path
-from utils.pdf_processing import convert_pdf_to_images_and_text
+from contextlib import nullcontext
+from utils.pdf_processing import resolve_pages, iter_hybrid_pages, DEFAULT_OCR_WORKERS
+from utils.instrumentation import DocumentProfile, cprofile_block
 from utils.text_processing import format_text
+from utils.result_cache import get_result_cache
+from utils.document_cache import DocumentCache
+from utils.page_store import get_page_store
+from utils.models import DocumentResult
+from utils.keyword_index import get_keyword_index
+from utils.catalog import get_catalog
+from utils.text_processing import PreprocessingPipeline, DENOISE_THRESHOLDS
 
 def set_page_config():
     """Set Streamlit page configuration"""
@@ -22,6 +30,13 @@ def init_session_state():
             'auto_detect_lang': True,
             'manual_langs': [('eng', 'English - الإنجليزية'), ('ara', 'Arabic - العربية')],
             'enhance_images': True,
+            'ocr_workers': DEFAULT_OCR_WORKERS,
+            'use_cache': True,
+            'profile_run': False,
+            'save_page_images': False,
+            'adaptive_dpi': False,
+            'layout_analysis': False,
+            'denoise_thresholds': DENOISE_THRESHOLDS,
             'preview_enhanced': False,
             'correct_spelling': True,
             'remove_extra_spaces': True,
@@ -39,13 +54,36 @@ def init_session_state():
     
     if 'theme' not in st.session_state:
         st.session_state.theme = 'light'
-    if 'converted_pages' not in st.session_state:
-        st.session_state.converted_pages = []
+    if 'converted_document' not in st.session_state:
+        st.session_state.converted_document = None
     if 'current_pdf_path' not in st.session_state:
         st.session_state.current_pdf_path = None
+    if 'current_file_hash' not in st.session_state:
+        st.session_state.current_file_hash = None
     if 'processing' not in st.session_state:
         st.session_state.processing = False
 
+def get_document_cache():
+    """Session-scoped cache of parsed documents, kept across reruns"""
+    if 'document_cache' not in st.session_state:
+        st.session_state.document_cache = DocumentCache()
+    return st.session_state.document_cache
+
+def get_document(uploaded_file):
+    """Return the DocumentHandle of an uploaded file, parsing it only once per session"""
+    return get_document_cache().get(
+        uploaded_file.getvalue(),
+        uploaded_file.name,
+        upload_id=getattr(uploaded_file, 'file_id', None)
+    )
+
+def get_current_document():
+    """Return the DocumentHandle of the file loaded on the main page, if any"""
+    file_hash = st.session_state.get('current_file_hash')
+    if not file_hash:
+        return None
+    return get_document_cache().get_by_hash(file_hash)
+
 def create_sidebar():
     """Create sidebar with navigation and theme toggle"""
     with st.sidebar:
@@ -201,7 +239,52 @@ def create_processing_tabs():
         
         with tab1:
             st.session_state.settings['use_ocr'] = st.toggle("استخدام OCR", value=st.session_state.settings['use_ocr'])
-            st.session_state.settings['enhance_images'] = st.toggle("تحسين جودة الصور", value=st.session_state.settings['enhance_images'])
+            st.session_state.settings['enhance_images'] = st.toggle(
+                "تحسين جودة الصور",
+                value=st.session_state.settings['enhance_images'],
+                help="تحسين التباين وإزالة التشويش قبل OCR؛ عند الإيقاف يتم فقط تحويل الصفحة إلى الأبيض والأسود"
+            )
+            st.session_state.settings['ocr_workers'] = st.number_input(
+                "عدد العمليات المتوازية",
+                min_value=1,
+                max_value=max(DEFAULT_OCR_WORKERS, 1) * 2,
+                value=st.session_state.settings.get('ocr_workers', DEFAULT_OCR_WORKERS),
+                help="عدد العمليات المستخدمة لمعالجة الصفحات بالتوازي"
+            )
+            st.session_state.settings['use_cache'] = st.toggle(
+                "إعادة استخدام النتائج السابقة",
+                value=st.session_state.settings.get('use_cache', True),
+                help="عدم إعادة معالجة الصفحات التي تم تحويلها مسبقاً بنفس الإعدادات"
+            )
+            st.session_state.settings['adaptive_dpi'] = st.toggle(
+                "دقة تحويل تلقائية حسب حجم الخط",
+                value=st.session_state.settings.get('adaptive_dpi', False),
+                help="قياس حجم النص في معاينة منخفضة الدقة ثم تحويل الصفحة بأقل دقة مناسبة لـ OCR"
+            )
+            st.session_state.settings['layout_analysis'] = st.toggle(
+                "تحليل تخطيط الصفحة",
+                value=st.session_state.settings.get('layout_analysis', False),
+                help="تحديد كتل النص وقراءتها بترتيب الأعمدة (من اليمين للعربية) وتجاهل الصور والهوامش"
+            )
+            low, high = st.session_state.settings.get('denoise_thresholds', DENOISE_THRESHOLDS)
+            st.session_state.settings['denoise_thresholds'] = st.slider(
+                "مستوى الضوضاء لإزالة الضوضاء (تنعيم وسيط / إزالة كاملة)",
+                min_value=0.0,
+                max_value=30.0,
+                value=(float(low), float(high)),
+                step=0.5,
+                help="الصفحات الأقل ضوضاء من الحد الأول لا تتم معالجتها، وحتى الحد الثاني يستخدم تنعيم وسيط سريع، وما فوقه يستخدم إزالة الضوضاء الكاملة (بطيئة)"
+            )
+            st.session_state.settings['save_page_images'] = st.toggle(
+                "حفظ صور الصفحات المحسنة",
+                value=st.session_state.settings.get('save_page_images', False),
+                help="حفظ معاينة لكل صفحة بعد تحسينها أثناء التحويل (في الخلفية). بدونها يتم إنشاء المعاينة عند عرض الصفحة"
+            )
+            st.session_state.settings['profile_run'] = st.toggle(
+                "تحليل الأداء (cProfile)",
+                value=st.session_state.settings.get('profile_run', False),
+                help="تسجيل الدوال الأبطأ أثناء التحويل (لا يشمل العمليات المتوازية)"
+            )
             
         with tab2:
             st.session_state.settings['correct_spelling'] = st.toggle("تصحيح الإملاء", value=st.session_state.settings['correct_spelling'])
@@ -216,6 +299,16 @@ def create_processing_tabs():
                 index=['txt', 'docx', 'pdf'].index(st.session_state.settings['output_format'])
             )
 
+def ocr_pipeline_from_settings(settings):
+    """Preprocessing for OCR; without image enhancement only grayscale and binarization run"""
+    enhance = settings.get('enhance_images', True)
+    return PreprocessingPipeline(
+        contrast=enhance,
+        denoise=enhance,
+        tone=enhance,
+        denoise_thresholds=settings.get('denoise_thresholds', DENOISE_THRESHOLDS)
+    )
+
 def process_pdf():
     """Process the PDF file and store results"""
     try:
@@ -230,20 +323,58 @@ def process_pdf():
                 else:
                     languages = [lang[0] for lang in st.session_state.settings['manual_langs']]
                 
-                # Convert PDF to images and text
-                text, total_pages, page_languages, pages_processed = convert_pdf_to_images_and_text(
+                # Convert PDF to images and text, one page at a time
+                total_pages, pages_processed = resolve_pages(
                     st.session_state.current_pdf_path,
-                    page_range=page_range,
-                    languages=languages
+                    page_range=page_range
                 )
                 
-                # Format text if needed
-                if st.session_state.settings['remove_extra_spaces']:
-                    text = " ".join(text.split())
+                # The stored copy is named by its hash; keep the uploaded file name
+                handle = get_current_document()
+                document_name = handle.name if handle else os.path.basename(st.session_state.current_pdf_path)
+                document = DocumentResult(document_name, total_pages)
+                progress = st.progress(0.0)
+                profile = DocumentProfile(document_name)
+                profiler = cprofile_block() if st.session_state.settings.get('profile_run') else nullcontext({})
+                with profiler as cprofile_result:
+                    # Pages with a usable text layer skip rendering and OCR
+                    for i, result in enumerate(iter_hybrid_pages(
+                        st.session_state.current_pdf_path,
+                        pages_processed,
+                        languages=languages,
+                        ocr=st.session_state.settings['use_ocr'],
+                        workers=st.session_state.settings.get('ocr_workers', DEFAULT_OCR_WORKERS),
+                        save_images=st.session_state.settings.get('save_page_images', False),
+                        adaptive_dpi=st.session_state.settings.get('adaptive_dpi', False),
+                        layout=st.session_state.settings.get('layout_analysis', False),
+                        pipeline=ocr_pipeline_from_settings(st.session_state.settings),
+                        cache=get_result_cache() if st.session_state.settings.get('use_cache', True) else None
+                    )):
+                        result.text = result.text.strip()
+                        
+                        # Format text if needed
+                        if st.session_state.settings['remove_extra_spaces']:
+                            result.text = " ".join(result.text.split())
+                        
+                        document.add(result)
+                        profile.add_page(result.page_num, result.stage_timings)
+                        progress.progress(
+                            (i + 1) / len(pages_processed),
+                            text=f"الصفحة {result.number} ({i + 1}/{len(pages_processed)})"
+                        )
+                
+                # Store pages in session state
+                st.session_state.converted_document = document
                 
-                # Split text into pages and store in session state
-                pages = text.split('\n--- Page')
-                st.session_state.converted_pages = [page.strip() for page in pages if page.strip()]
+                # Count the document in the corpus used for keyword scores and
+                # keep its pages searchable
+                if st.session_state.get('current_file_hash'):
+                    get_keyword_index().add_texts(st.session_state.current_file_hash,
+                                                  (page.text for page in document))
+                    get_catalog().add_document(st.session_state.current_file_hash, document.name,
+                                               document, document.total_pages)
+                st.session_state.last_profile = profile.finish().to_dict()
+                st.session_state.last_profile['cprofile'] = cprofile_result.get('report')
                 
                 # Show success message with page information
                 if page_range:
@@ -251,25 +382,39 @@ def process_pdf():
                 else:
                     st.success(f"تم تحويل {total_pages} صفحات بنجاح!")
                 
+                display_profile(st.session_state.last_profile)
+                
                 st.button("عرض النتائج", on_click=lambda: st.switch_page("pages/5_📖_Text_Viewer.py"))
     except Exception as e:
         st.error(f"حدث خطأ أثناء المعالجة: {str(e)}")
     finally:
         st.session_state.processing = False
 
+def display_profile(profile):
+    """Show the per-stage time breakdown of the last conversion"""
+    if not profile or not profile.get('stages_ms'):
+        return
+    with st.expander(f"⏱️ توزيع وقت المعالجة ({profile['wall_seconds']:.2f} ثانية)"):
+        st.bar_chart({'ms': profile['stages_ms']})
+        st.dataframe(
+            [{'page': page, **timings} for page, timings in profile['per_page_ms'].items()],
+            use_container_width=True
+        )
+        if profile.get('cprofile'):
+            st.code(profile['cprofile'])
+
 def clear_results():
     """Clear all conversion results and temporary files"""
-    if 'current_pdf_path' in st.session_state:
-        # Delete temporary image files
-        for img_file in glob.glob(f"{st.session_state.current_pdf_path}_page_*.png"):
-            try:
-                os.remove(img_file)
-            except:
-                pass
+    if st.session_state.get('current_pdf_path'):
+        # Delete saved page images
+        get_page_store().clear(st.session_state.current_pdf_path)
+    # Delete the copies of the uploaded files
+    get_document_cache().clear()
     
     # Clear session state
-    st.session_state.converted_pages = []
+    st.session_state.converted_document = None
     st.session_state.current_pdf_path = None
+    st.session_state.current_file_hash = None
     st.session_state.processing = False
     if 'page_range' in st.session_state:
         del st.session_state.page_range
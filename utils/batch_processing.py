@@ -0,0 +1,250 @@
+"""
+Headless batch conversion of PDF files.
+
+Usage:
+    python -m utils.batch_processing INPUT [INPUT ...] --output-dir OUT [options]
+
+INPUT is a directory (searched for *.pdf) or a manifest file listing one PDF
+path per line. Outputs keep the folder structure of the inputs below their
+common directory, so equal file names do not collide. Completed files are recorded in a checkpoint file, so an
+interrupted run can be restarted with the same command and resumes where it
+stopped.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+
+from utils.catalog import get_catalog
+from utils.file_handling import format_output
+from utils.pdf_processing import convert_pdf_to_images_and_text, init_ocr_worker
+from utils.result_cache import file_sha256, get_result_cache
+from utils.text_processing import PreprocessingPipeline, DENOISE_THRESHOLDS
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_NAME = '.batch_checkpoint.jsonl'
+
+def collect_inputs(inputs, recursive=False):
+    """Expand directories and manifest files into a sorted list of PDF paths"""
+    pdf_paths = []
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            pattern = '**/*.pdf' if recursive else '*.pdf'
+            pdf_paths.extend(p for p in path.glob(pattern) if p.is_file())
+        elif path.suffix.lower() == '.pdf':
+            pdf_paths.append(path)
+        elif path.is_file():
+            # Manifest: one path per line, relative paths resolved against the manifest
+            for line in path.read_text(encoding='utf-8').splitlines():
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    entry = Path(line)
+                    pdf_paths.append(entry if entry.is_absolute() else path.parent / entry)
+        else:
+            logger.warning(f"Skipping missing input: {item}")
+    return sorted({str(p.resolve()) for p in pdf_paths})
+
+def load_checkpoint(checkpoint_path):
+    """Return {pdf_path: record} for files completed in a previous run"""
+    done = {}
+    if not checkpoint_path.exists():
+        return done
+    with open(checkpoint_path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A crash can leave a truncated last line
+                continue
+            if record.get('status') == 'ok':
+                done[record['pdf_path']] = record
+    return done
+
+def append_checkpoint(checkpoint_file, record):
+    checkpoint_file.write(json.dumps(record, ensure_ascii=False) + '\n')
+    checkpoint_file.flush()
+    os.fsync(checkpoint_file.fileno())
+
+def output_paths_for(pdf_paths, output_dir, output_format):
+    """
+    Map every input to its output file, mirroring its location below the
+    deepest directory shared by all inputs: a/report.pdf and b/report.pdf
+    (e.g. with --recursive) become OUT/a/report.txt and OUT/b/report.txt
+    instead of overwriting each other. Inputs of a single directory map
+    directly into output_dir.
+    """
+    try:
+        root = Path(os.path.commonpath([str(Path(p).parent) for p in pdf_paths])) if pdf_paths else None
+    except ValueError:
+        # No common directory (inputs on different drives)
+        root = None
+    outputs = {}
+    for pdf_path in pdf_paths:
+        path = Path(pdf_path)
+        if root is not None:
+            relative = path.relative_to(root)
+        else:
+            relative = Path(path.drive.rstrip(':\\/') or '_') / path.relative_to(path.anchor)
+        outputs[pdf_path] = Path(output_dir) / relative.with_suffix(f".{output_format}")
+    return outputs
+
+def convert_file(pdf_path, output_path, output_format='txt', languages=None, page_range=None,
+                 text_layer_first=True, use_cache=True, adaptive_dpi=False,
+                 denoise_thresholds=DENOISE_THRESHOLDS, layout=False, catalog=True):
+    """Convert one PDF and write the formatted output; returns a checkpoint record"""
+    start = time.perf_counter()
+    try:
+        document = convert_pdf_to_images_and_text(
+            pdf_path,
+            page_range=page_range,
+            languages=languages,
+            cache=get_result_cache() if use_cache else None,
+            text_layer_first=text_layer_first,
+            save_images=False,
+            adaptive_dpi=adaptive_dpi,
+            pipeline=PreprocessingPipeline(denoise_thresholds=denoise_thresholds),
+            layout=layout
+        )
+        metadata = {
+            'Source': Path(pdf_path).name,
+            'Pages': f"{len(document)} / {document.total_pages}",
+            'Languages': ', '.join(document.languages)
+        }
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        Path(output_path).write_text(format_output(document.text, output_format, metadata), encoding='utf-8')
+        if catalog:
+            try:
+                get_catalog().add_document(file_sha256(pdf_path), document.name, document, document.total_pages)
+            except Exception as e:
+                logger.warning(f"Could not add {pdf_path} to the search catalog: {str(e)}")
+        return {
+            'pdf_path': pdf_path,
+            'status': 'ok',
+            'output': str(output_path),
+            'pages': len(document),
+            'seconds': round(time.perf_counter() - start, 3)
+        }
+    except Exception as e:
+        logger.error(f"Error converting {pdf_path}: {str(e)}")
+        return {
+            'pdf_path': pdf_path,
+            'status': 'error',
+            'error': str(e),
+            'pages': 0,
+            'seconds': round(time.perf_counter() - start, 3)
+        }
+
+def run_batch(pdf_paths, output_dir, output_format='txt', workers=None, checkpoint_path=None,
+              **convert_options):
+    """
+    Convert pdf_paths with a bounded process pool, skipping files recorded as
+    done in the checkpoint. Returns the list of records for this run.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    checkpoint_path = Path(checkpoint_path or output_dir / CHECKPOINT_NAME)
+
+    done = load_checkpoint(checkpoint_path)
+    pending = [p for p in pdf_paths if p not in done]
+    # From all inputs, so a resumed run keeps the same names
+    output_paths = output_paths_for(pdf_paths, output_dir, output_format)
+    logger.info(f"{len(pdf_paths)} files, {len(done)} already done, {len(pending)} to convert")
+
+    workers = max(1, workers or os.cpu_count() or 1)
+    records = []
+    start = time.perf_counter()
+    with open(checkpoint_path, 'a', encoding='utf-8') as checkpoint_file, \
+            ProcessPoolExecutor(max_workers=workers, initializer=init_ocr_worker) as executor:
+        queue = iter(pending)
+        in_flight = set()
+
+        def submit_next():
+            pdf_path = next(queue, None)
+            if pdf_path is None:
+                return False
+            in_flight.add(executor.submit(
+                convert_file,
+                pdf_path,
+                output_paths[pdf_path],
+                output_format,
+                **convert_options
+            ))
+            return True
+
+        # Keep a bounded number of files queued so huge backlogs stay cheap
+        for _ in range(workers * 2):
+            if not submit_next():
+                break
+
+        while in_flight:
+            finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                record = future.result()
+                records.append(record)
+                append_checkpoint(checkpoint_file, record)
+                logger.info(f"[{len(records)}/{len(pending)}] {record['status']} "
+                            f"{Path(record['pdf_path']).name}: {record['pages']} pages "
+                            f"in {record['seconds']:.2f} s")
+                submit_next()
+
+    elapsed = time.perf_counter() - start
+    pages = sum(r['pages'] for r in records)
+    failed = sum(1 for r in records if r['status'] != 'ok')
+    logger.info(f"Converted {len(records) - failed} files ({failed} failed), {pages} pages "
+                f"in {elapsed:.1f} s: {pages / elapsed if elapsed else 0:.2f} pages/sec")
+    return records
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch PDF to text conversion")
+    parser.add_argument('inputs', nargs='+', help='PDF files, directories or manifest files')
+    parser.add_argument('-o', '--output-dir', required=True, help='directory for converted files')
+    parser.add_argument('-f', '--format', default='txt', choices=['txt', 'md', 'html'])
+    parser.add_argument('-w', '--workers', type=int, default=None, help='parallel files (default: cores)')
+    parser.add_argument('-l', '--languages', default=None, help="tesseract languages, e.g. 'eng+ara'")
+    parser.add_argument('-p', '--page-range', default=None, help="pages to convert, e.g. '1-3,5'")
+    parser.add_argument('-r', '--recursive', action='store_true', help='search directories recursively')
+    parser.add_argument('--checkpoint', default=None, help='checkpoint file (default: in output dir)')
+    parser.add_argument('--ocr-all', action='store_true', help='OCR every page, ignoring text layers')
+    parser.add_argument('--no-cache', action='store_true', help='do not use the page result cache')
+    parser.add_argument('--adaptive-dpi', action='store_true', help='choose the render DPI per page from the text size')
+    parser.add_argument('--denoise-thresholds', nargs=2, type=float, default=list(DENOISE_THRESHOLDS),
+                        metavar=('MEDIAN', 'NLMEANS'),
+                        help='noise levels from which a median blur / NL-means denoising is used')
+    parser.add_argument('--layout', action='store_true',
+                        help='OCR only the text blocks found by layout analysis, in reading order')
+    parser.add_argument('--no-catalog', action='store_true',
+                        help='do not add the converted pages to the search catalog')
+    args = parser.parse_args(argv)
+
+    pdf_paths = collect_inputs(args.inputs, recursive=args.recursive)
+    if not pdf_paths:
+        logger.error("No PDF files found")
+        return 1
+
+    records = run_batch(
+        pdf_paths,
+        args.output_dir,
+        output_format=args.format,
+        workers=args.workers,
+        checkpoint_path=args.checkpoint,
+        languages=args.languages.split('+') if args.languages else None,
+        page_range=args.page_range,
+        text_layer_first=not args.ocr_all,
+        use_cache=not args.no_cache,
+        adaptive_dpi=args.adaptive_dpi,
+        denoise_thresholds=tuple(args.denoise_thresholds),
+        layout=args.layout,
+        catalog=not args.no_catalog
+    )
+    return 1 if any(r['status'] != 'ok' for r in records) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
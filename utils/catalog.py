@@ -0,0 +1,215 @@
+import logging
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from utils.text_processing import normalize_arabic
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Default location of the catalog of converted documents
+DEFAULT_CATALOG_PATH = Path(os.environ.get(
+    'PDF_CONVERTER_CATALOG',
+    Path(tempfile.gettempdir()) / "pdf_converter" / "catalog.sqlite3"
+))
+
+# Words of context around the matches in search snippets
+SNIPPET_TOKENS = 12
+DEFAULT_SEARCH_LIMIT = 20
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    file_hash TEXT NOT NULL UNIQUE,
+    name TEXT,
+    total_pages INTEGER,
+    added REAL
+);
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY,
+    document_id INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    page_num INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    languages TEXT,
+    source TEXT,
+    UNIQUE (document_id, page_num)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5(
+    body,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+# Bumped when normalize_for_search changes; older indexes are rebuilt on open
+NORMALIZATION_VERSION = 2
+
+# "a phrase" or a single word
+QUERY_TERM_RE = re.compile(r'"([^"]+)"|(\S+)')
+
+def normalize_for_search(text):
+    """Text as indexed: Arabic diacritics, tatweel and alef variants normalized"""
+    return normalize_arabic(text)
+
+def to_fts_query(query):
+    """
+    Turn user input into an FTS5 query: every word or "quoted phrase" must
+    match; operators and special characters are taken literally.
+    """
+    terms = []
+    for phrase, word in QUERY_TERM_RE.findall(normalize_for_search(query)):
+        term = (phrase or word).replace('"', '')
+        if term.strip():
+            terms.append('"' + term + '"')
+    return ' '.join(terms)
+
+class DocumentCatalog:
+    """
+    Per-page text of converted documents in SQLite with an FTS5 index.
+
+    Pages are normalized (see normalize_for_search) when indexed and queries
+    the same way, so spelling variants of Arabic words match. Adding a
+    document replaces its previous pages, all in one transaction.
+    """
+
+    def __init__(self, path=DEFAULT_CATALOG_PATH, timeout=30):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Shared by the Streamlit script threads, serialized by the lock
+        self._conn = sqlite3.connect(str(self.path), timeout=timeout, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA foreign_keys=ON")
+            self._conn.create_function('normalize_for_search', 1, normalize_for_search, deterministic=True)
+            self._conn.executescript(SCHEMA)
+            self._migrate()
+
+    def _migrate(self):
+        """Re-normalize the FTS index if it was built by an older normalize_for_search"""
+        version, = self._conn.execute("PRAGMA user_version").fetchone()
+        if version == NORMALIZATION_VERSION:
+            return
+        with self._conn:
+            self._conn.execute("DELETE FROM pages_fts")
+            self._conn.execute(
+                "INSERT INTO pages_fts (rowid, body) SELECT id, normalize_for_search(text) FROM pages")
+            self._conn.execute(f"PRAGMA user_version = {NORMALIZATION_VERSION}")
+        if version:
+            logger.info(f"Rebuilt the search index for normalization version {NORMALIZATION_VERSION}")
+
+    def _remove(self, file_hash):
+        row = self._conn.execute("SELECT id FROM documents WHERE file_hash = ?", (file_hash,)).fetchone()
+        if row is None:
+            return
+        self._conn.execute(
+            "DELETE FROM pages_fts WHERE rowid IN (SELECT id FROM pages WHERE document_id = ?)", row)
+        self._conn.execute("DELETE FROM pages WHERE document_id = ?", row)
+        self._conn.execute("DELETE FROM documents WHERE id = ?", row)
+
+    def _insert(self, file_hash, name, pages, total_pages=None):
+        self._remove(file_hash)
+        pages = list(pages)
+        document_id = self._conn.execute(
+            "INSERT INTO documents (file_hash, name, total_pages, added) VALUES (?, ?, ?, ?)",
+            (file_hash, name, total_pages if total_pages is not None else len(pages), time.time())
+        ).lastrowid
+        self._conn.executemany(
+            "INSERT INTO pages (document_id, page_num, text, languages, source) VALUES (?, ?, ?, ?, ?)",
+            [(document_id, page.page_num, page.text, '+'.join(page.languages), page.source) for page in pages]
+        )
+        self._conn.execute(
+            "INSERT INTO pages_fts (rowid, body) "
+            "SELECT id, normalize_for_search(text) FROM pages WHERE document_id = ?",
+            (document_id,)
+        )
+        return len(pages)
+
+    def add_document(self, file_hash, name, pages, total_pages=None):
+        """Store the PageResults of a document (e.g. a DocumentResult)"""
+        return self.add_documents([(file_hash, name, pages, total_pages)])
+
+    def add_documents(self, documents):
+        """
+        Store many documents, given as (file_hash, name, pages, total_pages)
+        tuples, in a single transaction. Returns the number of pages stored.
+        """
+        stored = 0
+        with self._lock:
+            try:
+                with self._conn:
+                    for file_hash, name, pages, total_pages in documents:
+                        stored += self._insert(file_hash, name, pages, total_pages)
+            except Exception as e:
+                logger.error(f"Error adding documents to the catalog: {str(e)}")
+                raise
+        return stored
+
+    def search(self, query, limit=DEFAULT_SEARCH_LIMIT, highlight=('[', ']')):
+        """
+        Pages matching query, best first: dicts with the document name and
+        hash, the 1-based page number, a snippet and the bm25 rank.
+        """
+        fts_query = to_fts_query(query)
+        if not fts_query:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT d.file_hash, d.name, p.page_num,
+                       snippet(pages_fts, 0, ?, ?, '…', ?), bm25(pages_fts)
+                FROM pages_fts
+                JOIN pages p ON p.id = pages_fts.rowid
+                JOIN documents d ON d.id = p.document_id
+                WHERE pages_fts MATCH ?
+                ORDER BY bm25(pages_fts)
+                LIMIT ?
+                """,
+                (highlight[0], highlight[1], SNIPPET_TOKENS, fts_query, limit)
+            ).fetchall()
+        return [
+            {'file_hash': file_hash, 'document': name, 'page': page_num + 1,
+             'snippet': snippet, 'rank': round(rank, 4)}
+            for file_hash, name, page_num, snippet, rank in rows
+        ]
+
+    def page_text(self, file_hash, page_num):
+        """Original text of a 0-based page, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT p.text FROM pages p JOIN documents d ON d.id = p.document_id "
+                "WHERE d.file_hash = ? AND p.page_num = ?",
+                (file_hash, page_num)
+            ).fetchone()
+        return row[0] if row else None
+
+    def remove_document(self, file_hash):
+        with self._lock, self._conn:
+            self._remove(file_hash)
+
+    def stats(self):
+        with self._lock:
+            documents, = self._conn.execute("SELECT count(*) FROM documents").fetchone()
+            pages, = self._conn.execute("SELECT count(*) FROM pages").fetchone()
+        return {'documents': documents, 'pages': pages, 'bytes': self.path.stat().st_size}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+def get_catalog():
+    """Process-wide catalog in the default location"""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = DocumentCatalog()
+        return _catalog
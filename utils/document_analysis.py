@@ -0,0 +1,178 @@
+import logging
+import math
+import re
+import time
+from collections import Counter
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Patterns are compiled once instead of per line
+HEADER_NUMBER_RE = re.compile(r'\d+$')
+LIST_ITEM_RE = re.compile(r'^[\d•\-\*]\s+')
+WORD_RE = re.compile(r'\b\w+\b')
+VOWEL_GROUP_RE = re.compile(r'[aeiou]+')
+
+# Structure items kept for display; later items are only counted
+MAX_STRUCTURE_ITEMS = 2000
+# Distinct words kept before words seen once are dropped
+MAX_VOCABULARY = 500000
+
+TOP_KEYWORDS = 20
+TOP_WORDS = 20
+
+class StructureAccumulator:
+    """Headers, paragraphs and lists, detected line by line"""
+
+    def __init__(self, max_items=MAX_STRUCTURE_ITEMS):
+        self.max_items = max_items
+        self.items = []
+        self.truncated = 0
+        self.section = {'type': 'text', 'content': []}
+
+    def _emit(self, item):
+        if len(self.items) < self.max_items:
+            self.items.append(item)
+        else:
+            self.truncated += 1
+
+    def _close_section(self, section_type='text'):
+        if self.section['content']:
+            self._emit(self.section)
+        self.section = {'type': section_type, 'content': []}
+
+    def feed_line(self, line):
+        stripped = line.strip()
+        # Headers: fewer than 5 words, all caps or ending with a number
+        if len(line.split()) < 5 and (stripped.isupper() or HEADER_NUMBER_RE.search(line)):
+            self._close_section()
+            self._emit({'type': 'header', 'content': stripped})
+        # Lists: lines starting with a bullet or a number
+        elif LIST_ITEM_RE.match(line):
+            if self.section['type'] != 'list':
+                self._close_section('list')
+            self.section['content'].append(stripped)
+        # Regular paragraph text
+        else:
+            if self.section['type'] == 'list' and self.section['content']:
+                self._close_section()
+            self.section['content'].append(stripped)
+
+    def end_page(self):
+        self._close_section()
+
+class WordAccumulator:
+    """Word counts, shared by the word frequencies and the keyword scores"""
+
+    def __init__(self, max_vocabulary=MAX_VOCABULARY):
+        self.max_vocabulary = max_vocabulary
+        self.counts = Counter()
+
+    def feed_page(self, text):
+        self.counts.update(WORD_RE.findall(text.lower()))
+        if len(self.counts) > self.max_vocabulary:
+            # The rare tail never reaches the top lists
+            for word in [w for w, c in self.counts.items() if c == 1]:
+                del self.counts[word]
+
+    def most_common(self, n=TOP_WORDS):
+        return self.counts.most_common(n)
+
+    def keywords(self, n=TOP_KEYWORDS):
+        """
+        Top n words of two or more characters, scored like a TF-IDF
+        vectorizer fitted on the single document (max_features=n): the term
+        frequencies of the selected words, L2-normalized.
+        """
+        top = Counter({w: c for w, c in self.counts.items() if len(w) > 1}).most_common(n)
+        norm = math.sqrt(sum(c * c for _, c in top)) or 1.0
+        return {word: count / norm for word, count in top}
+
+class ReadabilityAccumulator:
+    """Word, sentence and syllable totals for the readability metrics"""
+
+    def __init__(self):
+        self.words = 0
+        self.characters = 0
+        self.syllables = 0
+        self.periods = 0
+
+    def feed_page(self, text):
+        words = text.split()
+        self.words += len(words)
+        self.characters += sum(len(word) for word in words)
+        self.syllables += sum(len(VOWEL_GROUP_RE.findall(word.lower())) for word in words)
+        self.periods += text.count('.')
+
+    def metrics(self):
+        if not self.words:
+            return {}
+        # Sentences are the pieces between periods
+        sentences = self.periods + 1
+        avg_sentence_length = self.words / sentences
+        flesch = 206.835 - 1.015 * avg_sentence_length - 84.6 * (self.syllables / self.words)
+        return {
+            'total_words': self.words,
+            'total_sentences': sentences,
+            'avg_word_length': round(self.characters / self.words, 2),
+            'avg_sentence_length': round(avg_sentence_length, 2),
+            'flesch_score': round(flesch, 2)
+        }
+
+class DocumentAnalyzer:
+    """
+    One-pass document analysis.
+
+    Each page text is fed once and goes through the structure, word and
+    readability accumulators together; no document-wide string is built,
+    so memory depends on the vocabulary and the (capped) structure, not on
+    the number of pages.
+    """
+
+    def __init__(self, max_structure_items=MAX_STRUCTURE_ITEMS, max_vocabulary=MAX_VOCABULARY):
+        self.structure = StructureAccumulator(max_structure_items)
+        self.words = WordAccumulator(max_vocabulary)
+        self.readability = ReadabilityAccumulator()
+        self.pages = 0
+        self.seconds = 0.0
+
+    def feed_page(self, text):
+        start = time.perf_counter()
+        for line in text.split('\n'):
+            self.structure.feed_line(line)
+        self.structure.end_page()
+        self.words.feed_page(text)
+        self.readability.feed_page(text)
+        self.pages += 1
+        self.seconds += time.perf_counter() - start
+
+    def result(self):
+        return {
+            'pages': self.pages,
+            'structure': self.structure.items,
+            'structure_truncated': self.structure.truncated,
+            'keywords': self.words.keywords(),
+            'word_frequency': self.words.most_common(),
+            'readability': self.readability.metrics(),
+            'seconds': round(self.seconds, 4)
+        }
+
+def analyze_document(page_texts, keyword_index=None, doc_id=None, **options):
+    """
+    Analyze an iterable of page texts (or (page_num, text) pairs) in one pass.
+
+    With a keyword_index (see utils.keyword_index) the document is added to
+    the corpus under doc_id and its keywords are scored with the corpus IDF.
+    """
+    analyzer = DocumentAnalyzer(**options)
+    for item in page_texts:
+        analyzer.feed_page(item[1] if isinstance(item, tuple) else item)
+    result = analyzer.result()
+    if keyword_index is not None:
+        if doc_id is not None and doc_id not in keyword_index:
+            keyword_index.add(doc_id, analyzer.words.counts)
+        result['keywords'] = keyword_index.keywords(analyzer.words.counts)
+        result['corpus_documents'] = keyword_index.n_documents
+    logger.info(f"Analyzed {result['pages']} pages in {result['seconds']:.3f} s")
+    return result
@@ -0,0 +1,174 @@
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import time
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+
+from PyPDF2 import PdfReader
+
+from utils.page_store import MemoryPageStore, PREVIEW_WIDTH
+from utils.pdf_processing import render_pages
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Memory budget for all open documents of a session
+DEFAULT_DOCUMENT_CACHE_BYTES = 200 * 1024 * 1024
+# Memory budget for the rendered thumbnails of one document
+DEFAULT_THUMBNAIL_BYTES = 32 * 1024 * 1024
+THUMBNAIL_WIDTH = PREVIEW_WIDTH
+
+# Directory holding a subdirectory per session with its uploaded files,
+# named by content hash
+DOCUMENT_DIR = Path(tempfile.gettempdir()) / "pdf_converter" / "documents"
+# Session directories left behind (e.g. by a killed process) are removed
+# after this many seconds without use
+DOCUMENT_DIR_MAX_AGE = 24 * 60 * 60
+
+class DocumentHandle:
+    """
+    A parsed PDF kept alive across reruns: the PdfReader, page count, text
+    layer of the pages read so far, lazily rendered thumbnails (kept in
+    a MemoryPageStore) and results computed from the document (memoize).
+    """
+
+    def __init__(self, file_hash, pdf_path, name=None, max_thumbnail_bytes=DEFAULT_THUMBNAIL_BYTES):
+        self.file_hash = file_hash
+        self.pdf_path = str(pdf_path)
+        self.name = name or Path(pdf_path).name
+        self.file_size = os.path.getsize(pdf_path)
+        self.reader = PdfReader(self.pdf_path)
+        self.page_count = len(self.reader.pages)
+        self._texts = {}
+        self._results = {}
+        self.thumbnails = MemoryPageStore(max_thumbnail_bytes, width=THUMBNAIL_WIDTH)
+
+    def page_text(self, page_num):
+        """Text layer of a page (0-based), extracted once"""
+        if page_num not in self._texts:
+            self._texts[page_num] = self.reader.pages[page_num].extract_text() or ""
+        return self._texts[page_num]
+
+    def iter_page_texts(self):
+        for page_num in range(self.page_count):
+            yield page_num, self.page_text(page_num)
+
+    def memoize(self, key, compute):
+        """Result of compute() for key, computed once per document (e.g. an analysis)"""
+        if key not in self._results:
+            self._results[key] = compute()
+        return self._results[key]
+
+    def thumbnail(self, page_num):
+        """Compressed preview bytes of a page (0-based), rendered on first request"""
+        data = self.thumbnails.get(self.pdf_path, page_num)
+        if data is not None:
+            return data
+
+        # Render directly at preview width instead of downscaling a full page
+        for _, image in render_pages(self.pdf_path, [page_num], max_images=1,
+                                     size=(self.thumbnails.width, None)):
+            self.thumbnails.put(self.pdf_path, page_num, image)
+        return self.thumbnails.get(self.pdf_path, page_num)
+
+    def memory_bytes(self):
+        """Rough estimate of the memory held by this handle"""
+        # PdfReader keeps the file in memory plus its parsed objects
+        text_bytes = sum(len(t) for t in self._texts.values()) * 2
+        return self.file_size * 2 + text_bytes + self.thumbnails.size
+
+class DocumentCache:
+    """
+    Session-scoped LRU cache of DocumentHandle objects keyed by file hash,
+    evicting the least recently used documents beyond max_bytes.
+
+    The uploaded files are copied to a directory of their own; a file is
+    deleted with its handle, and the directory when the cache is garbage
+    collected (the session ended).
+    """
+
+    def __init__(self, max_bytes=DEFAULT_DOCUMENT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._documents = OrderedDict()
+        # Upload id -> file hash, so unchanged uploads are not hashed again
+        self._upload_hashes = {}
+        prune_document_dirs()
+        self.directory = Path(tempfile.mkdtemp(dir=DOCUMENT_DIR))
+        self._finalizer = weakref.finalize(self, shutil.rmtree, str(self.directory), True)
+
+    def get(self, data, name=None, upload_id=None):
+        """Return the handle for uploaded file bytes, parsing them only once"""
+        file_hash = self._upload_hashes.get(upload_id) if upload_id else None
+        if file_hash is None:
+            file_hash = hashlib.sha256(data).hexdigest()
+            if upload_id:
+                self._upload_hashes[upload_id] = file_hash
+        handle = self.get_by_hash(file_hash)
+        if handle is not None:
+            return handle
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Mark the directory as in use for prune_document_dirs
+        os.utime(self.directory)
+        suffix = Path(name).suffix if name else '.pdf'
+        pdf_path = self.directory / f"{file_hash}{suffix}"
+        if not pdf_path.exists():
+            pdf_path.write_bytes(data)
+
+        handle = DocumentHandle(file_hash, pdf_path, name=name)
+        self._documents[file_hash] = handle
+        self.enforce_budget()
+        return handle
+
+    def get_by_hash(self, file_hash):
+        handle = self._documents.get(file_hash)
+        if handle is not None:
+            self._documents.move_to_end(file_hash)
+            self.enforce_budget()
+        return handle
+
+    def enforce_budget(self):
+        """Evict least recently used documents, always keeping the newest one"""
+        while len(self._documents) > 1 and self.memory_bytes() > self.max_bytes:
+            file_hash, handle = self._documents.popitem(last=False)
+            self._delete_file(handle)
+            logger.info(f"Evicted document {file_hash[:12]} from the session cache")
+
+    def clear(self):
+        """Drop every document and delete the copied files"""
+        while self._documents:
+            _, handle = self._documents.popitem()
+            self._delete_file(handle)
+
+    def _delete_file(self, handle):
+        # PdfReader has read the whole file, so the handle stays usable
+        try:
+            Path(handle.pdf_path).unlink(missing_ok=True)
+        except Exception as e:
+            logger.error(f"Error deleting {handle.pdf_path}: {str(e)}")
+
+    def memory_bytes(self):
+        return sum(handle.memory_bytes() for handle in self._documents.values())
+
+    def __len__(self):
+        return len(self._documents)
+
+def prune_document_dirs(max_age=DOCUMENT_DIR_MAX_AGE):
+    """Remove the entries of DOCUMENT_DIR unused for max_age seconds"""
+    DOCUMENT_DIR.mkdir(parents=True, exist_ok=True)
+    cutoff = time.time() - max_age
+    for entry in DOCUMENT_DIR.iterdir():
+        try:
+            if entry.stat().st_mtime >= cutoff:
+                continue
+            if entry.is_dir():
+                shutil.rmtree(entry, ignore_errors=True)
+            else:
+                entry.unlink(missing_ok=True)
+        except Exception as e:
+            logger.error(f"Error removing {entry}: {str(e)}")
@@ -0,0 +1,430 @@
+"""
+Local HTTP conversion service with an asynchronous job API.
+
+Usage:
+    python -m utils.http_service [--host 127.0.0.1] [--port 8600] [--workers N]
+
+Endpoints:
+    POST /jobs                     upload a PDF (raw body or multipart field 'file');
+                                   query: languages=eng+ara, page_range=1-3,
+                                   name=<document name for search results>
+                                   -> 202 {"job_id": ...}, 429 when the queue is full
+    GET  /jobs/<id>                job status and progress
+    GET  /jobs/<id>/pages          per-page results converted so far
+    GET  /jobs/<id>/result         final output; query: format=txt|md|html
+    GET  /search?q=...&limit=20    pages of converted documents matching q,
+                                   with snippets (see utils.catalog)
+    GET  /health                   service and queue status
+
+OCR runs in a process pool, so the event loop only parses requests and
+tracks jobs.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from email.parser import BytesParser
+from email.policy import HTTP
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qs
+
+from utils.catalog import DEFAULT_SEARCH_LIMIT, get_catalog
+from utils.file_handling import format_output
+from utils.models import DocumentResult
+from utils.pdf_processing import resolve_pages, ocr_pdf_page, init_ocr_worker
+from utils.result_cache import file_sha256
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8600
+# Jobs waiting to start before new submissions are rejected with 429
+DEFAULT_MAX_QUEUE = 16
+# Jobs converted at the same time (their pages share the process pool)
+DEFAULT_CONCURRENT_JOBS = 2
+DEFAULT_MAX_UPLOAD_BYTES = 100 * 1024 * 1024
+# Finished jobs and their files are dropped after this many seconds
+DEFAULT_JOB_TTL = 3600
+MAX_HEADER_BYTES = 64 * 1024
+
+JOB_DIR = Path(tempfile.gettempdir()) / "pdf_converter" / "jobs"
+
+STATUS_TEXT = {
+    200: 'OK', 202: 'Accepted', 400: 'Bad Request', 404: 'Not Found',
+    405: 'Method Not Allowed', 409: 'Conflict', 413: 'Payload Too Large',
+    429: 'Too Many Requests', 500: 'Internal Server Error'
+}
+
+CONTENT_TYPES = {
+    'txt': 'text/plain; charset=utf-8',
+    'md': 'text/markdown; charset=utf-8',
+    'html': 'text/html; charset=utf-8'
+}
+
+class Job:
+    """State of one conversion request"""
+
+    def __init__(self, job_id, pdf_path, languages=None, page_range=None, name=None):
+        self.job_id = job_id
+        self.pdf_path = pdf_path
+        self.name = name or os.path.basename(pdf_path)
+        self.languages = languages
+        self.page_range = page_range
+        self.status = 'queued'
+        self.error = None
+        self.total_pages = None
+        self.pages_to_process = []
+        self.pages = {}
+        self.created = time.time()
+        self.finished = None
+
+    def summary(self):
+        return {
+            'job_id': self.job_id,
+            'status': self.status,
+            'error': self.error,
+            'total_pages': self.total_pages,
+            'pages_requested': len(self.pages_to_process),
+            'pages_done': len(self.pages),
+            'created': self.created,
+            'finished': self.finished
+        }
+
+    def document(self):
+        """The pages converted so far, in page order"""
+        return DocumentResult(
+            self.name,
+            self.total_pages,
+            [self.pages[page_num] for page_num in self.pages_to_process if page_num in self.pages]
+        )
+
+class ConversionService:
+    """
+    Accepts PDF uploads over HTTP and converts them in the background.
+
+    Submitted jobs wait in a bounded asyncio queue (backpressure: 429 when it
+    is full); a fixed number of runner tasks take jobs from it and send their
+    pages to a shared process pool, recording each page as it completes.
+    """
+
+    def __init__(self, workers=None, max_queue=DEFAULT_MAX_QUEUE,
+                 concurrent_jobs=DEFAULT_CONCURRENT_JOBS,
+                 max_upload_bytes=DEFAULT_MAX_UPLOAD_BYTES, job_ttl=DEFAULT_JOB_TTL):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.concurrent_jobs = concurrent_jobs
+        self.max_upload_bytes = max_upload_bytes
+        self.job_ttl = job_ttl
+        self.jobs = {}
+        # Uploads being received, counted against the queue before their body is read
+        self.receiving = 0
+        self.queue = None
+        self.executor = None
+        self.server = None
+        self._tasks = []
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """Start the pool, the job runners and the HTTP server"""
+        JOB_DIR.mkdir(parents=True, exist_ok=True)
+        self.queue = asyncio.Queue(maxsize=self.max_queue)
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=init_ocr_worker)
+        self._tasks = [asyncio.create_task(self._job_runner()) for _ in range(self.concurrent_jobs)]
+        self._tasks.append(asyncio.create_task(self._expire_jobs()))
+        self.server = await asyncio.start_server(self.handle_connection, host, port)
+        address = self.server.sockets[0].getsockname()
+        logger.info(f"Conversion service listening on http://{address[0]}:{address[1]}")
+        return self.server
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    # HTTP handling
+
+    async def handle_connection(self, reader, writer):
+        try:
+            status, headers, body = await self._handle_request(reader)
+        except Exception as e:
+            logger.error(f"Error handling request: {str(e)}")
+            status, headers, body = self._json(500, {'error': 'internal error'})
+        try:
+            reason = STATUS_TEXT.get(status, '')
+            head = [f"HTTP/1.1 {status} {reason}", f"Content-Length: {len(body)}", "Connection: close"]
+            head.extend(f"{name}: {value}" for name, value in headers.items())
+            writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def _handle_request(self, reader):
+        try:
+            raw_head = await reader.readuntil(b'\r\n\r\n')
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            return self._json(400, {'error': 'malformed request'})
+        if len(raw_head) > MAX_HEADER_BYTES:
+            return self._json(400, {'error': 'headers too large'})
+
+        request_line, _, header_block = raw_head.decode('latin-1').partition('\r\n')
+        try:
+            method, target, _ = request_line.split(' ', 2)
+        except ValueError:
+            return self._json(400, {'error': 'malformed request line'})
+        headers = {}
+        for line in header_block.split('\r\n'):
+            name, sep, value = line.partition(':')
+            if sep:
+                headers[name.strip().lower()] = value.strip()
+
+        raw_length = headers.get('content-length') or '0'
+        if not (raw_length.isascii() and raw_length.isdigit()):
+            return self._json(400, {'error': 'invalid Content-Length'})
+        length = int(raw_length)
+        if length > self.max_upload_bytes:
+            return self._json(413, {'error': f'upload larger than {self.max_upload_bytes} bytes'})
+
+        method = method.upper()
+        url = urlsplit(target)
+        path = url.path.rstrip('/') or '/'
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        # A saturated service answers 429 without receiving the upload;
+        # uploads in progress hold their place in the queue meanwhile
+        upload = method == 'POST' and path == '/jobs'
+        if upload:
+            if self.queue.qsize() + self.receiving >= self.max_queue:
+                return self._queue_full()
+            self.receiving += 1
+        try:
+            body = await reader.readexactly(length) if length else b''
+            return await self.route(method, path, query, headers, body)
+        finally:
+            if upload:
+                self.receiving -= 1
+
+    async def route(self, method, path, query, headers, body):
+        parts = [p for p in path.split('/') if p]
+        if parts == ['health']:
+            return self._json(200, {
+                'status': 'ok',
+                'queued': self.queue.qsize(),
+                'max_queue': self.max_queue,
+                'jobs': len(self.jobs)
+            })
+        if parts == ['search']:
+            if method != 'GET':
+                return self._json(405, {'error': 'use GET'})
+            return await self.search(query)
+        if parts == ['jobs']:
+            if method != 'POST':
+                return self._json(405, {'error': 'use POST to submit a job'})
+            return await self.submit(query, headers, body)
+        if len(parts) in (2, 3) and parts[0] == 'jobs':
+            if method != 'GET':
+                return self._json(405, {'error': 'use GET'})
+            job = self.jobs.get(parts[1])
+            if job is None:
+                return self._json(404, {'error': 'unknown job'})
+            if len(parts) == 2:
+                return self._json(200, job.summary())
+            if parts[2] == 'pages':
+                return self._json(200, {
+                    'job_id': job.job_id,
+                    'status': job.status,
+                    'pages': [
+                        {'page': page.number, 'text': page.text, 'languages': page.languages}
+                        for page in job.document()
+                    ]
+                })
+            if parts[2] == 'result':
+                return self.result(job, query.get('format', 'txt'))
+        return self._json(404, {'error': 'not found'})
+
+    async def search(self, query):
+        text = query.get('q', '').strip()
+        if not text:
+            return self._json(400, {'error': 'missing query parameter q'})
+        try:
+            limit = max(1, min(int(query.get('limit', DEFAULT_SEARCH_LIMIT)), 200))
+        except ValueError:
+            return self._json(400, {'error': 'limit must be a number'})
+        start = time.perf_counter()
+        hits = await asyncio.get_running_loop().run_in_executor(None, get_catalog().search, text, limit)
+        return self._json(200, {
+            'query': text,
+            'hits': hits,
+            'ms': round((time.perf_counter() - start) * 1000, 2)
+        })
+
+    async def submit(self, query, headers, body):
+        if self.queue.full():
+            return self._queue_full()
+
+        data = self._extract_upload(headers, body)
+        if not data or not data.startswith(b'%PDF'):
+            return self._json(400, {'error': 'request body must be a PDF file'})
+
+        job_id = uuid.uuid4().hex
+        pdf_path = JOB_DIR / f"{job_id}.pdf"
+        pdf_path.write_bytes(data)
+        languages = query.get('languages')
+        job = Job(
+            job_id,
+            str(pdf_path),
+            languages=languages.replace(',', '+').split('+') if languages else None,
+            page_range=query.get('page_range'),
+            name=query.get('name')
+        )
+        self.jobs[job_id] = job
+        self.queue.put_nowait(job)
+        return self._json(202, {
+            'job_id': job_id,
+            'status_url': f"/jobs/{job_id}",
+            'result_url': f"/jobs/{job_id}/result"
+        })
+
+    def result(self, job, output_format):
+        if output_format not in CONTENT_TYPES:
+            return self._json(400, {'error': f"format must be one of {', '.join(CONTENT_TYPES)}"})
+        if job.status != 'done':
+            return self._json(409, {'error': f"job is {job.status}", 'status': job.status})
+        document = job.document()
+        metadata = {
+            'Pages': f"{len(document)} / {document.total_pages}",
+            'Languages': ', '.join(document.languages)
+        }
+        output = format_output(document.text, output_format, metadata)
+        return 200, {'Content-Type': CONTENT_TYPES[output_format]}, output.encode('utf-8')
+
+    def _extract_upload(self, headers, body):
+        """Return the PDF bytes from a raw or multipart/form-data body"""
+        content_type = headers.get('content-type', '')
+        if not content_type.startswith('multipart/form-data'):
+            return body
+        message = BytesParser(policy=HTTP).parsebytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode('latin-1') + body
+        )
+        for part in message.iter_parts():
+            if part.get_param('name', header='content-disposition') == 'file' or part.get_filename():
+                return part.get_payload(decode=True)
+        return None
+
+    def _queue_full(self):
+        return self._json(429, {'error': 'queue full, retry later'}, {'Retry-After': '10'})
+
+    def _json(self, status, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        return status, {'Content-Type': 'application/json; charset=utf-8', **(headers or {})}, body
+
+    # Job processing
+
+    async def _job_runner(self):
+        while True:
+            job = await self.queue.get()
+            try:
+                await self._run_job(job)
+            finally:
+                self.queue.task_done()
+
+    async def _run_job(self, job):
+        loop = asyncio.get_running_loop()
+        job.status = 'running'
+        try:
+            job.total_pages, job.pages_to_process = await loop.run_in_executor(
+                None, resolve_pages, job.pdf_path, job.page_range
+            )
+            languages = job.languages or ['eng', 'ara']
+            futures = [
+                loop.run_in_executor(
+                    self.executor, ocr_pdf_page, job.pdf_path, page_num, languages, False, False
+                )
+                for page_num in job.pages_to_process
+            ]
+            try:
+                for future in asyncio.as_completed(futures):
+                    result = await future
+                    job.pages[result.page_num] = result
+            except BaseException:
+                # Pages of a failed job that no worker has started are dropped
+                for future in futures:
+                    future.cancel()
+                raise
+            # Keep the pages searchable after the job expires
+            await loop.run_in_executor(None, self._catalog_job, job)
+            job.status = 'done'
+        except Exception as e:
+            logger.error(f"Job {job.job_id} failed: {str(e)}")
+            job.status = 'error'
+            job.error = str(e)
+        finally:
+            job.finished = time.time()
+
+    @staticmethod
+    def _catalog_job(job):
+        try:
+            document = job.document()
+            get_catalog().add_document(file_sha256(job.pdf_path), document.name, document, document.total_pages)
+        except Exception as e:
+            logger.warning(f"Could not add job {job.job_id} to the search catalog: {str(e)}")
+
+    async def _expire_jobs(self):
+        """Drop finished jobs and their uploads after job_ttl seconds"""
+        while True:
+            await asyncio.sleep(min(60, self.job_ttl))
+            now = time.time()
+            for job_id, job in list(self.jobs.items()):
+                if job.finished and now - job.finished > self.job_ttl:
+                    del self.jobs[job_id]
+                    Path(job.pdf_path).unlink(missing_ok=True)
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, **options):
+    service = ConversionService(**options)
+    server = await service.start(host, port)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+def positive_int(value):
+    """argparse type for counts that must be at least 1"""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local PDF conversion service")
+    parser.add_argument('--host', default=DEFAULT_HOST, help='bind address (default: localhost only)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=positive_int, default=None, help='OCR processes (default: cores)')
+    # 0 would make the asyncio queue unbounded and disable backpressure
+    parser.add_argument('--max-queue', type=positive_int, default=DEFAULT_MAX_QUEUE)
+    parser.add_argument('--concurrent-jobs', type=positive_int, default=DEFAULT_CONCURRENT_JOBS)
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(serve(
+            args.host,
+            args.port,
+            workers=args.workers,
+            max_queue=args.max_queue,
+            concurrent_jobs=args.concurrent_jobs
+        ))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
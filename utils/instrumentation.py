@@ -0,0 +1,190 @@
+import contextvars
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Optional Prometheus textfile-collector output, e.g. /var/lib/node_exporter/pdf_converter.prom
+METRICS_FILE = os.environ.get('PDF_CONVERTER_METRICS_FILE')
+METRIC_PREFIX = 'pdf_converter'
+
+_current_timings = contextvars.ContextVar('stage_timings', default=None)
+
+class StageTimings:
+    """Milliseconds and call counts per stage for one page"""
+
+    __slots__ = ('ms', 'calls')
+
+    def __init__(self):
+        self.ms = {}
+        self.calls = {}
+
+    def add(self, name, seconds):
+        self.ms[name] = self.ms.get(name, 0.0) + seconds * 1000
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def to_dict(self):
+        return {name: round(ms, 2) for name, ms in self.ms.items()}
+
+@contextmanager
+def collect_timings(timings=None):
+    """Record every stage() run inside the block into a StageTimings"""
+    timings = timings if timings is not None else StageTimings()
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
+
+def record(name, seconds):
+    """Add an already measured duration to the current timings, if collecting"""
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.add(name, seconds)
+
+@contextmanager
+def stage(name):
+    """Time a pipeline stage; a no-op outside collect_timings()"""
+    timings = _current_timings.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - start)
+
+class DocumentProfile:
+    """
+    Per-page and per-document stage breakdown of one conversion.
+
+    Pages are added from the PageResults of the extraction pipeline, whose
+    stage_timings are filled in by worker processes too. finish() logs the
+    breakdown as one structured JSON line and updates the Prometheus file.
+    """
+
+    def __init__(self, name=None):
+        self.name = name
+        self.pages = {}
+        self.totals = {}
+        self.calls = {}
+        self.started = time.perf_counter()
+        self.wall_seconds = None
+
+    def add_page(self, page_num, stage_timings):
+        self.pages[page_num] = dict(stage_timings)
+        for name, ms in stage_timings.items():
+            self.totals[name] = self.totals.get(name, 0.0) + ms
+            self.calls[name] = self.calls.get(name, 0) + 1
+        logger.debug(json.dumps({'event': 'page_timings', 'document': self.name,
+                                 'page': page_num + 1, 'stages_ms': stage_timings}))
+
+    @contextmanager
+    def stage(self, name):
+        """Time a document-level stage, e.g. batch language detection"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.totals[name] = self.totals.get(name, 0.0) + (time.perf_counter() - start) * 1000
+            self.calls[name] = self.calls.get(name, 0) + 1
+
+    def finish(self):
+        self.wall_seconds = time.perf_counter() - self.started
+        logger.info(json.dumps({'event': 'document_timings', **self.to_dict()}, ensure_ascii=False))
+        _update_process_totals(self)
+        if METRICS_FILE:
+            write_prometheus(METRICS_FILE)
+        return self
+
+    def to_dict(self):
+        return {
+            'document': self.name,
+            'pages': len(self.pages),
+            'wall_seconds': round(self.wall_seconds, 3) if self.wall_seconds is not None else None,
+            'stages_ms': {name: round(ms, 2) for name, ms in sorted(self.totals.items(), key=lambda x: -x[1])},
+            'per_page_ms': {page + 1: timings for page, timings in sorted(self.pages.items())}
+        }
+
+# Cumulative totals of this process, exported in Prometheus format
+_process_totals = {'documents': 0, 'pages': 0, 'seconds': 0.0, 'stage_ms': {}, 'stage_calls': {}}
+_process_lock = threading.Lock()
+
+def _update_process_totals(profile):
+    with _process_lock:
+        _process_totals['documents'] += 1
+        _process_totals['pages'] += len(profile.pages)
+        _process_totals['seconds'] += profile.wall_seconds or 0.0
+        for name, ms in profile.totals.items():
+            _process_totals['stage_ms'][name] = _process_totals['stage_ms'].get(name, 0.0) + ms
+            _process_totals['stage_calls'][name] = (
+                _process_totals['stage_calls'].get(name, 0) + profile.calls[name]
+            )
+
+def prometheus_text():
+    """Cumulative process metrics in the Prometheus text exposition format"""
+    with _process_lock:
+        lines = [
+            f"# HELP {METRIC_PREFIX}_documents_total Documents converted",
+            f"# TYPE {METRIC_PREFIX}_documents_total counter",
+            f"{METRIC_PREFIX}_documents_total {_process_totals['documents']}",
+            f"# HELP {METRIC_PREFIX}_pages_total Pages converted",
+            f"# TYPE {METRIC_PREFIX}_pages_total counter",
+            f"{METRIC_PREFIX}_pages_total {_process_totals['pages']}",
+            f"# HELP {METRIC_PREFIX}_document_seconds_total Wall time spent converting documents",
+            f"# TYPE {METRIC_PREFIX}_document_seconds_total counter",
+            f"{METRIC_PREFIX}_document_seconds_total {_process_totals['seconds']:.6f}",
+            f"# HELP {METRIC_PREFIX}_stage_seconds_total Time spent per pipeline stage",
+            f"# TYPE {METRIC_PREFIX}_stage_seconds_total counter",
+        ]
+        for name, ms in sorted(_process_totals['stage_ms'].items()):
+            lines.append(f'{METRIC_PREFIX}_stage_seconds_total{{stage="{name}"}} {ms / 1000:.6f}')
+        lines.extend([
+            f"# HELP {METRIC_PREFIX}_stage_calls_total Number of times each pipeline stage ran",
+            f"# TYPE {METRIC_PREFIX}_stage_calls_total counter",
+        ])
+        for name, calls in sorted(_process_totals['stage_calls'].items()):
+            lines.append(f'{METRIC_PREFIX}_stage_calls_total{{stage="{name}"}} {calls}')
+    return '\n'.join(lines) + '\n'
+
+def write_prometheus(path):
+    """Atomically write the metrics file for a textfile collector"""
+    try:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(prometheus_text())
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logger.warning(f"Could not write metrics file {path}: {str(e)}")
+
+@contextmanager
+def cprofile_block(stats_path=None, limit=30):
+    """
+    Opt-in cProfile of the enclosed code (e.g. one document conversion).
+
+    Yields a dict whose 'report' key holds the top functions by cumulative
+    time once the block exits; raw stats are dumped to stats_path if given.
+    Work done in worker processes is not captured.
+    """
+    result = {}
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield result
+    finally:
+        profiler.disable()
+        if stats_path:
+            profiler.dump_stats(stats_path)
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(limit)
+        result['report'] = stream.getvalue()
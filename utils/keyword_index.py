@@ -0,0 +1,245 @@
+import hashlib
+import io
+import logging
+import math
+import os
+import tempfile
+import threading
+import zlib
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+from utils.document_analysis import TOP_KEYWORDS, WordAccumulator
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Default location of the on-disk corpus index
+DEFAULT_INDEX_DIR = Path(tempfile.gettempdir()) / "pdf_converter" / "keyword_index"
+# Number of hash buckets terms are counted in (a power of two)
+DEFAULT_N_FEATURES = 2 ** 20
+
+INDEX_FILE = 'document_frequencies.npz'
+# Buckets of documents added since the last merge, one record per document
+JOURNAL_FILE = 'pending_documents.bin'
+# Documents journaled before they are merged into INDEX_FILE
+COMPACT_EVERY = 256
+
+JOURNAL_RECORD = np.dtype([('key', '<u8'), ('size', '<u4')])
+
+def document_key(doc_id):
+    """64-bit digest of a document id (e.g. the file SHA-256)"""
+    return int.from_bytes(hashlib.blake2b(str(doc_id).encode('utf-8'), digest_size=8).digest(), 'little')
+
+class KeywordIndex:
+    """
+    Corpus-wide document frequencies for keyword scoring.
+
+    Terms are hashed into n_features buckets, so the index never stores the
+    vocabulary and never needs refitting; the keywords of a document are its
+    own term counts weighted by the corpus IDF. On disk the frequencies are a
+    sparse pair of arrays (bucket, count) and documents are 64-bit keys, so
+    tens of thousands of documents take a few megabytes.
+
+    Adding a document appends its buckets to a journal, O(document). Every
+    compact_every documents (and on save()) the journal is merged into the
+    arrays and the index file is rewritten, which is O(index), so the
+    amortized cost per document stays small. Hash collisions only merge the
+    frequencies of unrelated rare terms. One process should write a given
+    index_dir.
+    """
+
+    def __init__(self, index_dir=DEFAULT_INDEX_DIR, n_features=DEFAULT_N_FEATURES,
+                 compact_every=COMPACT_EVERY):
+        self.index_dir = Path(index_dir)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self.n_features = n_features
+        self.compact_every = compact_every
+        self.buckets = np.zeros(0, dtype=np.uint32)
+        self.counts = np.zeros(0, dtype=np.uint32)
+        self.documents = np.zeros(0, dtype=np.uint64)
+        self._document_set = set()
+        self._pending = Counter()
+        self._pending_documents = []
+        self._lock = threading.Lock()
+        self._load()
+
+    @property
+    def path(self):
+        return self.index_dir / INDEX_FILE
+
+    @property
+    def journal_path(self):
+        return self.index_dir / JOURNAL_FILE
+
+    def _load(self):
+        try:
+            with np.load(self.path) as data:
+                if int(data['n_features']) != self.n_features:
+                    logger.warning(f"Keyword index at {self.path} uses {int(data['n_features'])} features, "
+                                   f"starting a new one with {self.n_features}")
+                    self.journal_path.unlink(missing_ok=True)
+                    return
+                self.buckets = data['buckets']
+                self.counts = data['counts']
+                self.documents = data['documents']
+            self._document_set = set(self.documents.tolist())
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"Error loading keyword index: {str(e)}")
+        self._replay_journal()
+
+    def _replay_journal(self):
+        """Load the documents journaled since the last merge"""
+        try:
+            data = self.journal_path.read_bytes()
+        except FileNotFoundError:
+            return
+        if len(data) < 8 or int(np.frombuffer(data, '<u8', 1)[0]) != self.n_features:
+            logger.warning(f"Discarding keyword index journal {self.journal_path}")
+            self.journal_path.unlink(missing_ok=True)
+            return
+        offset = 8
+        while offset + JOURNAL_RECORD.itemsize <= len(data):
+            record = np.frombuffer(data, JOURNAL_RECORD, 1, offset)[0]
+            start = offset + JOURNAL_RECORD.itemsize
+            end = start + 4 * int(record['size'])
+            if end > len(data):
+                break
+            offset = end
+            key = int(record['key'])
+            # Also in the index file when a merge was interrupted before the journal was removed
+            if key in self._document_set:
+                continue
+            self._document_set.add(key)
+            self._pending_documents.append(key)
+            self._pending.update(np.frombuffer(data, '<u4', int(record['size']), start).tolist())
+        if offset < len(data):
+            # A record cut short by a crash; appends continue after the last whole one
+            with open(self.journal_path, 'r+b') as f:
+                f.truncate(offset)
+
+    def _append_journal(self, key, buckets):
+        new = not self.journal_path.exists()
+        with open(self.journal_path, 'ab') as f:
+            if new:
+                f.write(np.array([self.n_features], dtype='<u8').tobytes())
+            f.write(np.array([(key, len(buckets))], dtype=JOURNAL_RECORD).tobytes())
+            f.write(buckets.astype('<u4').tobytes())
+
+    @property
+    def n_documents(self):
+        return len(self._document_set)
+
+    def bucket(self, term):
+        return zlib.crc32(term.encode('utf-8')) & (self.n_features - 1)
+
+    def __contains__(self, doc_id):
+        return document_key(doc_id) in self._document_set
+
+    def add(self, doc_id, term_counts, save=True):
+        """
+        Count a document (its term counts, e.g. a Counter) in the corpus.
+        With save=True it is journaled on disk (and merged every
+        compact_every documents); otherwise it is kept in memory until
+        save(). Returns False if doc_id was already added.
+        """
+        key = document_key(doc_id)
+        if key in self._document_set:
+            return False
+        buckets = np.fromiter({self.bucket(term) for term in term_counts}, dtype=np.uint32)
+        with self._lock:
+            if key in self._document_set:
+                return False
+            self._document_set.add(key)
+            self._pending_documents.append(key)
+            self._pending.update(buckets.tolist())
+            if save:
+                self._append_journal(key, buckets)
+            compact = save and len(self._pending_documents) >= self.compact_every
+        if compact:
+            self.save()
+        return True
+
+    def add_texts(self, doc_id, texts, save=True):
+        """Tokenize texts (e.g. page texts) and add them as one document"""
+        if doc_id in self:
+            return False
+        words = WordAccumulator()
+        for text in texts:
+            words.feed_page(text)
+        return self.add(doc_id, words.counts, save)
+
+    def _merge_pending(self):
+        if not self._pending_documents:
+            return
+        buckets = np.concatenate([self.buckets, np.fromiter(self._pending.keys(), dtype=np.uint32)])
+        counts = np.concatenate([self.counts, np.fromiter(self._pending.values(), dtype=np.uint32)])
+        self.buckets, inverse = np.unique(buckets, return_inverse=True)
+        self.counts = np.bincount(inverse, weights=counts).astype(np.uint32)
+        self.documents = np.concatenate(
+            [self.documents, np.array(self._pending_documents, dtype=np.uint64)])
+        self._pending.clear()
+        self._pending_documents = []
+
+    def save(self):
+        """Merge the pending documents and write the index atomically, O(index)"""
+        with self._lock:
+            self._merge_pending()
+            buffer = io.BytesIO()
+            np.savez(buffer, buckets=self.buckets, counts=self.counts,
+                     documents=self.documents, n_features=np.int64(self.n_features))
+            tmp_path = self.path.with_suffix('.tmp')
+            with open(tmp_path, 'wb') as f:
+                f.write(buffer.getvalue())
+            os.replace(tmp_path, self.path)
+            self.journal_path.unlink(missing_ok=True)
+
+    def document_frequencies(self, buckets):
+        """Document frequency of each bucket in an array of buckets"""
+        buckets = np.asarray(buckets, dtype=np.uint32)
+        with self._lock:
+            if len(self.buckets):
+                positions = np.searchsorted(self.buckets, buckets).clip(max=len(self.buckets) - 1)
+                frequencies = np.where(self.buckets[positions] == buckets,
+                                       self.counts[positions], 0).astype(np.int64)
+            else:
+                frequencies = np.zeros(len(buckets), dtype=np.int64)
+            if self._pending:
+                frequencies += np.fromiter((self._pending.get(int(b), 0) for b in buckets),
+                                           dtype=np.int64, count=len(buckets))
+        return frequencies
+
+    def keywords(self, term_counts, n=TOP_KEYWORDS):
+        """
+        Top n terms of two or more characters of a document by TF-IDF against
+        the corpus (smoothed IDF, L2-normalized over the top n), highest first.
+        """
+        terms = [term for term in term_counts if len(term) > 1]
+        if not terms:
+            return {}
+        tf = np.fromiter((term_counts[term] for term in terms), dtype=np.float64, count=len(terms))
+        df = self.document_frequencies([self.bucket(term) for term in terms])
+        idf = np.log((1 + self.n_documents) / (1 + df)) + 1
+        scores = tf * idf
+        top = np.argsort(-scores, kind='stable')[:n]
+        norm = math.sqrt(float(np.sum(scores[top] ** 2))) or 1.0
+        return {terms[i]: float(scores[i] / norm) for i in top}
+
+    def disk_bytes(self):
+        return sum(path.stat().st_size for path in (self.path, self.journal_path) if path.exists())
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_keyword_index():
+    """Process-wide keyword index in the default location"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = KeywordIndex()
+        return _index
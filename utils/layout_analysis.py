@@ -0,0 +1,225 @@
+import logging
+import os
+import threading
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from utils.instrumentation import stage
+from utils.ocr_backends import mean_confidence, to_grayscale_array
+from utils.text_processing import OPENCV_AVAILABLE, estimate_x_height
+
+if OPENCV_AVAILABLE:
+    import cv2
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# tesseract mode for a single block of text
+BLOCK_PSM = 6
+# White border added around each block; tesseract misses glyphs touching the edge
+BLOCK_PADDING = 10
+# Character height assumed when it cannot be measured
+FALLBACK_X_HEIGHT = 12
+
+# Fraction of dark pixels above which a region is a photo or filled shape
+MAX_TEXT_INK_RATIO = 0.45
+
+# Threads recognizing the blocks of a page (1: one block after another).
+# OCR worker processes always use 1, pages are their unit of parallelism.
+BLOCK_THREADS = int(os.environ.get('PDF_CONVERTER_BLOCK_THREADS', 0)) or os.cpu_count() or 1
+
+class TextBlock:
+    """Bounding box of a text region on a page, in pixels"""
+
+    __slots__ = ('x', 'y', 'width', 'height')
+
+    def __init__(self, x, y, width, height):
+        self.x, self.y, self.width, self.height = x, y, width, height
+
+    @property
+    def right(self):
+        return self.x + self.width
+
+    @property
+    def bottom(self):
+        return self.y + self.height
+
+    def __repr__(self):
+        return f"TextBlock(x={self.x}, y={self.y}, width={self.width}, height={self.height})"
+
+def is_rtl_text(text):
+    """True when most letters of text belong to right-to-left scripts (Arabic, Hebrew, ...)"""
+    letters = [c for c in text if c.isalpha()]
+    rtl = sum(1 for c in letters if unicodedata.bidirectional(c) in ('R', 'AL'))
+    return rtl * 2 > len(letters)
+
+def ink_mask(page):
+    """Mask (255) of the dark pixels of a grayscale page, using Otsu's threshold"""
+    _, ink = cv2.threshold(page, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    return ink
+
+def is_text_region(ink, x_height):
+    """Text regions are sparse ink made of glyph-sized components"""
+    if ink.size == 0:
+        return False
+    ink_ratio = np.count_nonzero(ink) / ink.size
+    if ink_ratio > MAX_TEXT_INK_RATIO or ink_ratio < 0.01:
+        return False
+    count, _, stats, _ = cv2.connectedComponentsWithStats(ink, connectivity=8)
+    heights = stats[1:, cv2.CC_STAT_HEIGHT]
+    areas = stats[1:, cv2.CC_STAT_AREA]
+    glyphs = (heights >= x_height * 0.3) & (heights <= x_height * 4)
+    if np.count_nonzero(glyphs) < 2:
+        return False
+    # Figures and photos put their ink in few large components or a sea of
+    # specks; scan noise adds many specks to text too, but little ink
+    return areas[glyphs].sum() >= areas.sum() * 0.5
+
+def find_text_blocks(page, x_height=None):
+    """
+    Segment a page into text blocks.
+
+    Ink is dilated with a kernel scaled to the character height, so the
+    letters of a paragraph merge while wider gaps (column gutters, space
+    around figures) stay open; the outer contours of the result are the
+    candidate blocks. Blocks that do not look like text are dropped.
+    Without OpenCV the whole page is returned as one block.
+    """
+    page = to_grayscale_array(page)
+    height, width = page.shape
+    if not OPENCV_AVAILABLE:
+        return [TextBlock(0, 0, width, height)]
+
+    ink = ink_mask(page)
+    x_height = x_height or estimate_x_height(page) or FALLBACK_X_HEIGHT
+    kernel = cv2.getStructuringElement(
+        cv2.MORPH_RECT,
+        (max(3, int(x_height * 1.5)), max(3, int(x_height * 2)))
+    )
+    merged = cv2.dilate(ink, kernel)
+    contours, _ = cv2.findContours(merged, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    blocks = []
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        if h < x_height * 0.5 or w * h < x_height * x_height * 2:
+            continue
+        if is_text_region(ink[y:y + h, x:x + w], x_height):
+            blocks.append(TextBlock(x, y, w, h))
+    return blocks
+
+def _split_by_gaps(blocks, horizontal):
+    """Group blocks separated by empty bands along one axis"""
+    start = (lambda b: b.x) if horizontal else (lambda b: b.y)
+    end = (lambda b: b.right) if horizontal else (lambda b: b.bottom)
+    groups = []
+    group_end = None
+    for block in sorted(blocks, key=start):
+        if group_end is None or start(block) > group_end:
+            groups.append([block])
+            group_end = end(block)
+        else:
+            groups[-1].append(block)
+            group_end = max(group_end, end(block))
+    return groups
+
+def reading_order(blocks, rtl=False):
+    """
+    Order blocks for reading with a recursive XY-cut: columns first (right
+    to left for RTL scripts), then top to bottom inside each column.
+    """
+    if len(blocks) <= 1:
+        return list(blocks)
+
+    columns = _split_by_gaps(blocks, horizontal=True)
+    if len(columns) > 1:
+        if rtl:
+            columns.reverse()
+        return [b for column in columns for b in reading_order(column, rtl)]
+
+    rows = _split_by_gaps(blocks, horizontal=False)
+    if len(rows) > 1:
+        # Consecutive rows of several columns (paragraphs level across the
+        # columns) form one band, so each column is read through
+        bands = []
+        for row in rows:
+            columned = len(_split_by_gaps(row, horizontal=True)) > 1
+            if columned and bands and bands[-1][0]:
+                bands[-1][1].extend(row)
+            else:
+                bands.append((columned, list(row)))
+        groups = [band for _, band in bands] if len(bands) > 1 else rows
+        return [b for group in groups for b in reading_order(group, rtl)]
+
+    # Overlapping blocks that cannot be cut: top to bottom, then by direction
+    return sorted(blocks, key=lambda b: (b.y, -b.right if rtl else b.x))
+
+def crop_block(page, block, padding=BLOCK_PADDING):
+    """Block image with a white border"""
+    region = np.asarray(page)[block.y:block.bottom, block.x:block.right]
+    return np.pad(region, padding, mode='constant', constant_values=255)
+
+_block_threads = BLOCK_THREADS
+_block_executor = None
+_block_executor_lock = threading.Lock()
+
+def set_block_threads(count):
+    """Resize the block pool of this process (1 recognizes blocks sequentially)"""
+    global _block_threads, _block_executor
+    with _block_executor_lock:
+        _block_threads = max(1, count)
+        if _block_executor is not None:
+            _block_executor.shutdown(wait=False)
+            _block_executor = None
+
+def get_block_executor():
+    """Threads shared by all pages for OCR of blocks, None when blocks run sequentially"""
+    global _block_executor
+    with _block_executor_lock:
+        if _block_threads <= 1:
+            return None
+        if _block_executor is None:
+            _block_executor = ThreadPoolExecutor(max_workers=_block_threads,
+                                                 thread_name_prefix='ocr-block')
+        return _block_executor
+
+def ocr_text_blocks(page, languages, backend, rtl=None, parallel=True):
+    """
+    OCR only the text blocks of a preprocessed page, in reading order.
+
+    Margins, figures and photos are never sent to tesseract, and a page
+    without text blocks costs no OCR call at all. Blocks of one page are
+    recognized in parallel threads (tesseract runs outside the GIL), see
+    set_block_threads. Columns are read right to left when most recognized
+    letters are RTL, unless rtl is given.
+    Returns (text, confidence), the confidence weighted by block text length.
+    """
+    page = to_grayscale_array(page)
+    with stage('layout'):
+        blocks = find_text_blocks(page)
+    if not blocks:
+        return "", None
+
+    def recognize(block):
+        text, confidence = backend.recognize(crop_block(page, block), languages, psm=BLOCK_PSM)
+        return text.strip(), confidence
+
+    # Timed here: the block threads do not see the page's timing context
+    with stage('tesseract'):
+        executor = get_block_executor() if parallel and len(blocks) > 1 else None
+        if executor is not None:
+            results = list(executor.map(recognize, blocks))
+        else:
+            results = [recognize(block) for block in blocks]
+
+    # The direction comes from the script actually on the page, not from
+    # the order of the requested languages
+    if rtl is None:
+        rtl = is_rtl_text(' '.join(text for text, _ in results))
+    by_block = dict(zip(blocks, results))
+    with stage('layout'):
+        results = [by_block[block] for block in reading_order(blocks, rtl)]
+    return '\n\n'.join(text for text, _ in results if text), mean_confidence(results)
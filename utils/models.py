@@ -0,0 +1,119 @@
+"""
+Result models shared by the extraction paths, the UI and the services.
+
+Pages are kept as separate objects from extraction to display, so the
+document text with its page markers is only built when it is actually
+needed (export, download) and is never split back into pages.
+"""
+
+PAGE_MARKER = "--- Page {} ---"
+
+class PageResult:
+    """
+    Result of one converted page.
+
+    page_num is 0-based; source is 'ocr' or 'text_layer'. dpi is the render
+    resolution of OCR pages, image_path the saved preview (if any),
+    stage_timings the milliseconds per pipeline stage and confidence the
+    mean word confidence (0-100) when the OCR engine reports one.
+    """
+
+    __slots__ = ('page_num', 'text', 'languages', 'source', 'dpi', 'image_path',
+                 'stage_timings', 'confidence')
+
+    def __init__(self, page_num, text, languages=None, source='ocr', dpi=None, image_path=None,
+                 stage_timings=None, confidence=None):
+        self.page_num = page_num
+        self.text = text
+        self.languages = languages or []
+        self.source = source
+        self.dpi = dpi
+        self.image_path = image_path
+        self.stage_timings = stage_timings or {}
+        self.confidence = confidence
+
+    @property
+    def number(self):
+        """1-based page number, as shown to users"""
+        return self.page_num + 1
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{name: data[name] for name in cls.__slots__ if name in data})
+
+    def __repr__(self):
+        return (f"PageResult(page_num={self.page_num}, source={self.source!r}, "
+                f"languages={self.languages!r}, chars={len(self.text)})")
+
+class DocumentResult:
+    """
+    Pages of one conversion, in page order.
+
+    total_pages is the page count of the PDF, which may be larger than the
+    number of converted pages when a page range was given.
+    """
+
+    __slots__ = ('name', 'total_pages', 'pages')
+
+    def __init__(self, name=None, total_pages=None, pages=None):
+        self.name = name
+        self.pages = list(pages or [])
+        self.total_pages = total_pages if total_pages is not None else len(self.pages)
+
+    def add(self, page):
+        self.pages.append(page)
+
+    def __iter__(self):
+        return iter(self.pages)
+
+    def __len__(self):
+        return len(self.pages)
+
+    def __getitem__(self, index):
+        return self.pages[index]
+
+    @property
+    def page_nums(self):
+        return [page.page_num for page in self.pages]
+
+    @property
+    def page_languages(self):
+        """{page_num: languages}"""
+        return {page.page_num: page.languages for page in self.pages}
+
+    @property
+    def languages(self):
+        """All languages found in the document, sorted"""
+        return sorted({lang for page in self.pages for lang in page.languages})
+
+    def page(self, page_num):
+        """The result of a 0-based PDF page number, or None if it was not converted"""
+        for page in self.pages:
+            if page.page_num == page_num:
+                return page
+        return None
+
+    def to_text(self, markers=True):
+        """The document text, each page preceded by a '--- Page N ---' line"""
+        if not markers:
+            return '\n\n'.join(page.text for page in self.pages).strip()
+        return '\n'.join(
+            f"{PAGE_MARKER.format(page.number)}\n{page.text}" for page in self.pages
+        ).strip()
+
+    @property
+    def text(self):
+        return self.to_text()
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'total_pages': self.total_pages,
+            'pages': [page.to_dict() for page in self.pages]
+        }
+
+    def __repr__(self):
+        return f"DocumentResult(name={self.name!r}, pages={len(self.pages)}/{self.total_pages})"
@@ -0,0 +1,199 @@
+import logging
+import os
+import queue
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+import pytesseract
+from PIL import Image
+
+from utils.instrumentation import stage
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+try:
+    import tesserocr
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    TESSEROCR_AVAILABLE = False
+
+# tesseract page segmentation mode used for whole pages (a single uniform block)
+DEFAULT_PSM = 6
+# LSTM engine with legacy fallback, as '--oem 3'
+DEFAULT_OEM = 3
+
+# 'auto' (tesserocr when installed), 'tesserocr' or 'cli'
+OCR_BACKEND = os.environ.get('PDF_CONVERTER_OCR_BACKEND', 'auto')
+
+def to_grayscale_array(image):
+    """Contiguous uint8 H x W array of a PIL image or ndarray"""
+    if isinstance(image, Image.Image):
+        image = image.convert('L')
+    array = np.asarray(image)
+    if array.ndim == 3:
+        array = np.asarray(Image.fromarray(array).convert('L'))
+    if array.dtype != np.uint8:
+        array = array.astype(np.uint8)
+    return np.ascontiguousarray(array)
+
+def mean_confidence(results):
+    """Mean confidence of (text, confidence) pairs, weighted by text length"""
+    weighted = [(len(text), confidence) for text, confidence in results
+                if confidence is not None and text.strip()]
+    total = sum(length for length, _ in weighted)
+    if not total:
+        return None
+    return sum(length * confidence for length, confidence in weighted) / total
+
+def tsv_mean_confidence(tsv):
+    """Mean confidence of the words in tesseract TSV output, None without words"""
+    lines = tsv.splitlines()
+    if not lines:
+        return None
+    columns = lines[0].split('\t')
+    conf_column, text_column = columns.index('conf'), columns.index('text')
+    confidences = []
+    for line in lines[1:]:
+        fields = line.split('\t')
+        if len(fields) <= text_column or not fields[text_column].strip():
+            continue
+        conf = float(fields[conf_column])
+        if conf >= 0:
+            confidences.append(conf)
+    return sum(confidences) / len(confidences) if confidences else None
+
+class OCRBackend:
+    """Interface of the OCR engines: image in, text out"""
+
+    name = None
+
+    def image_to_string(self, image, languages, psm=DEFAULT_PSM):
+        raise NotImplementedError
+
+    def recognize(self, image, languages, psm=DEFAULT_PSM):
+        """(text, mean word confidence 0-100), the confidence None if unknown"""
+        return self.image_to_string(image, languages, psm), None
+
+    def close(self):
+        pass
+
+class TesseractCLIBackend(OCRBackend):
+    """
+    pytesseract: one tesseract process per call, which writes the image to a
+    temporary file and loads the traineddata of the languages every time.
+    """
+
+    name = 'cli'
+
+    def image_to_string(self, image, languages, psm=DEFAULT_PSM):
+        return pytesseract.image_to_string(
+            image,
+            lang='+'.join(languages),
+            config=f'--oem {DEFAULT_OEM} --psm {psm}'
+        )
+
+    def recognize(self, image, languages, psm=DEFAULT_PSM):
+        # One tesseract run writes both the plain text (the same output as
+        # image_to_string) and the TSV with the word confidences
+        with pytesseract.pytesseract.save(image) as (temp_name, input_filename):
+            pytesseract.pytesseract.run_tesseract(
+                input_filename,
+                temp_name,
+                'txt',
+                '+'.join(languages),
+                config=f'--oem {DEFAULT_OEM} --psm {psm} -c tessedit_create_tsv=1'
+            )
+            with open(f"{temp_name}.txt", encoding='utf-8') as f:
+                text = f.read()
+            with open(f"{temp_name}.tsv", encoding='utf-8') as f:
+                confidence = tsv_mean_confidence(f.read())
+        return text, confidence
+
+class TesserocrBackend(OCRBackend):
+    """
+    Long-lived tesseract engines through the C API (tesserocr).
+
+    Engines are pooled per language set, so the traineddata is loaded once
+    per process and reused across pages and documents; images are passed as
+    raw pixel buffers without temporary files. At most max_engines engines
+    exist per language set, and a thread waits for a free engine beyond that.
+    """
+
+    name = 'tesserocr'
+
+    def __init__(self, max_engines=None):
+        self.max_engines = max_engines or os.cpu_count() or 1
+        self._pools = {}
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def engine(self, lang_string):
+        """Borrow an engine initialized for lang_string"""
+        create = False
+        with self._lock:
+            pool = self._pools.setdefault(lang_string, queue.LifoQueue())
+            try:
+                api = pool.get_nowait()
+            except queue.Empty:
+                api = None
+                create = self._counts.get(lang_string, 0) < self.max_engines
+                if create:
+                    self._counts[lang_string] = self._counts.get(lang_string, 0) + 1
+        if create:
+            try:
+                with stage('ocr_engine_init'):
+                    api = tesserocr.PyTessBaseAPI(lang=lang_string, oem=DEFAULT_OEM)
+            except Exception:
+                with self._lock:
+                    self._counts[lang_string] -= 1
+                raise
+            logger.info(f"Started tesseract engine for '{lang_string}'")
+        elif api is None:
+            api = pool.get()
+        try:
+            yield api
+        finally:
+            pool.put(api)
+
+    def image_to_string(self, image, languages, psm=DEFAULT_PSM):
+        return self.recognize(image, languages, psm)[0]
+
+    def recognize(self, image, languages, psm=DEFAULT_PSM):
+        array = to_grayscale_array(image)
+        height, width = array.shape
+        with self.engine('+'.join(languages)) as api:
+            api.SetPageSegMode(psm)
+            api.SetImageBytes(array.tobytes(), width, height, 1, width)
+            text = api.GetUTF8Text()
+            # Reuses the recognition done by GetUTF8Text
+            confidence = api.MeanTextConf() if text.strip() else None
+            api.Clear()
+        return text, confidence
+
+    def close(self):
+        with self._lock:
+            for pool in self._pools.values():
+                while not pool.empty():
+                    pool.get().End()
+            self._pools.clear()
+            self._counts.clear()
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def get_ocr_backend():
+    """Process-wide OCR backend, chosen by PDF_CONVERTER_OCR_BACKEND"""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            if OCR_BACKEND in ('auto', 'tesserocr') and TESSEROCR_AVAILABLE:
+                _backend = TesserocrBackend()
+            else:
+                if OCR_BACKEND == 'tesserocr':
+                    logger.warning("tesserocr is not installed, using the tesseract command line")
+                _backend = TesseractCLIBackend()
+        return _backend
@@ -0,0 +1,179 @@
+import glob
+import io
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Page previews are downscaled and lossy-compressed instead of full-size PNGs
+PREVIEW_WIDTH = 800
+PREVIEW_FORMAT = 'JPEG'  # or 'WEBP'
+PREVIEW_QUALITY = 75
+
+PREVIEW_EXTENSIONS = {'JPEG': 'jpg', 'WEBP': 'webp', 'PNG': 'png'}
+
+def encode_preview(image, width=PREVIEW_WIDTH, fmt=PREVIEW_FORMAT, quality=PREVIEW_QUALITY):
+    """Downscale a page image (PIL or ndarray) to width and return it compressed as bytes"""
+    if isinstance(image, np.ndarray):
+        image = Image.fromarray(np.asarray(image))
+    if width and image.width > width:
+        image = image.resize((width, max(1, round(image.height * width / image.width))),
+                             Image.Resampling.LANCZOS)
+    if image.mode not in ('L', 'RGB'):
+        image = image.convert('RGB')
+    buffer = io.BytesIO()
+    if fmt == 'PNG':
+        image.save(buffer, fmt, optimize=True)
+    else:
+        image.save(buffer, fmt, quality=quality)
+    return buffer.getvalue()
+
+class PageStore:
+    """
+    Interface of the page image stores.
+
+    put() keeps a preview of a page image and returns where it can be found
+    (or None); get() returns the preview bytes or None if the page was never
+    stored. Stores are chosen per use: nothing (the default, previews are
+    rendered on demand), memory or disk.
+    """
+
+    def put(self, pdf_path, page_num, image):
+        return None
+
+    def get(self, pdf_path, page_num):
+        return None
+
+    def clear(self, pdf_path):
+        pass
+
+    def flush(self):
+        """Wait until all pending writes are done"""
+        pass
+
+class MemoryPageStore(PageStore):
+    """Compressed previews in an LRU dict limited to max_bytes"""
+
+    def __init__(self, max_bytes=32 * 1024 * 1024, width=PREVIEW_WIDTH, fmt=PREVIEW_FORMAT):
+        self.max_bytes = max_bytes
+        self.width = width
+        self.fmt = fmt
+        self.size = 0
+        self._previews = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, pdf_path, page_num, image):
+        self.put_bytes(pdf_path, page_num, encode_preview(image, self.width, self.fmt))
+        return None
+
+    def put_bytes(self, pdf_path, page_num, data):
+        key = (str(pdf_path), page_num)
+        with self._lock:
+            previous = self._previews.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._previews[key] = data
+            self.size += len(data)
+            # Always keep the newest preview
+            while self.size > self.max_bytes and len(self._previews) > 1:
+                _, evicted = self._previews.popitem(last=False)
+                self.size -= len(evicted)
+
+    def get(self, pdf_path, page_num):
+        key = (str(pdf_path), page_num)
+        with self._lock:
+            data = self._previews.get(key)
+            if data is not None:
+                self._previews.move_to_end(key)
+            return data
+
+    def clear(self, pdf_path):
+        with self._lock:
+            for key in [k for k in self._previews if k[0] == str(pdf_path)]:
+                self.size -= len(self._previews.pop(key))
+
+class DiskPageStore(PageStore):
+    """
+    Previews written next to the PDF as {pdf_path}_page_N.<ext>.
+
+    Encoding and writing run on a background thread, so eager persistence
+    does not block the OCR loop; put() returns the path the file will have.
+    """
+
+    def __init__(self, width=PREVIEW_WIDTH, fmt=PREVIEW_FORMAT, background=True):
+        self.width = width
+        self.fmt = fmt
+        self.extension = PREVIEW_EXTENSIONS[fmt]
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='page-store') if background else None
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def path_for(self, pdf_path, page_num):
+        return f"{pdf_path}_page_{page_num + 1}.{self.extension}"
+
+    def put(self, pdf_path, page_num, image):
+        path = self.path_for(pdf_path, page_num)
+        if self._executor is None:
+            self._write(path, image)
+            return path
+        future = self._executor.submit(self._write, path, image)
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._done)
+        return path
+
+    def _done(self, future):
+        with self._lock:
+            self._pending.discard(future)
+
+    def _write(self, path, image):
+        try:
+            data = encode_preview(image, self.width, self.fmt)
+            # Write to a temporary name so readers never see a partial file
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.error(f"Error saving page image {path}: {str(e)}")
+
+    def get(self, pdf_path, page_num):
+        path = self.path_for(pdf_path, page_num)
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def clear(self, pdf_path):
+        self.flush()
+        for path in glob.glob(f"{glob.escape(str(pdf_path))}_page_*.*"):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def flush(self):
+        with self._lock:
+            pending = list(self._pending)
+        for future in pending:
+            future.result()
+
+_page_store = None
+_page_store_lock = threading.Lock()
+
+def get_page_store():
+    """Process-wide disk store used when page images are persisted eagerly"""
+    global _page_store
+    with _page_store_lock:
+        if _page_store is None:
+            _page_store = DiskPageStore()
+        return _page_store
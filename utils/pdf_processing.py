@@ -1,22 +1,64 @@
 import logging
 import pytesseract
 from PIL import Image
-from pdf2image import convert_from_path
+import numpy as np
+from pdf2image import convert_from_path, pdfinfo_from_path
 from PyPDF2 import PdfReader
+from concurrent.futures import ProcessPoolExecutor
+import math
 import os
 
+from utils.instrumentation import DocumentProfile, StageTimings, collect_timings, stage
+from utils.layout_analysis import ocr_text_blocks, set_block_threads
+from utils.models import DocumentResult, PageResult
+from utils.ocr_backends import get_ocr_backend, DEFAULT_PSM
+from utils.page_store import get_page_store
+from utils.result_cache import file_sha256
 from utils.text_processing import (
     detect_languages,
-    enhance_image,
+    detect_languages_batch,
     correct_text,
     preprocess_image_for_ocr,
-    convert_to_tesseract_langs
+    convert_to_tesseract_langs,
+    estimate_x_height,
+    OCR_PIPELINE
 )
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Maximum number of rendered page images kept in memory at once
+RENDER_CHUNK_SIZE = 4
+
+# Default number of OCR worker processes
+DEFAULT_OCR_WORKERS = os.cpu_count() or 1
+
+# Languages used for the first OCR pass when languages are auto-detected
+PROBE_LANGUAGES = ['eng', 'ara']
+
+# Width of the downscaled copy used for tesseract script detection (OSD)
+PROBE_WIDTH = 1000
+
+# Adaptive rendering: a low resolution probe measures the text size and the
+# page is rendered at the lowest DPI giving tesseract this x-height (pixels)
+DEFAULT_RENDER_DPI = 200  # pdf2image default
+SIZE_PROBE_DPI = 100
+TARGET_X_HEIGHT = 20
+MIN_RENDER_DPI = 100
+MAX_RENDER_DPI = 400
+DPI_STEP = 25
+
+# Page classes used by the hybrid (text layer first) extraction
+PAGE_TEXT = 'text'      # usable text layer, no OCR needed
+PAGE_IMAGE = 'image'    # no text layer, OCR required
+PAGE_MIXED = 'mixed'    # sparse or garbled text layer over images, OCR required
+
+# Pages with images need at least this many text layer characters to skip OCR
+MIN_TEXT_LAYER_CHARS = 50
+# Fraction of text layer characters that must be letters, digits or whitespace
+MIN_TEXT_LAYER_QUALITY = 0.7
+
 def parse_page_range(page_range, total_pages=None):
     """Parse page range string into list of page numbers"""
     if not page_range:
@@ -40,37 +82,211 @@ def parse_page_range(page_range, total_pages=None):
     
     return sorted(pages_to_process)
 
-def extract_text_from_image(image, languages):
+def get_page_count(pdf_path):
+    """Return the number of pages without rasterizing the document"""
+    try:
+        return int(pdfinfo_from_path(pdf_path)['Pages'])
+    except Exception as e:
+        logger.warning(f"pdfinfo failed, falling back to PyPDF2: {str(e)}")
+        return len(PdfReader(pdf_path).pages)
+
+def group_page_runs(pages):
+    """Merge 0-based page numbers into contiguous (first, last) runs"""
+    runs = []
+    for page in sorted(set(pages)):
+        if runs and page == runs[-1][1] + 1:
+            runs[-1][1] = page
+        else:
+            runs.append([page, page])
+    return [tuple(run) for run in runs]
+
+def render_pages(pdf_path, pages, max_images=RENDER_CHUNK_SIZE, **render_options):
+    """
+    Rasterize only the requested pages, yielding (page_num, image) in page order.
+
+    Contiguous pages are rendered with first_page/last_page windows of at most
+    max_images pages, so the cost scales with the number of selected pages and
+    no more than max_images page images are alive at any time.
+    """
+    max_images = max(1, max_images or 1)
+    for first, last in group_page_runs(pages):
+        for start in range(first, last + 1, max_images):
+            end = min(last, start + max_images - 1)
+            images = convert_from_path(
+                pdf_path,
+                first_page=start + 1,
+                last_page=end + 1,
+                **render_options
+            )
+            page_num = start
+            # Release each image as soon as it has been handed to the consumer
+            while images:
+                yield page_num, images.pop(0)
+                page_num += 1
+
+def choose_render_dpi(x_height, probe_dpi=SIZE_PROBE_DPI, target=TARGET_X_HEIGHT):
+    """Lowest DPI (in DPI_STEP steps) at which text measured at probe_dpi reaches target"""
+    if not x_height:
+        return DEFAULT_RENDER_DPI
+    dpi = math.ceil(probe_dpi * target / x_height / DPI_STEP) * DPI_STEP
+    return max(MIN_RENDER_DPI, min(MAX_RENDER_DPI, dpi))
+
+def render_page_adaptive(pdf_path, page_num, target=TARGET_X_HEIGHT):
+    """
+    Render one page at a resolution chosen from its text size.
+
+    Returns (image, dpi). Large print is rendered at a low DPI, small print
+    at a higher one; when the probe resolution is enough it is reused.
+    """
+    with stage('dpi_probe'):
+        probe = next(render_pages(pdf_path, [page_num], max_images=1,
+                                  dpi=SIZE_PROBE_DPI, grayscale=True), None)
+        if probe is None:
+            raise ValueError(f"Page {page_num + 1} could not be rendered")
+        probe = probe[1]
+        dpi = choose_render_dpi(estimate_x_height(probe), target=target)
+    if dpi == SIZE_PROBE_DPI:
+        return probe, dpi
+    del probe
+    
+    with stage('render'):
+        _, image = next(render_pages(pdf_path, [page_num], max_images=1, dpi=dpi, grayscale=True))
+    return image, dpi
+
+def extract_text_from_image(image, languages, pipeline=None, backend=None, layout=False):
     """
     استخراج النص من الصورة باستخدام OCR
+
+    backend defaults to the process-wide engine (see utils.ocr_backends).
+    With layout=True only the text blocks found by layout analysis are
+    OCRed, in reading order (see utils.layout_analysis).
     """
+    return recognize_image(image, languages, pipeline, backend, layout)[0]
+
+def recognize_image(image, languages, pipeline=None, backend=None, layout=False):
+    """Like extract_text_from_image, returning (text, mean word confidence or None)"""
     try:
-        # تحسين جودة الصورة
-        preprocessed_image = preprocess_image_for_ocr(image)
+        # تحسين جودة الصورة (المراحل المطبقة مسبقاً لا تتكرر)
+        preprocessed_image = preprocess_image_for_ocr(image, pipeline)
         
         # تحويل قائمة اللغات إلى تنسيق tesseract
         lang_codes = convert_to_tesseract_langs(languages)
-        lang_string = '+'.join(lang_codes)
-        
-        # إعداد خيارات tesseract
-        custom_config = r'--oem 3 --psm 6'
         
         # تنفيذ OCR
-        text = pytesseract.image_to_string(
-            preprocessed_image, 
-            lang=lang_string,
-            config=custom_config
-        )
+        backend = backend or get_ocr_backend()
+        if layout:
+            text, confidence = ocr_text_blocks(preprocessed_image, lang_codes, backend)
+        else:
+            with stage('tesseract'):
+                text, confidence = backend.recognize(
+                    preprocessed_image,
+                    lang_codes,
+                    psm=DEFAULT_PSM
+                )
         
-        return text.strip()
+        return text.strip(), confidence
     except Exception as e:
         logger.error(f"Error in OCR processing: {str(e)}")
-        return ""
+        return "", None
+
+def detect_script(image):
+    """Detect the dominant script of a page with tesseract OSD on a downscaled copy"""
+    try:
+        probe = Image.fromarray(image) if isinstance(image, np.ndarray) else image
+        if probe.width > PROBE_WIDTH:
+            probe = probe.resize((PROBE_WIDTH, int(probe.height * PROBE_WIDTH / probe.width)))
+        osd = pytesseract.image_to_osd(probe, output_type=pytesseract.Output.DICT)
+        return osd.get('script')
+    except Exception as e:
+        # OSD fails on pages with too little text or without osd.traineddata
+        logger.debug(f"Script detection failed: {str(e)}")
+        return None
+
+class LanguageProbe:
+    """
+    Per-document language detection for OCR.
+
+    Pages are keyed by the script tesseract OSD reports. The first page of a
+    script gets a full OCR pass with PROBE_LANGUAGES to detect its languages,
+    and later pages of the same script reuse that result without a probe pass.
+    Pages OSD cannot classify (too little text, no osd.traineddata) share one
+    entry, so they are probed once per document as well.
+    """
+    
+    def __init__(self, probe_langs=None):
+        self.probe_langs = list(probe_langs or PROBE_LANGUAGES)
+        self.script_languages = {}
+    
+    def detect(self, image, layout=False, pipeline=None):
+        """
+        Return (languages, probe) for a preprocessed page image.
+
+        probe is the (text, confidence) of the probe pass when it can be
+        reused as the page result (the detected languages match the probe
+        languages), otherwise None. The probe pass uses layout analysis when
+        layout=True, and pipeline must be the one the page was preprocessed
+        with (the default OCR_PIPELINE would add stages it left out).
+        """
+        script = detect_script(image)
+        if script in self.script_languages:
+            return self.script_languages[script], None
+        
+        probe = recognize_image(image, self.probe_langs, pipeline, layout=layout)
+        langs = detect_languages(probe[0])
+        self.script_languages[script] = langs
+        
+        if set(langs) == set(self.probe_langs):
+            return langs, probe
+        return langs, None
+
+def page_has_images(page):
+    """Check whether a PyPDF2 page draws any image XObjects"""
+    try:
+        resources = page.get('/Resources')
+        xobjects = resources.get_object().get('/XObject') if resources else None
+        if not xobjects:
+            return False
+        return any(
+            xobject.get_object().get('/Subtype') == '/Image'
+            for xobject in xobjects.get_object().values()
+        )
+    except Exception as e:
+        logger.debug(f"Could not inspect page resources: {str(e)}")
+        return True
+
+def classify_page(page, page_text=None):
+    """
+    Classify a PyPDF2 page as PAGE_TEXT, PAGE_IMAGE or PAGE_MIXED.
+
+    The heuristic only looks at the extracted text layer and the page's image
+    resources, so it is far cheaper than rendering the page.
+    """
+    if page_text is None:
+        page_text = page.extract_text() or ""
+    
+    content = page_text.strip()
+    if not content:
+        return PAGE_IMAGE
+    
+    # Garbled text layers (e.g. fonts without a Unicode mapping) need OCR
+    clean = sum(1 for c in content if c.isalnum() or c.isspace())
+    if clean / len(content) < MIN_TEXT_LAYER_QUALITY:
+        return PAGE_MIXED
+    
+    # Short but genuine text (e.g. a title page) is only suspicious next to images
+    if len(content) >= MIN_TEXT_LAYER_CHARS or not page_has_images(page):
+        return PAGE_TEXT
+    return PAGE_MIXED
 
 def extract_text_from_pdf(pdf_path, page_range=None, detect_lang=True, manual_langs=None):
-    """Extract text from PDF using PyPDF2"""
+    """
+    Extract text from PDF using PyPDF2, falling back to OCR per page.
+
+    Only pages whose text layer is missing or unusable (see classify_page)
+    are rendered and OCRed, so born-digital PDFs never reach tesseract.
+    Returns a DocumentResult.
+    """
     try:
-        text = ""
         pdf_reader = PdfReader(pdf_path)
         total_pages = len(pdf_reader.pages)
         
@@ -79,147 +295,446 @@ def extract_text_from_pdf(pdf_path, page_range=None, detect_lang=True, manual_la
         
         # Dictionary to store detected languages for each page
         page_languages = {}
+        page_texts = {}
+        page_confidences = {}
+        ocr_pages = []
         
         for page_num in pages_to_process:
             page = pdf_reader.pages[page_num]
-            page_text = page.extract_text()
+            page_text = page.extract_text() or ""
             
-            if detect_lang:
-                # Detect languages in the page text
-                langs = detect_languages(page_text)
-                page_languages[page_num] = langs
-            elif manual_langs:
-                page_languages[page_num] = manual_langs
+            if classify_page(page, page_text) == PAGE_TEXT:
+                page_texts[page_num] = page_text
+            else:
+                ocr_pages.append(page_num)
+        
+        # Perform OCR only on pages that do not have a usable text layer
+        ocr_langs = (manual_langs if not detect_lang and manual_langs else PROBE_LANGUAGES)
+        for page_num, image in render_pages(pdf_path, ocr_pages):
+            page_texts[page_num], page_confidences[page_num] = recognize_image(image, ocr_langs)
+        
+        if detect_lang:
+            # Detect the languages of all pages in one batch
+            detected = detect_languages_batch([page_texts[p] for p in pages_to_process])
+            page_languages.update(zip(pages_to_process, detected))
+        elif manual_langs:
+            page_languages.update((p, manual_langs) for p in pages_to_process)
+        
+        document = DocumentResult(os.path.basename(pdf_path), total_pages)
+        ocr_set = set(ocr_pages)
+        for page_num in pages_to_process:
+            page_text = page_texts[page_num]
             
             # Apply language-specific processing
             if page_num in page_languages:
                 page_text = correct_text(page_text, page_languages[page_num])
             
-            text += f"\n--- Page {page_num + 1} ---\n"
-            text += page_text + "\n"
-        
-        # Perform OCR on pages that do not have extractable text
-        images = convert_from_path(pdf_path)
-        for page_num in pages_to_process:
-            if not page_text.strip():
-                image = images[page_num]
-                page_text = extract_text_from_image(image, page_languages.get(page_num, ['eng']))
-                text += f"\n--- Page {page_num + 1} ---\n"
-                text += page_text + "\n"
+            document.add(PageResult(
+                page_num,
+                page_text,
+                page_languages.get(page_num),
+                source='ocr' if page_num in ocr_set else 'text_layer',
+                dpi=DEFAULT_RENDER_DPI if page_num in ocr_set else None,
+                confidence=page_confidences.get(page_num)
+            ))
         
-        return text.strip(), total_pages, page_languages
+        logger.info(f"Text layer used for {len(pages_to_process) - len(ocr_pages)} pages, "
+                    f"OCR for {len(ocr_pages)} pages")
+        return document
     except Exception as e:
         logger.error(f"Error extracting text from PDF: {str(e)}")
         raise
 
-def perform_ocr(pdf_path, page_range=None, detect_lang=True, manual_langs=None, enhance_images=False):
-    """Perform OCR on PDF pages"""
+def perform_ocr(pdf_path, page_range=None, detect_lang=True, manual_langs=None, enhance_images=False,
+                pipeline=None, cache=None, adaptive_dpi=False, layout=False):
+    """
+    Perform OCR on PDF pages.
+
+    Returns (DocumentResult, processed_images). Every page goes through the
+    preprocessing pipeline exactly once, so enhance_images no longer
+    triggers a second enhancement pass; it is kept for compatibility. Pages
+    found in the optional ResultCache are not rendered again, so they are
+    missing from the returned images.
+
+    With adaptive_dpi=True every page is rendered at a resolution chosen from
+    its text size (see render_page_adaptive) instead of a fixed 1700 px width.
+    With layout=True only the text blocks of each page are OCRed.
+    """
     try:
-        # تحويل PDF إلى صور
-        images = convert_from_path(
-            pdf_path,
-            fmt='ppm',
-            grayscale=True,
-            size=(1700, None)  # تحسين الدقة
-        )
-        
         # تحديد الصفحات المطلوبة
-        pages_to_process = parse_page_range(page_range, len(images))
+        total_pages = get_page_count(pdf_path)
+        pages_to_process = parse_page_range(page_range, total_pages)
         
         # معالجة كل صفحة
-        text = ""
+        pipeline = pipeline or OCR_PIPELINE
+        page_results = {}
         processed_images = []
+        language_probe = LanguageProbe() if detect_lang else None
         
-        for page_num in pages_to_process:
-            if page_num >= len(images):
-                continue
-                
-            image = images[page_num]
-            
-            # تحسين جودة الصورة إذا تم تفعيل الخيار
-            if enhance_images:
-                image = enhance_image(image)
-            
-            # تجهيز الصورة لـ OCR
-            image = preprocess_image_for_ocr(image)
+        # الصفحات المحفوظة مسبقاً في الذاكرة المؤقتة
+        keys = {}
+        if cache is not None:
+            file_hash = file_sha256(pdf_path)
+            settings = pipeline_settings(pipeline, mode='perform_ocr', adaptive_dpi=adaptive_dpi,
+                                         layout=layout)
+            for page_num in pages_to_process:
+                keys[page_num] = cache.make_key(
+                    file_hash, page_num, None if detect_lang else (manual_langs or ['eng']), settings
+                )
+                cached = cache.get(keys[page_num])
+                if cached is not None:
+                    page_results[page_num] = PageResult(page_num, cached['text'], cached['languages'],
+                                                        dpi=cached.get('dpi'),
+                                                        confidence=cached.get('confidence'))
+        
+        # تحويل الصفحات المطلوبة فقط إلى صور
+        pending_pages = [p for p in pages_to_process if p not in page_results]
+        if adaptive_dpi:
+            rendered = ((p, *render_page_adaptive(pdf_path, p)) for p in pending_pages)
+        else:
+            rendered = (
+                (p, image, None) for p, image in render_pages(
+                    pdf_path,
+                    pending_pages,
+                    fmt='ppm',
+                    grayscale=True,
+                    size=(1700, None)  # تحسين الدقة
+                )
+            )
+        for page_num, image, dpi in rendered:
+            # تجهيز الصورة لـ OCR (كل مرحلة تطبق مرة واحدة فقط)
+            image = preprocess_image_for_ocr(image, pipeline)
             processed_images.append(image)
             
-            # تحديد اللغات
+            # تحديد اللغات (مع إعادة استخدام نتيجة المرور الأول إن أمكن)
+            probe = None
             if detect_lang:
-                # استخراج عينة من النص للكشف عن اللغة
-                sample_langs = pytesseract.image_to_string(image, lang='eng+ara')
-                langs = detect_languages(sample_langs)
+                langs, probe = language_probe.detect(image, layout, pipeline)
             else:
                 langs = manual_langs or ['eng']
             
             # استخراج النص
-            page_text = extract_text_from_image(image, langs)
+            page_text, confidence = probe or recognize_image(image, langs, pipeline, layout=layout)
             
             # تصحيح النص
             page_text = correct_text(page_text, langs)
+            page_results[page_num] = PageResult(page_num, page_text, langs, dpi=dpi, confidence=confidence)
             
-            text += f"\n--- Page {page_num + 1} ---\n{page_text}\n"
+            if cache is not None:
+                cache.put(keys[page_num], {'text': page_text, 'languages': langs, 'dpi': dpi,
+                                           'confidence': confidence})
         
-        return text.strip(), processed_images
+        logger.info(f"Preprocessing stage timings: {pipeline.stage_timings()}")
+        document = DocumentResult(os.path.basename(pdf_path), total_pages,
+                                  [page_results[p] for p in pages_to_process])
+        return document, processed_images
         
     except Exception as e:
         logger.error(f"Error performing OCR: {str(e)}")
         raise
 
-def convert_pdf_to_images_and_text(pdf_path, page_range=None, languages=None):
+def resolve_pages(pdf_path, page_range=None):
+    """Return (total_pages, pages_to_process) for a page range string"""
+    # عدد الصفحات دون تحويل المستند بالكامل إلى صور
+    total_pages = get_page_count(pdf_path)
+    
+    # تحويل نطاق الصفحات إلى قائمة
+    pages_to_process = parse_page_range(page_range, total_pages)
+    
+    # تحديد الصفحات للمعالجة
+    if not pages_to_process:
+        pages_to_process = list(range(total_pages))
+    else:
+        pages_to_process = [p for p in pages_to_process if p < total_pages]
+    
+    return total_pages, pages_to_process
+
+def ocr_page_image(pdf_path, page_num, image, languages, correct=False, save_images=False,
+                   pipeline=None, detect_lang=True, timings=None, dpi=DEFAULT_RENDER_DPI, layout=False):
     """
-    تحويل PDF إلى صور ثم إلى نص باستخدام OCR
+    Preprocess and OCR a single rendered page, returning its PageResult
+    (dpi is the resolution the page was rendered at). With layout=True only
+    the text blocks of the page are OCRed.
+
+    Stage timings are added to timings (a StageTimings, e.g. already holding
+    the render time of the page) and returned as 'stage_timings'. With
+    save_images=True a preview of the enhanced page is written by the page
+    store in the background; otherwise viewers render previews on demand.
     """
-    try:
-        # تحويل PDF إلى صور
-        images = convert_from_path(pdf_path)
-        total_pages = len(images)
+    with collect_timings(timings) as timings:
+        # تحسين جودة الصورة
+        pipeline = pipeline or OCR_PIPELINE
+        enhanced_image = preprocess_image_for_ocr(image, pipeline)
         
-        # تحويل نطاق الصفحات إلى قائمة
-        pages_to_process = parse_page_range(page_range, total_pages)
+        page_text, confidence = recognize_image(enhanced_image, languages, pipeline, layout=layout)
         
-        # تحديد الصفحات للمعالجة
-        if not pages_to_process:
-            pages_to_process = list(range(total_pages))
-        else:
-            pages_to_process = [p for p in pages_to_process if p < total_pages]
+        # Try to detect languages from extracted text
+        page_langs = languages
+        if detect_lang:
+            try:
+                page_langs = detect_languages(page_text)
+            except Exception as e:
+                logger.warning(f"Could not detect languages for page {page_num + 1}: {str(e)}")
         
-        text = ""
-        page_languages = {}
+        if correct:
+            page_text = correct_text(page_text, page_langs)
         
-        # معالجة كل صفحة
-        for page_num in pages_to_process:
-            image = images[page_num]
-            
-            # تحسين جودة الصورة
-            enhanced_image = preprocess_image_for_ocr(image)
-            
-            # استخراج النص من الصورة
+        # حفظ الصورة (في الخلفية)
+        image_path = None
+        if save_images:
+            with stage('save_image'):
+                image_path = get_page_store().put(pdf_path, page_num, enhanced_image)
+    
+    return PageResult(
+        page_num,
+        page_text,
+        page_langs,
+        source='ocr',
+        dpi=dpi,
+        image_path=image_path,
+        stage_timings=timings.to_dict(),
+        confidence=confidence
+    )
+
+def init_ocr_worker():
+    """
+    Limit tesseract to one OpenMP thread and one block thread per worker to
+    avoid oversubscription: the pool's processes are the only parallelism.
+    """
+    os.environ['OMP_THREAD_LIMIT'] = '1'
+    set_block_threads(1)
+
+def ocr_pdf_page(pdf_path, page_num, languages, correct=False, save_images=False,
+                 pipeline=None, detect_lang=True, adaptive_dpi=False, layout=False):
+    """Render and OCR one page; picklable entry point for worker processes"""
+    timings = StageTimings()
+    if adaptive_dpi:
+        with collect_timings(timings):
+            image, dpi = render_page_adaptive(pdf_path, page_num)
+    else:
+        with collect_timings(timings), stage('render'):
+            rendered = next(render_pages(pdf_path, [page_num], max_images=1), None)
+        if rendered is None:
+            raise ValueError(f"Page {page_num + 1} could not be rendered")
+        image, dpi = rendered[1], DEFAULT_RENDER_DPI
+    result = ocr_page_image(pdf_path, page_num, image, languages, correct, save_images,
+                            pipeline, detect_lang, timings, dpi, layout)
+    if save_images:
+        # Worker processes may exit before a background write finishes
+        get_page_store().flush()
+    return result
+
+def _ocr_page_task(task):
+    """Unpack a task tuple for executor.map"""
+    return ocr_pdf_page(*task)
+
+def _run_ocr_pages(pdf_path, pages, languages, correct, save_images, max_images, workers, pipeline,
+                   detect_lang, adaptive_dpi=False, layout=False):
+    """Render and OCR pages in order, sequentially or in a process pool"""
+    workers = min(workers or DEFAULT_OCR_WORKERS, len(pages))
+    if workers > 1:
+        tasks = [
+            (pdf_path, page_num, languages, correct, save_images, pipeline, detect_lang, adaptive_dpi, layout)
+            for page_num in pages
+        ]
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_ocr_worker) as executor:
+            yield from executor.map(_ocr_page_task, tasks)
+        return
+    
+    if adaptive_dpi:
+        # Every page is rendered on its own at its own resolution
+        for page_num in pages:
+            yield ocr_pdf_page(pdf_path, page_num, languages, correct, save_images,
+                               pipeline, detect_lang, adaptive_dpi=True, layout=layout)
+        return
+    
+    rendered = render_pages(pdf_path, pages, max_images=max_images)
+    while True:
+        # A chunk of max_images pages is rendered at once; its render time is
+        # attributed to the first page of the chunk
+        timings = StageTimings()
+        with collect_timings(timings), stage('render'):
+            item = next(rendered, None)
+        if item is None:
+            return
+        page_num, image = item
+        yield ocr_page_image(pdf_path, page_num, image, languages, correct, save_images,
+                             pipeline, detect_lang, timings, layout=layout)
+        del image, item
+
+def pipeline_settings(pipeline=None, **extra):
+    """Preprocessing settings that affect OCR output, used in cache keys"""
+    settings = (pipeline or OCR_PIPELINE).settings()
+    settings.update(extra)
+    return settings
+
+def iter_ocr_pages(pdf_path, pages_to_process, languages=None, correct=False,
+                   save_images=False, max_images=RENDER_CHUNK_SIZE, workers=1,
+                   pipeline=None, cache=None, detect_lang=True, adaptive_dpi=False, layout=False):
+    """
+    Streaming OCR pipeline (render -> preprocess -> OCR -> correct).
+
+    Yields one PageResult per page, in page order, with the stage timings
+    (milliseconds per pipeline stage) of the page. At most max_images
+    rendered pages are held in memory, so peak memory does not grow with
+    the length of the document.
+
+    With workers > 1 the pages are rendered and OCRed in a process pool
+    (None means one worker per core); results are still yielded in page order.
+
+    When a ResultCache is given, pages already converted with the same file
+    content and settings are served from it without rendering or OCR.
+
+    With detect_lang=False the page 'languages' are the OCR languages, for
+    callers that detect languages for the whole document in one batch.
+
+    With adaptive_dpi=True each page is rendered at the lowest resolution that
+    makes its text legible to tesseract; the dpi of the results is the
+    resolution used. With layout=True only the text blocks of each page are
+    OCRed, in reading order.
+    """
+    # استخراج النص من الصورة
+    if languages:
+        current_langs = languages
+    else:
+        # Use default languages for OCR
+        current_langs = ['eng', 'ara']  # Default to English and Arabic
+    
+    if cache is None:
+        yield from _run_ocr_pages(pdf_path, pages_to_process, current_langs, correct,
+                                  save_images, max_images, workers, pipeline, detect_lang, adaptive_dpi, layout)
+        return
+    
+    file_hash = file_sha256(pdf_path)
+    settings = pipeline_settings(pipeline, mode='convert', correct=correct, detect_lang=detect_lang,
+                                 adaptive_dpi=adaptive_dpi, layout=layout)
+    keys = {
+        page_num: cache.make_key(file_hash, page_num, languages, settings)
+        for page_num in pages_to_process
+    }
+    missing = [page_num for page_num in pages_to_process if not cache.has(keys[page_num])]
+    missing_set = set(missing)
+    computed = _run_ocr_pages(pdf_path, missing, current_langs, correct,
+                              save_images, max_images, workers, pipeline, detect_lang, adaptive_dpi, layout)
+    
+    for page_num in pages_to_process:
+        key = keys[page_num]
+        cached = None if page_num in missing_set else cache.get(key)
+        if cached is not None:
+            image_path = get_page_store().path_for(pdf_path, page_num)
+            yield PageResult(
+                page_num,
+                cached['text'],
+                cached['languages'],
+                source='ocr',
+                dpi=cached.get('dpi'),
+                image_path=image_path if os.path.exists(image_path) else None,
+                confidence=cached.get('confidence')
+            )
+            continue
+        
+        if page_num in missing_set:
+            result = next(computed)
+        else:
+            # The entry was evicted after the lookup above
+            result = next(_run_ocr_pages(pdf_path, [page_num], current_langs, correct,
+                                         save_images, max_images, 1, pipeline, detect_lang, adaptive_dpi,
+                                         layout))
+        cache.put(key, {'text': result.text, 'languages': result.languages, 'dpi': result.dpi,
+                        'confidence': result.confidence})
+        yield result
+
+def iter_hybrid_pages(pdf_path, pages_to_process, languages=None, correct=False, ocr=True,
+                      detect_lang=True, **ocr_options):
+    """
+    Text layer first extraction: yields PageResults like iter_ocr_pages.
+
+    Pages classified as PAGE_TEXT are taken from the PDF text layer; only the
+    remaining pages are passed to iter_ocr_pages (with ocr_options). The
+    source of each result is 'text_layer' or 'ocr'. With ocr=False the text
+    layer is used for every page.
+    """
+    reader = PdfReader(pdf_path)
+    text_layer = {}
+    text_layer_timings = {}
+    ocr_pages = []
+    for page_num in pages_to_process:
+        timings = StageTimings()
+        with collect_timings(timings), stage('text_layer'):
+            page = reader.pages[page_num]
+            page_text = page.extract_text() or ""
+            is_text_page = not ocr or classify_page(page, page_text) == PAGE_TEXT
+        if is_text_page:
+            text_layer[page_num] = page_text
+            text_layer_timings[page_num] = timings
+        else:
+            ocr_pages.append(page_num)
+    del reader
+    
+    logger.info(f"Hybrid extraction: {len(text_layer)} text layer pages, {len(ocr_pages)} OCR pages")
+    ocr_results = iter_ocr_pages(pdf_path, ocr_pages, languages=languages, correct=correct,
+                                 detect_lang=detect_lang, **ocr_options)
+    
+    for page_num in pages_to_process:
+        if page_num not in text_layer:
+            yield next(ocr_results)
+            continue
+        
+        page_text = text_layer.pop(page_num)
+        with collect_timings(text_layer_timings.pop(page_num)) as timings:
             if languages:
-                current_langs = languages
+                page_langs = languages
+            elif detect_lang:
+                page_langs = detect_languages(page_text)
             else:
-                # Use default languages for OCR
-                current_langs = ['eng', 'ara']  # Default to English and Arabic
-            
-            page_text = extract_text_from_image(enhanced_image, current_langs)
-            
-            # Try to detect languages from extracted text
-            try:
-                detected_langs = detect_languages(page_text)
-                page_languages[page_num] = detected_langs
-            except Exception as e:
-                logger.warning(f"Could not detect languages for page {page_num + 1}: {str(e)}")
-                page_languages[page_num] = current_langs
-            
-            # إضافة النص مع رقم الصفحة
-            text += f"\n--- Page {page_num + 1} ---\n"
-            text += page_text + "\n"
-            
-            # حفظ الصورة
-            image_path = f"{pdf_path}_page_{page_num + 1}.png"
-            enhanced_image.save(image_path, "PNG")
+                page_langs = PROBE_LANGUAGES
+            if correct:
+                page_text = correct_text(page_text, page_langs)
+        yield PageResult(
+            page_num,
+            page_text,
+            page_langs,
+            source='text_layer',
+            stage_timings=timings.to_dict()
+        )
+
+def convert_pdf_to_images_and_text(pdf_path, page_range=None, languages=None, workers=1, cache=None,
+                                   text_layer_first=False, save_images=False, profile=None, adaptive_dpi=False,
+                                   pipeline=None, layout=False):
+    """
+    تحويل PDF إلى صور ثم إلى نص باستخدام OCR
+
+    With text_layer_first=True only pages without a usable text layer are OCRed;
+    with adaptive_dpi=True OCR pages are rendered at a DPI chosen per page;
+    with layout=True only the text blocks of OCR pages are recognized.
+    Per-page stage timings are collected into profile (a DocumentProfile,
+    created if not given) and logged when the conversion finishes.
+    Returns a DocumentResult.
+    """
+    try:
+        total_pages, pages_to_process = resolve_pages(pdf_path, page_range)
+        if profile is None:
+            profile = DocumentProfile(os.path.basename(pdf_path))
+        
+        document = DocumentResult(os.path.basename(pdf_path), total_pages)
+        
+        # معالجة كل صفحة (يتم تحويل الصفحات المطلوبة فقط إلى صور)
+        page_iter = iter_hybrid_pages if text_layer_first else iter_ocr_pages
+        for result in page_iter(pdf_path, pages_to_process, languages=languages,
+                                workers=workers, cache=cache, detect_lang=False,
+                                save_images=save_images, adaptive_dpi=adaptive_dpi,
+                                pipeline=pipeline, layout=layout):
+            document.add(result)
+            profile.add_page(result.page_num, result.stage_timings)
+        
+        # كشف لغات جميع الصفحات دفعة واحدة
+        with profile.stage('detect_languages'):
+            detected = detect_languages_batch([page.text for page in document])
+            for page, langs in zip(document, detected):
+                page.languages = langs
         
-        return text.strip(), total_pages, page_languages, pages_to_process
+        profile.finish()
+        return document
     except Exception as e:
         logger.error(f"Error converting PDF to images and text: {str(e)}")
         raise
@@ -0,0 +1,143 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+
+import pytesseract
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Default location and size limit of the on-disk result cache
+DEFAULT_CACHE_DIR = Path(tempfile.gettempdir()) / "pdf_converter" / "cache"
+DEFAULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """Hash a file in chunks without loading it into memory"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+@lru_cache(maxsize=1)
+def tesseract_version():
+    """Installed tesseract version, part of every cache key"""
+    try:
+        return str(pytesseract.get_tesseract_version())
+    except Exception as e:
+        logger.warning(f"Could not determine tesseract version: {str(e)}")
+        return 'unknown'
+
+class ResultCache:
+    """
+    Content-addressed on-disk cache of per-page conversion results.
+
+    Entries are small JSON files named by the SHA-256 of their key (file hash,
+    page index, languages, preprocessing settings, tesseract version). Reads
+    refresh an entry's mtime, and the least recently used entries are evicted
+    once the cache grows beyond max_bytes.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_CACHE_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        # Running estimate of the cache size, so puts do not rescan the directory
+        self._size = None
+
+    def make_key(self, file_hash, page_num, languages, settings=None):
+        """Build the cache key for one page of a document"""
+        key = {
+            'file': file_hash,
+            'page': page_num,
+            'languages': sorted(languages) if languages else 'auto',
+            'settings': settings or {},
+            'tesseract': tesseract_version()
+        }
+        return hashlib.sha256(json.dumps(key, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return self.cache_dir / f"{key}.json"
+
+    def has(self, key):
+        return self._path(key).exists()
+
+    def get(self, key):
+        """Return the cached result for key, or None"""
+        path = self._path(key)
+        try:
+            with open(path, encoding='utf-8') as f:
+                value = json.load(f)
+            # Mark as recently used
+            os.utime(path)
+            return value
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Discarding unreadable cache entry {path.name}: {str(e)}")
+            self._remove(path)
+            return None
+
+    def put(self, key, value):
+        """Store a JSON-serializable result and evict old entries if needed"""
+        path = self._path(key)
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(value, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Could not write cache entry: {str(e)}")
+            return
+
+        if self._size is None:
+            self.evict()
+        else:
+            self._size += path.stat().st_size
+            if self._size > self.max_bytes:
+                self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits max_bytes"""
+        entries = []
+        total = 0
+        for path in self.cache_dir.glob('*.json'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        if total > self.max_bytes:
+            for _, size, path in sorted(entries):
+                self._remove(path)
+                total -= size
+                if total <= self.max_bytes:
+                    break
+        self._size = total
+
+    def clear(self):
+        for path in self.cache_dir.glob('*.json'):
+            self._remove(path)
+        self._size = 0
+
+    def _remove(self, path):
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+_default_cache = None
+
+def get_result_cache():
+    """Process-wide cache in the application's temp directory"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ResultCache()
+    return _default_cache
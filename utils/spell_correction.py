@@ -0,0 +1,190 @@
+import logging
+import os
+import re
+from functools import lru_cache
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Tokens that are never spell-corrected
+URL_PATTERN = re.compile(r'(://|^www\.|@|\.(com|org|net|io|gov|edu)\b)', re.IGNORECASE)
+WORD_PATTERN = re.compile(r"^([^\w']*)([A-Za-z]+)([^\w']*)$")
+# Words up to this length take only one-edit corrections: two edits turn
+# them into unrelated words (COVID -> COULD)
+SHORT_WORD_LENGTH = 5
+
+def default_dictionary_path():
+    """Word frequency list shipped with TextBlob (used by TextBlob.correct)"""
+    import textblob
+    return os.path.join(os.path.dirname(textblob.__file__), 'en', 'en-spelling.txt')
+
+def edit_distance(a, b, max_distance):
+    """
+    Optimal string alignment (Damerau-Levenshtein) distance between a and b.
+
+    Returns max_distance + 1 as soon as the distance is known to exceed it.
+    """
+    if a == b:
+        return 0
+    len_a, len_b = len(a), len(b)
+    if abs(len_a - len_b) > max_distance:
+        return max_distance + 1
+
+    before_previous = None
+    previous = list(range(len_b + 1))
+    for i in range(1, len_a + 1):
+        current = [i] + [0] * len_b
+        char_a = a[i - 1]
+        row_min = i
+        for j in range(1, len_b + 1):
+            cost = 0 if char_a == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            # Transposition of two adjacent characters
+            if i > 1 and j > 1 and char_a == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, before_previous[j - 2] + 1)
+            current[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > max_distance:
+            return max_distance + 1
+        before_previous, previous = previous, current
+
+    return previous[len_b] if previous[len_b] <= max_distance else max_distance + 1
+
+def match_case(source, word):
+    """Apply the capitalization pattern of source to word"""
+    if source.isupper() and len(source) > 1:
+        return word.upper()
+    if source[0].isupper():
+        return word[:1].upper() + word[1:]
+    return word
+
+class SpellCorrector:
+    """
+    Symmetric delete (SymSpell-style) spelling corrector.
+
+    The dictionary is indexed by every string reachable by deleting up to
+    max_edit_distance characters from each word's prefix, so looking a word
+    up only generates deletes of the input instead of all possible edits.
+    Corrections are memoized per token.
+    """
+
+    def __init__(self, max_edit_distance=2, prefix_length=7, cache_size=100000):
+        self.max_edit_distance = max_edit_distance
+        self.prefix_length = prefix_length
+        self.words = {}
+        self.deletes = {}
+        self.max_word_length = 0
+        self.correct_word = lru_cache(maxsize=cache_size)(self._correct_word)
+
+    def load_dictionary(self, path):
+        """Load a 'word count' frequency list, skipping ';;;' comments"""
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.startswith(';;;'):
+                    continue
+                parts = line.split()
+                if len(parts) == 2 and parts[1].isdigit():
+                    self.add_word(parts[0].lower(), int(parts[1]))
+        logger.info(f"Spelling dictionary loaded: {len(self.words)} words, {len(self.deletes)} delete keys")
+        return self
+
+    def add_word(self, word, count):
+        if word in self.words:
+            self.words[word] += count
+            return
+        self.words[word] = count
+        self.max_word_length = max(self.max_word_length, len(word))
+
+        prefix = word[:self.prefix_length]
+        for key in self._generate_deletes(prefix):
+            self.deletes.setdefault(key, []).append(word)
+
+    def _generate_deletes(self, word):
+        deletes = {word}
+        frontier = [word]
+        for _ in range(self.max_edit_distance):
+            next_frontier = []
+            for item in frontier:
+                for i in range(len(item)):
+                    candidate = item[:i] + item[i + 1:]
+                    if candidate not in deletes:
+                        deletes.add(candidate)
+                        next_frontier.append(candidate)
+            frontier = next_frontier
+        return deletes
+
+    def lookup(self, word, max_distance=None):
+        """Return the closest, most frequent dictionary word, or None"""
+        if word in self.words:
+            return word
+
+        if max_distance is None or max_distance > self.max_edit_distance:
+            max_distance = self.max_edit_distance
+        word_length = len(word)
+        if word_length - max_distance > self.max_word_length:
+            return None
+
+        best, best_distance, best_count = None, max_distance, 0
+        prefix = word[:self.prefix_length]
+        candidates = [prefix]
+        seen = {prefix}
+        index = 0
+        while index < len(candidates):
+            candidate = candidates[index]
+            index += 1
+            deleted = len(prefix) - len(candidate)
+            if deleted > best_distance:
+                break
+
+            for suggestion in self.deletes.get(candidate, ()):
+                if abs(len(suggestion) - word_length) > best_distance:
+                    continue
+                distance = edit_distance(word, suggestion, best_distance)
+                if distance > best_distance:
+                    continue
+                count = self.words[suggestion]
+                if best is None or distance < best_distance or count > best_count:
+                    best, best_distance, best_count = suggestion, distance, count
+
+            if deleted < max_distance:
+                for i in range(len(candidate)):
+                    shorter = candidate[:i] + candidate[i + 1:]
+                    if shorter not in seen:
+                        seen.add(shorter)
+                        candidates.append(shorter)
+
+        return best
+
+    def _correct_word(self, token):
+        """Correct one whitespace-delimited token, keeping punctuation and case"""
+        # Bypass URLs, e-mail addresses, numbers, contractions and
+        # non-Latin or mixed-script tokens
+        if URL_PATTERN.search(token):
+            return token
+        match = WORD_PATTERN.match(token)
+        if not match:
+            return token
+
+        leading, core, trailing = match.groups()
+        # Single letters, short acronyms and camel-case names are left alone
+        if len(core) < 2 or (core.isupper() and len(core) <= 4):
+            return token
+        if not core.isupper() and not core[1:].islower():
+            return token
+
+        max_distance = 1 if len(core) <= SHORT_WORD_LENGTH else None
+        suggestion = self.lookup(core.lower(), max_distance)
+        if suggestion is None or suggestion == core.lower():
+            return token
+        return leading + match_case(core, suggestion) + trailing
+
+    def correct(self, text):
+        """Correct every token of text, preserving the original whitespace"""
+        return re.sub(r'\S+', lambda m: self.correct_word(m.group(0)), text)
+
+@lru_cache(maxsize=1)
+def get_spell_corrector():
+    """Build the English corrector once per process"""
+    return SpellCorrector().load_dictionary(default_dictionary_path())
@@ -0,0 +1,325 @@
+import logging
+import os
+import re
+import shutil
+import threading
+
+import numpy as np
+from PyPDF2 import PdfReader
+
+from utils.instrumentation import StageTimings, collect_timings, stage
+from utils.ocr_backends import get_ocr_backend
+from utils.pdf_processing import page_has_images, render_pages
+from utils.text_processing import OPENCV_AVAILABLE
+
+if OPENCV_AVAILABLE:
+    import cv2
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+try:
+    import tabula
+    TABULA_AVAILABLE = True
+except ImportError:
+    TABULA_AVAILABLE = False
+
+try:
+    import jpype  # noqa: F401
+    JPYPE_AVAILABLE = True
+except ImportError:
+    JPYPE_AVAILABLE = False
+
+# 'auto' (tabula when Java is installed, otherwise native), 'tabula' (lattice
+# mode), 'tabula-stream' (borderless tables) or 'native'
+TABLE_BACKEND = os.environ.get('PDF_CONVERTER_TABLE_BACKEND', 'auto')
+
+# Stroked line segments and rectangles a page needs to be a table candidate
+MIN_RULING_SEGMENTS = 4
+# Resolution pages are rendered at for ruling line detection
+TABLE_RENDER_DPI = 150
+# Shortest ruling line, as a fraction of the page width / height
+MIN_LINE_FRACTION = 1 / 40
+
+# String literals are removed so words like "l" in text are not counted
+PDF_STRING_RE = re.compile(rb'\((?:\\.|[^\\)])*\)')
+RULING_OPERATOR_RE = re.compile(rb'(?<![^\s\]>)])(?:re|l)(?=\s|$)')
+
+def count_ruling_segments(page):
+    """Number of line-to and rectangle operators in a PyPDF2 page's content stream"""
+    try:
+        contents = page.get_contents()
+        if contents is None:
+            return 0
+        data = PDF_STRING_RE.sub(b'', contents.get_data())
+        return len(RULING_OPERATOR_RE.findall(data))
+    except Exception as e:
+        logger.debug(f"Could not read page contents: {str(e)}")
+        return 0
+
+def is_scanned_page(page):
+    """A page with images and no text layer, whose ruling lines are only pixels"""
+    return not (page.extract_text() or "").strip() and page_has_images(page)
+
+def find_table_pages(pdf_path, pages=None, reader=None, include_scanned=False):
+    """
+    Pages that draw enough vector lines to hold a ruled table.
+
+    Only the content streams are scanned, nothing is rendered. Scanned
+    pages have no vector lines; with include_scanned=True they are
+    candidates too, for backends that find the lines in the rendered page.
+    """
+    reader = reader or PdfReader(pdf_path)
+    pages = range(len(reader.pages)) if pages is None else pages
+    with stage('tables.precheck'):
+        return [
+            p for p in pages
+            if count_ruling_segments(reader.pages[p]) >= MIN_RULING_SEGMENTS
+            or (include_scanned and is_scanned_page(reader.pages[p]))
+        ]
+
+def rows_to_dataframe(rows):
+    """Table rows as a DataFrame with the first row as header, like tabula"""
+    import pandas as pd
+    if len(rows) > 1:
+        return pd.DataFrame(rows[1:], columns=rows[0])
+    return pd.DataFrame(rows)
+
+class TableBackend:
+    """Interface of the table extractors: pages in, (page_num, DataFrame) pairs out"""
+
+    name = None
+    # Only finds tables with ruling lines, so the pre-check applies
+    ruled_only = True
+    # Finds tables on scanned pages (image only)
+    reads_scans = False
+
+    def extract_page(self, pdf_path, page_num):
+        raise NotImplementedError
+
+    def extract(self, pdf_path, pages):
+        tables = []
+        for page_num in pages:
+            tables.extend((page_num, table) for table in self.extract_page(pdf_path, page_num))
+        return tables
+
+class TabulaBackend(TableBackend):
+    """
+    tabula-py, in lattice mode (ruled tables) or with lattice=False in stream
+    mode, which also finds borderless tables from the text positions but
+    needs every page.
+
+    With jpype installed the JVM is started once per process and reused for
+    every call (force_subprocess=False), so pages are read one at a time;
+    otherwise every call starts java, and all pages go in a single call
+    (their tables then have no page number).
+    """
+
+    name = 'tabula'
+
+    def __init__(self, lattice=True):
+        self.lattice = lattice
+        self.name = 'tabula' if lattice else 'tabula-stream'
+        self.ruled_only = lattice
+        self.in_process = JPYPE_AVAILABLE
+
+    def _read(self, pdf_path, pages):
+        with stage('tables.tabula'):
+            return tabula.read_pdf(
+                pdf_path,
+                pages=pages,
+                lattice=self.lattice,
+                stream=not self.lattice,
+                multiple_tables=True,
+                silent=True,
+                force_subprocess=not self.in_process
+            )
+
+    def extract_page(self, pdf_path, page_num):
+        return self._read(pdf_path, page_num + 1)
+
+    def extract(self, pdf_path, pages):
+        if self.in_process or len(pages) <= 1:
+            return super().extract(pdf_path, pages)
+        if not pages:
+            return []
+        return [(None, table) for table in self._read(pdf_path, [p + 1 for p in pages])]
+
+def _line_positions(profile, threshold):
+    """Centers of the runs of profile values above threshold"""
+    positions = []
+    run_start = None
+    for i, above in enumerate(np.append(profile > threshold, False)):
+        if above and run_start is None:
+            run_start = i
+        elif not above and run_start is not None:
+            positions.append((run_start + i - 1) // 2)
+            run_start = None
+    return positions
+
+def detect_table_grids(page):
+    """
+    Find ruled tables in a grayscale page image.
+
+    Horizontal and vertical ruling lines are isolated with morphological
+    openings; every connected line structure with at least two horizontal
+    and two vertical lines is a table. Returns a list of (row_lines,
+    column_lines) in pixels, both sorted.
+    """
+    height, width = page.shape
+    _, ink = cv2.threshold(page, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    horizontal = cv2.morphologyEx(ink, cv2.MORPH_OPEN, cv2.getStructuringElement(
+        cv2.MORPH_RECT, (max(10, int(width * MIN_LINE_FRACTION)), 1)))
+    vertical = cv2.morphologyEx(ink, cv2.MORPH_OPEN, cv2.getStructuringElement(
+        cv2.MORPH_RECT, (1, max(10, int(height * MIN_LINE_FRACTION)))))
+    lines = cv2.dilate(cv2.bitwise_or(horizontal, vertical), np.ones((3, 3), np.uint8))
+    contours, _ = cv2.findContours(lines, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    grids = []
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        rows = _line_positions((horizontal[y:y + h, x:x + w] > 0).sum(axis=1), w * 0.5)
+        columns = _line_positions((vertical[y:y + h, x:x + w] > 0).sum(axis=0), h * 0.5)
+        if len(rows) >= 2 and len(columns) >= 2:
+            grids.append(([y + r for r in rows], [x + c for c in columns]))
+    grids.sort(key=lambda grid: (grid[0][0], grid[1][0]))
+    return grids
+
+def text_fragments(page, dpi):
+    """(x, y, text) of the text shown on a PyPDF2 page, in pixels at dpi"""
+    scale = dpi / 72
+    left, top = float(page.mediabox.left), float(page.mediabox.top)
+    fragments = []
+
+    def visitor(text, cm, tm, font_dict, font_size):
+        if not text.strip():
+            return
+        x = tm[4] * cm[0] + tm[5] * cm[2] + cm[4]
+        y = tm[4] * cm[1] + tm[5] * cm[3] + cm[5]
+        # Middle of the glyphs rather than the baseline
+        y += (font_size or 0) * abs(tm[3] * cm[3] or 1) * 0.3
+        fragments.append(((x - left) * scale, (top - y) * scale, text.strip()))
+
+    page.extract_text(visitor_text=visitor)
+    return fragments
+
+def _cell_index(lines, position):
+    """Index of the cell between two consecutive lines containing position"""
+    for i in range(len(lines) - 1):
+        if lines[i] <= position < lines[i + 1]:
+            return i
+    return None
+
+class NativeTableBackend(TableBackend):
+    """
+    Ruling line detection with OpenCV, no Java.
+
+    The page is rendered and its ruled grids detected (see
+    detect_table_grids); cell texts come from the PDF text layer, or from
+    OCR of the cells when the page has none (scanned pages).
+    """
+
+    name = 'native'
+    reads_scans = True
+
+    def __init__(self, dpi=TABLE_RENDER_DPI, ocr_languages=None):
+        self.dpi = dpi
+        self.ocr_languages = ocr_languages or ['eng']
+        self._readers = {}
+        self._lock = threading.Lock()
+
+    def _page(self, pdf_path, page_num):
+        with self._lock:
+            if pdf_path not in self._readers:
+                self._readers = {pdf_path: PdfReader(pdf_path)}
+            return self._readers[pdf_path].pages[page_num]
+
+    def extract_page(self, pdf_path, page_num):
+        if not OPENCV_AVAILABLE:
+            logger.warning("OpenCV is not installed, native table extraction is unavailable")
+            return []
+        with stage('render'):
+            rendered = next(render_pages(pdf_path, [page_num], max_images=1, dpi=self.dpi, grayscale=True), None)
+        if rendered is None:
+            return []
+        image = np.asarray(rendered[1].convert('L'))
+        with stage('tables.detect'):
+            grids = detect_table_grids(image)
+        if not grids:
+            return []
+
+        with stage('tables.cells'):
+            fragments = text_fragments(self._page(pdf_path, page_num), self.dpi)
+            tables = []
+            for rows, columns in grids:
+                cells = [[[] for _ in range(len(columns) - 1)] for _ in range(len(rows) - 1)]
+                for x, y, text in fragments:
+                    i, j = _cell_index(rows, y), _cell_index(columns, x + 1)
+                    if i is not None and j is not None:
+                        cells[i][j].append(text)
+                table = [[' '.join(cell) for cell in row] for row in cells]
+                if not fragments:
+                    table = self._ocr_cells(image, rows, columns)
+                tables.append(rows_to_dataframe(table))
+        return tables
+
+    def _ocr_cells(self, image, rows, columns):
+        """Cell texts of a scanned table"""
+        backend = get_ocr_backend()
+        table = []
+        for top, bottom in zip(rows, rows[1:]):
+            row = []
+            for left, right in zip(columns, columns[1:]):
+                # Stay clear of the ruling lines
+                cell = image[top + 3:bottom - 2, left + 3:right - 2]
+                text = backend.image_to_string(cell, self.ocr_languages, psm=7) if cell.size else ""
+                row.append(' '.join(text.split()))
+            table.append(row)
+        return table
+
+def java_available():
+    return shutil.which('java') is not None
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+def get_table_backend(name=None):
+    """Process-wide table backend; name defaults to PDF_CONVERTER_TABLE_BACKEND"""
+    name = name or TABLE_BACKEND
+    if name == 'auto':
+        name = 'tabula' if TABULA_AVAILABLE and java_available() else 'native'
+    if name in ('tabula', 'tabula-stream') and not TABULA_AVAILABLE:
+        logger.warning("tabula-py is not installed, using the native table extractor")
+        name = 'native'
+    with _backends_lock:
+        if name not in _backends:
+            if name == 'tabula':
+                _backends[name] = TabulaBackend()
+            elif name == 'tabula-stream':
+                _backends[name] = TabulaBackend(lattice=False)
+            else:
+                _backends[name] = NativeTableBackend()
+        return _backends[name]
+
+def extract_tables(pdf_path, pages=None, backend=None, precheck=True):
+    """
+    Extract the tables of a PDF.
+
+    With precheck=True backends that only find ruled tables get the pages
+    drawing ruling lines (see find_table_pages), plus the scanned pages
+    when they read scans; tabula's stream mode always gets every page.
+    Returns (tables, timings): a list of (page_num, DataFrame) pairs and
+    the milliseconds per stage.
+    """
+    backend = backend or get_table_backend()
+    timings = StageTimings()
+    with collect_timings(timings):
+        reader = PdfReader(pdf_path)
+        if precheck and backend.ruled_only:
+            pages = find_table_pages(pdf_path, pages, reader, include_scanned=backend.reads_scans)
+        elif pages is None:
+            pages = list(range(len(reader.pages)))
+        tables = backend.extract(pdf_path, pages)
+    logger.info(f"{len(tables)} tables on {len(pages)} candidate pages with {backend.name}: {timings.to_dict()}")
+    return tables, timings.to_dict()
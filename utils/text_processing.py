@@ -1,15 +1,23 @@
 import logging
+import time
+import unicodedata
+from collections import defaultdict, Counter
+from functools import lru_cache
 from pathlib import Path
 import pytesseract
 from PIL import Image, ImageEnhance
 from pdf2image import convert_from_path
 from PyPDF2 import PdfReader
-from textblob import TextBlob
 import arabic_reshaper
 from bidi.algorithm import get_display
-from langdetect import detect, DetectorFactory
+from langdetect import DetectorFactory
+from langdetect.detector_factory import PROFILES_DIRECTORY
+from langdetect.lang_detect_exception import LangDetectException
 import numpy as np
 
+from utils.instrumentation import record, stage as timed_stage
+from utils.spell_correction import get_spell_corrector
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -17,6 +25,19 @@ logger = logging.getLogger(__name__)
 # Initialize language detector
 DetectorFactory.seed = 0
 
+# Unicode ranges of scripts that identify a language without statistical detection
+SCRIPT_RANGES = [
+    ((0x0600, 0x06FF), 'ar'), ((0x0750, 0x077F), 'ar'), ((0x08A0, 0x08FF), 'ar'),
+    ((0xFB50, 0xFDFF), 'ar'), ((0xFE70, 0xFEFF), 'ar'),
+    ((0x0400, 0x052F), 'ru'),
+    ((0x3040, 0x30FF), 'ja'),
+    ((0x1100, 0x11FF), 'ko'), ((0xAC00, 0xD7AF), 'ko'),
+    ((0x4E00, 0x9FFF), 'zh'),
+]
+
+# Fraction of a chunk's letters that must belong to a script to decide by script alone
+SCRIPT_DOMINANCE = 0.5
+
 try:
     import cv2
     OPENCV_AVAILABLE = True
@@ -55,97 +76,370 @@ def convert_to_tesseract_langs(languages):
     # إذا لم يتم العثور على أي لغة صالحة، استخدم الإنجليزية
     return tesseract_langs if tesseract_langs else ['eng']
 
+@lru_cache(maxsize=1)
+def get_detector_factory():
+    """Load the langdetect profiles once per process"""
+    factory = DetectorFactory()
+    factory.load_profile(PROFILES_DIRECTORY)
+    factory.seed = 0
+    return factory
+
+def script_language(text):
+    """
+    Identify the language of a chunk from its Unicode script, or None when
+    the chunk is mostly Latin (or unknown) and needs statistical detection.
+    """
+    counts = Counter()
+    letters = 0
+    for char in text:
+        if not char.isalpha():
+            continue
+        letters += 1
+        code = ord(char)
+        if code < 0x0400:
+            continue
+        for (start, end), lang in SCRIPT_RANGES:
+            if start <= code <= end:
+                counts[lang] += 1
+                break
+    
+    if not letters or not counts:
+        return None
+    # Japanese text mixes kana with Han characters
+    if counts['ja'] and counts['zh']:
+        counts['ja'] += counts.pop('zh')
+    lang, count = counts.most_common(1)[0]
+    return lang if count / letters >= SCRIPT_DOMINANCE else None
+
+def normalize_chunk(text):
+    """Normalize a chunk so equivalent paragraphs share a detection result"""
+    return ' '.join(unicodedata.normalize('NFKC', text).split())
+
+# Arabic diacritics (harakat, tanween, shadda, sukun, superscript alef,
+# Quranic marks) and tatweel are dropped; alef variants become a bare alef
+ARABIC_NORMALIZATION = {
+    **{code: None for code in range(0x064B, 0x0660)},
+    0x0670: None,
+    **{code: None for code in range(0x06D6, 0x06EE)},
+    0x0640: None,
+    **{ord(alef): 'ا' for alef in 'أإآٱ'},
+}
+
+def normalize_arabic(text):
+    """Normalize Arabic spelling variants so they match in search"""
+    # NFKC first: presentation forms (U+FB50-FDFF, U+FE70-FEFF), common in
+    # PDF text layers, become the regular letters
+    return unicodedata.normalize('NFKC', text).translate(ARABIC_NORMALIZATION)
+
+@lru_cache(maxsize=20000)
+def detect_chunk_language(chunk):
+    """Detect the language of one normalized chunk (memoized)"""
+    lang = script_language(chunk)
+    if lang:
+        return lang
+    try:
+        detector = get_detector_factory().create()
+        detector.append(chunk)
+        return detector.detect()
+    except LangDetectException:
+        return None
+
+def detect_languages_batch(texts, min_length=50):
+    """
+    Detect the languages of several texts (e.g. all pages of a document) at once.
+
+    Every text is split into paragraphs; identical paragraphs across texts are
+    detected only once, and results are memoized across calls. Returns one
+    list of tesseract language codes per text.
+    """
+    text_chunks = []
+    unique_chunks = {}
+    for text in texts:
+        chunks = [
+            normalize_chunk(p) for p in (text or '').split('\n\n')
+            if len(p.strip()) >= min_length
+        ]
+        text_chunks.append(chunks)
+        for chunk in chunks:
+            unique_chunks.setdefault(chunk, None)
+    
+    with timed_stage('detect_languages'):
+        for chunk in unique_chunks:
+            unique_chunks[chunk] = detect_chunk_language(chunk)
+    
+    return [
+        convert_to_tesseract_langs(sorted({unique_chunks[c] for c in chunks if unique_chunks[c]}))
+        for chunks in text_chunks
+    ]
+
 def detect_languages(text, min_length=50):
     """
     Detect multiple languages in text by splitting it into chunks
     and detecting language for each chunk
     """
-    languages = set()
-    
-    # Split text into paragraphs
-    paragraphs = [p for p in text.split('\n\n') if len(p.strip()) >= min_length]
+    return detect_languages_batch([text], min_length)[0]
+
+# Image.info key recording which preprocessing stages were already applied
+APPLIED_STAGES_KEY = 'preprocessing_stages'
+
+class PageArray(np.ndarray):
+    """
+    uint8 page image (H x W) that remembers the preprocessing stages already
+    applied to it. Views and slices keep the stages of their base array.
+    """
     
-    for paragraph in paragraphs:
-        try:
-            lang = detect(paragraph)
-            languages.add(lang)
-        except:
-            continue
+    def __new__(cls, array, stages=()):
+        page = np.asarray(array, dtype=np.uint8).view(cls)
+        page.stages = tuple(stages)
+        return page
     
-    return convert_to_tesseract_langs(languages)
+    def __array_finalize__(self, obj):
+        self.stages = getattr(obj, 'stages', ())
 
-def enhance_image(image):
+def to_page_array(image):
+    """Convert a PIL image or ndarray to a PageArray, copying only when needed"""
+    if isinstance(image, PageArray):
+        return image
+    if isinstance(image, np.ndarray):
+        return PageArray(image)
+    # Keep the stages recorded by older code paths on PIL images
+    return PageArray(np.asarray(image), image.info.get(APPLIED_STAGES_KEY, ()))
+
+def contrast_lut(mean, factor):
+    """Lookup table equivalent to PIL ImageEnhance.Contrast around a mean gray level"""
+    values = mean + factor * (np.arange(256, dtype=np.float32) - mean)
+    return np.clip(np.rint(values), 0, 255).astype(np.uint8)
+
+def apply_lut(array, lut):
+    if OPENCV_AVAILABLE:
+        return cv2.LUT(np.asarray(array), lut)
+    return lut[array]
+
+# Noise sigma limits between no denoising, a median blur and NL-means
+DENOISE_THRESHOLDS = (2.0, 6.0)
+# Longest side of the decimated copy used to estimate noise
+NOISE_SAMPLE_SIZE = 1000
+
+def estimate_noise(page, sample_size=NOISE_SAMPLE_SIZE):
     """
-    تحسين جودة الصورة لتحسين نتائج OCR
+    Estimate the gaussian noise sigma of a grayscale page.
+
+    Uses the median absolute response of Immerkaer's Laplacian mask on a
+    decimated copy (every n-th pixel, so the noise is not averaged away);
+    the median ignores text edges, which cover a minority of the pixels.
     """
-    try:
+    step = max(1, max(page.shape[:2]) // sample_size)
+    sample = np.asarray(page[::step, ::step], dtype=np.float32)
+    if sample.shape[0] < 3 or sample.shape[1] < 3:
+        return 0.0
+    response = (
+        sample[:-2, :-2] - 2 * sample[:-2, 1:-1] + sample[:-2, 2:]
+        - 2 * sample[1:-1, :-2] + 4 * sample[1:-1, 1:-1] - 2 * sample[1:-1, 2:]
+        + sample[2:, :-2] - 2 * sample[2:, 1:-1] + sample[2:, 2:]
+    )
+    # The mask turns noise of sigma into noise of 6 sigma; MAD -> sigma
+    return float(np.median(np.abs(response)) / 0.6745 / 6)
+
+def choose_denoise(sigma, thresholds=DENOISE_THRESHOLDS):
+    """'none', 'median' or 'nlmeans' for a noise level"""
+    low, high = thresholds
+    if sigma < low:
+        return 'none'
+    if sigma < high:
+        return 'median'
+    return 'nlmeans'
+
+def smooth_3x3(array):
+    """PIL's SMOOTH filter (1 1 1 / 1 5 1 / 1 1 1, divided by 13) with numpy slicing"""
+    padded = np.pad(array.astype(np.uint16), 1, mode='edge')
+    total = padded[1:-1, 1:-1] * 5
+    for dy in (0, 1, 2):
+        for dx in (0, 1, 2):
+            if dy != 1 or dx != 1:
+                total += padded[dy:dy + array.shape[0], dx:dx + array.shape[1]]
+    return (total + 6) // 13
+
+class PreprocessingPipeline:
+    """
+    Ordered, composable image preprocessing for OCR.
+
+    Stages run in a fixed order (grayscale -> contrast -> denoise -> tone ->
+    binarize) and can be switched off individually. The page is converted
+    once to a single uint8 ndarray (a PageArray) and every stage works on
+    arrays, with contrast and brightness as lookup tables, so there are no
+    PIL round-trips between stages. The stages applied are recorded on the
+    PageArray, so running any pipeline again on an already processed page
+    skips them and each stage runs at most once per page. Time spent in every
+    stage is accumulated in ``timings``, and ``last_run`` holds the per-stage
+    milliseconds of the most recent run.
+
+    The denoise stage measures the page noise first and only runs NL-means
+    on noisy pages: below denoise_thresholds[0] nothing is done, below
+    denoise_thresholds[1] a 3x3 median blur is used. ``denoise_choices``
+    counts the methods chosen.
+    """
+    
+    STAGES = ('grayscale', 'contrast', 'denoise', 'tone', 'binarize')
+    
+    def __init__(self, grayscale=True, contrast=True, denoise=True, tone=True, binarize=True,
+                 denoise_thresholds=DENOISE_THRESHOLDS):
+        self.enabled = {
+            'grayscale': grayscale,
+            'contrast': contrast,
+            'denoise': denoise,
+            'tone': tone,
+            'binarize': binarize
+        }
+        self.denoise_thresholds = tuple(denoise_thresholds)
+        self.timings = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.denoise_choices = Counter()
+        self.last_run = {}
+    
+    def settings(self):
+        """Settings that change the output, e.g. for cache keys"""
+        return {**self.enabled, 'denoise_thresholds': list(self.denoise_thresholds)}
+    
+    def run(self, image):
+        """
+        Apply every enabled stage that has not been applied to the page yet.
+
+        Accepts a PIL image or an ndarray and returns a PageArray.
+        """
+        page = to_page_array(image)
+        applied = list(page.stages)
+        self.last_run = {}
+        for stage in self.STAGES:
+            if not self.enabled[stage] or stage in applied:
+                continue
+            start = time.perf_counter()
+            try:
+                page = PageArray(getattr(self, f'_{stage}')(page), applied)
+            except Exception as e:
+                logger.error(f"Error in preprocessing stage '{stage}': {str(e)}")
+            finally:
+                elapsed = time.perf_counter() - start
+                self.timings[stage] += elapsed
+                self.calls[stage] += 1
+                self.last_run[stage] = round(elapsed * 1000, 2)
+                record(f'preprocess.{stage}', elapsed)
+            applied.append(stage)
+            page.stages = tuple(applied)
+        return page
+    
+    def stage_timings(self):
+        """Return {stage: {'calls', 'total_ms', 'avg_ms'}} for the stages that ran"""
+        return {
+            stage: {
+                'calls': self.calls[stage],
+                'total_ms': round(self.timings[stage] * 1000, 2),
+                'avg_ms': round(self.timings[stage] * 1000 / self.calls[stage], 2)
+            }
+            for stage in self.STAGES if self.calls[stage]
+        }
+    
+    def reset_timings(self):
+        self.timings.clear()
+        self.calls.clear()
+        self.denoise_choices.clear()
+    
+    def _grayscale(self, page):
+        # تحويل إلى صورة رمادية
+        if page.ndim == 2:
+            return page
+        if OPENCV_AVAILABLE:
+            code = cv2.COLOR_RGBA2GRAY if page.shape[2] == 4 else cv2.COLOR_RGB2GRAY
+            return cv2.cvtColor(np.asarray(page), code)
+        # ITU-R 601-2 luma, as PIL convert('L')
+        rgb = page[..., :3].astype(np.uint32)
+        return ((rgb[..., 0] * 299 + rgb[..., 1] * 587 + rgb[..., 2] * 114 + 500) // 1000).astype(np.uint8)
+    
+    def _contrast(self, page):
+        # تحسين التباين
         if OPENCV_AVAILABLE:
-            # تحويل الصورة إلى مصفوفة numpy
-            if isinstance(image, Image.Image):
-                img_array = np.array(image)
-            else:
-                img_array = image
-
-            # تحويل إلى صورة رمادية
-            if len(img_array.shape) == 3:
-                gray = cv2.cvtColor(img_array, cv2.COLOR_BGR2GRAY)
-            else:
-                gray = img_array
-
-            # تحسين التباين
             clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
-            gray = clahe.apply(gray)
-
-            # إزالة الضوضاء
-            denoised = cv2.fastNlMeansDenoising(gray)
-            
-            # تحويل النتيجة إلى صورة PIL
-            enhanced_image = Image.fromarray(denoised)
-        else:
-            # استخدام معالجة الصور الأساسية من PIL
-            enhanced_image = image.convert('L')
-            
-            # تحسين التباين
-            enhancer = ImageEnhance.Contrast(enhanced_image)
-            enhanced_image = enhancer.enhance(2.0)
-            
-            # تحسين الحدة
-            enhancer = ImageEnhance.Sharpness(enhanced_image)
-            enhanced_image = enhancer.enhance(1.5)
+            return clahe.apply(np.asarray(page))
         
-        # تحسين نهائي للسطوع والتباين
-        enhancer = ImageEnhance.Contrast(enhanced_image)
-        enhanced_image = enhancer.enhance(1.5)
-        enhancer = ImageEnhance.Brightness(enhanced_image)
-        enhanced_image = enhancer.enhance(1.2)
+        # بدون OpenCV: تباين (2.0) بجدول بحث ثم زيادة الحدة (1.5)
+        page = apply_lut(page, contrast_lut(int(page.mean() + 0.5), 2.0))
+        sharpened = page + 0.5 * (page.astype(np.float32) - smooth_3x3(page))
+        return np.clip(np.rint(sharpened), 0, 255).astype(np.uint8)
+    
+    def _denoise(self, page):
+        # إزالة الضوضاء حسب مستوى الضوضاء في الصفحة
+        start = time.perf_counter()
+        method = choose_denoise(estimate_noise(page), self.denoise_thresholds)
+        record('preprocess.noise_estimate', time.perf_counter() - start)
+        self.denoise_choices[method] += 1
         
-        return enhanced_image
+        if not OPENCV_AVAILABLE or method == 'none':
+            return page
+        if method == 'median':
+            return cv2.medianBlur(np.asarray(page), 3)
+        return cv2.fastNlMeansDenoising(np.asarray(page))
+    
+    def _tone(self, page):
+        # تحسين نهائي للسطوع والتباين: جدول بحث واحد للتباين (1.5) ثم السطوع (1.2)
+        contrast = contrast_lut(int(page.mean() + 0.5), 1.5)
+        lut = np.clip(np.rint(contrast * 1.2), 0, 255).astype(np.uint8)
+        return apply_lut(page, lut)
+    
+    def _binarize(self, page):
+        if OPENCV_AVAILABLE:
+            # تحويل الصورة إلى أبيض وأسود باستخدام عتبة تكيفية
+            return cv2.adaptiveThreshold(
+                np.asarray(page),
+                255,
+                cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                cv2.THRESH_BINARY,
+                11,
+                2
+            )
+        # بدون OpenCV: عتبة ثابتة
+        return np.where(page < 128, 0, 255).astype(np.uint8)
+
+def estimate_x_height(image, min_components=20):
+    """
+    Estimate the typical character height (pixels) of a page image from the
+    connected components of its binarized ink. Returns None when there is
+    not enough text (or OpenCV is missing) to tell.
+    """
+    if not OPENCV_AVAILABLE:
+        return None
+    gray = np.asarray(image.convert('L') if isinstance(image, Image.Image) else image)
+    _, ink = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    count, _, stats, _ = cv2.connectedComponentsWithStats(ink, connectivity=8)
+    heights = stats[1:, cv2.CC_STAT_HEIGHT]
+    widths = stats[1:, cv2.CC_STAT_WIDTH]
+    areas = stats[1:, cv2.CC_STAT_AREA]
+    # Drop specks, rules, images and frames
+    glyphs = (heights >= 2) & (heights < gray.shape[0] * 0.1) & (widths < gray.shape[1] * 0.1) & (areas >= 3)
+    if np.count_nonzero(glyphs) < min_components:
+        return None
+    # Lowercase letters without ascenders dominate ordinary text
+    return float(np.median(heights[glyphs]))
+
+# Pipelines shared by the OCR paths
+OCR_PIPELINE = PreprocessingPipeline()
+ENHANCE_PIPELINE = PreprocessingPipeline(binarize=False)
+
+def enhance_image(image):
+    """
+    تحسين جودة الصورة لتحسين نتائج OCR
+    """
+    try:
+        return ENHANCE_PIPELINE.run(image)
     except Exception as e:
         logger.error(f"Error enhancing image: {str(e)}")
         return image
 
-def preprocess_image_for_ocr(image):
+def preprocess_image_for_ocr(image, pipeline=None):
     """
     تجهيز الصورة لعملية OCR
+
+    Returns a PageArray, which pytesseract accepts directly.
     """
-    # تطبيق التحسينات الأساسية
-    enhanced = enhance_image(image)
-    
-    if OPENCV_AVAILABLE:
-        # تحويل الصورة إلى أبيض وأسود باستخدام عتبة تكيفية
-        img_array = np.array(enhanced)
-        binary = cv2.adaptiveThreshold(
-            img_array,
-            255,
-            cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-            cv2.THRESH_BINARY,
-            11,
-            2
-        )
-        return Image.fromarray(binary)
-    else:
-        # استخدام معالجة الصور الأساسية من PIL
-        return enhanced.point(lambda x: 0 if x < 128 else 255, '1')
+    return (pipeline or OCR_PIPELINE).run(image)
 
 def format_text(text, format_options):
     """Format text based on selected options"""
@@ -164,17 +458,17 @@ def format_text(text, format_options):
 def correct_text(text, langs):
     """Apply text corrections based on detected languages"""
     try:
-        # Handle right-to-left languages
-        if 'ara' in langs:
-            # Reshape Arabic text
-            text = arabic_reshaper.reshape(text)
-            # Handle bidirectional text
-            text = get_display(text)
-        
-        # Apply spell checking for English text
-        if 'eng' in langs:
-            blob = TextBlob(text)
-            text = str(blob.correct())
+        with timed_stage('correct_text'):
+            # Handle right-to-left languages
+            if 'ara' in langs:
+                # Reshape Arabic text
+                text = arabic_reshaper.reshape(text)
+                # Handle bidirectional text
+                text = get_display(text)
+            
+            # Apply spell checking for English text
+            if 'eng' in langs:
+                text = get_spell_corrector().correct(text)
         
         return text
     except Exception as e: